@@ -20,41 +20,79 @@ def get_qubic_verify_dll():
 qubic_verify_dll = get_qubic_verify_dll()
 
 
+def _bind(name: str, argtypes: list, restype=None):
+    """Resolves the function of the library once
+    """
+    if qubic_verify_dll is None:
+        return None
+
+    function = qubic_verify_dll[name]
+    function.argtypes = argtypes
+    function.restype = restype
+    return function
+
+
+c_nonce_type_array = ctypes.c_uint8 * 32 * 1000
+NUMBER_OF_SOLUTION_NONCES = 1000
+PUBLIC_KEY_SIZE = 32
+DIGEST_SIZE = 32
+SIGNATURE_SIZE = 64
+IDENTITY_SIZE = 70
+
+_get_public_key_from_id_C = _bind('get_public_key_from_id', [
+                                  ctypes.c_char_p, ctypes.c_char_p])
+_verify_C = _bind('verify_signature', [
+                  ctypes.c_char_p, ctypes.c_char_p, ctypes.c_char_p], ctypes.c_bool)
+_verify_message_C = _bind('verify_message', [
+                          ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint64, ctypes.c_char_p], ctypes.c_bool)
+_kangaroo_twelve_C = _bind('kangaroo_twelve', [
+                           ctypes.c_char_p, ctypes.c_ulonglong, ctypes.c_char_p, ctypes.c_ulonglong])
+_get_subseed_C = _bind(
+    'get_subseed', [ctypes.c_char_p, ctypes.c_char_p], ctypes.c_bool)
+_get_private_key_C = _bind(
+    'get_private_key', [ctypes.c_char_p, ctypes.c_char_p])
+_get_public_key_C = _bind('get_public_key', [ctypes.c_char_p, ctypes.c_char_p])
+_get_identity_C = _bind('get_identity', [ctypes.c_char_p, ctypes.c_void_p])
+_sign_C = _bind('sign_signature', [ctypes.c_char_p, ctypes.c_char_p,
+                                   ctypes.c_char_p, ctypes.c_char_p])
+_sign_message_C = _bind('sign_message', [ctypes.c_char_p, ctypes.c_char_p,
+                                         ctypes.c_char_p, ctypes.c_uint64, ctypes.c_char_p])
+_get_score_C = _bind('get_score', [c_nonce_type_array,
+                     ctypes.c_uint16], ctypes.c_uint32)
+_get_real_score_C = _bind('get_real_score', [ctypes.c_char_p,
+                                             c_nonce_type_array, ctypes.c_uint16], ctypes.c_uint32)
+
+# The same functions taking raw addresses, used by the bulk functions
+_verify_ptr_C = _bind('verify_signature', [
+                      ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p], ctypes.c_bool)
+_kangaroo_twelve_ptr_C = _bind('kangaroo_twelve', [
+                               ctypes.c_void_p, ctypes.c_ulonglong, ctypes.c_void_p, ctypes.c_ulonglong])
+_get_identity_ptr_C = _bind(
+    'get_identity', [ctypes.c_void_p, ctypes.c_void_p])
+_get_public_key_from_id_ptr_C = _bind('get_public_key_from_id', [
+                                      ctypes.c_char_p, ctypes.c_void_p])
+
+
 def get_public_key_from_id(id: str) -> bytes:
-    get_public_key_from_id_C = qubic_verify_dll.get_public_key_from_id
-    get_public_key_from_id_C.argtypes = [ctypes.c_char_p, ctypes.c_char_p]
     public_key_type = (ctypes.c_ubyte * 32)
     pubic_key = public_key_type()
-    get_public_key_from_id_C(
+    _get_public_key_from_id_C(
         id.encode('ascii'), ctypes.cast(pubic_key, ctypes.c_char_p))
     return bytes(pubic_key)
 
 
 def verify(public_key: bytes, digest: bytes, signature: bytes) -> bool:
-    verify_C = qubic_verify_dll.verify_signature
-    verify_C.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_char_p]
-    verify_C.restype = ctypes.c_bool
-
-    return verify_C(ctypes.c_char_p(public_key), ctypes.c_char_p(digest), ctypes.c_char_p(signature))
+    return _verify_C(ctypes.c_char_p(public_key), ctypes.c_char_p(digest), ctypes.c_char_p(signature))
 
 
 def verify_message(public_key: bytes, message: bytes, signature: bytes) -> bool:
-    verify_message_C = qubic_verify_dll.verify_message
-    verify_message_C.argtypes = [
-        ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint64, ctypes.c_char_p]
-    verify_message_C.restype = ctypes.c_bool
-
-    return verify_message_C(ctypes.c_char_p(public_key), ctypes.c_char_p(message), ctypes.c_uint64(len(message)), ctypes.c_char_p(signature))
+    return _verify_message_C(ctypes.c_char_p(public_key), ctypes.c_char_p(message), ctypes.c_uint64(len(message)), ctypes.c_char_p(signature))
 
 
 def kangaroo_twelve(data: bytes) -> bytes:
-    kangaroo_twelve_C = qubic_verify_dll.kangaroo_twelve
-    kangaroo_twelve_C.argtypes = [
-        ctypes.c_char_p, ctypes.c_ulonglong, ctypes.c_char_p, ctypes.c_ulonglong]
-
     digest_size = 32
     digest_buffer = create_string_buffer(digest_size)
-    kangaroo_twelve_C(ctypes.c_char_p(data), ctypes.c_ulonglong(
+    _kangaroo_twelve_C(ctypes.c_char_p(data), ctypes.c_ulonglong(
         len(data)), digest_buffer, digest_size)
     return bytes(digest_buffer)
 
@@ -74,62 +112,41 @@ def str_signature_to_bytes(signature: str) -> bytes:
 
 
 def get_subseed(seed: str):
-    get_subseed_C = qubic_verify_dll.get_subseed
-    get_subseed_C.argtypes = [ctypes.c_char_p, ctypes.c_char_p]
-    get_subseed_C.restype = ctypes.c_bool
-
     subseed_buffer = create_string_buffer(32)
-    result = get_subseed_C(ctypes.c_char_p(
+    result = _get_subseed_C(ctypes.c_char_p(
         seed.encode('ascii')), subseed_buffer)
     return (result, bytes(subseed_buffer))
 
 
 def get_private_key(subseed: bytes) -> bytes:
-    get_private_key_C = qubic_verify_dll.get_private_key
-    get_private_key_C.argtypes = [ctypes.c_char_p, ctypes.c_char_p]
-
     private_key_buffer = create_string_buffer(32)
-    get_private_key_C(ctypes.c_char_p(subseed), private_key_buffer)
+    _get_private_key_C(ctypes.c_char_p(subseed), private_key_buffer)
     return bytes(private_key_buffer)
 
 
 def get_public_key(private_key: bytes) -> bytes:
-    get_public_key_C = qubic_verify_dll.get_public_key
-    get_public_key_C.argtypes = [ctypes.c_char_p, ctypes.c_char_p]
-
     public_key_buffer = create_string_buffer(32)
-    get_public_key_C(ctypes.c_char_p(private_key), public_key_buffer)
+    _get_public_key_C(ctypes.c_char_p(private_key), public_key_buffer)
     return bytes(public_key_buffer)
 
 
 def get_identity(public_key: bytes):
-    get_identity_C = qubic_verify_dll.get_identity
-    get_identity_C.argtypes = [ctypes.c_char_p]
-
-    identity_buffer = (ctypes.c_uint16 * (70))()
-    get_identity_C(ctypes.c_char_p(public_key), identity_buffer)
+    identity_buffer = (ctypes.c_uint16 * (IDENTITY_SIZE))()
+    _get_identity_C(ctypes.c_char_p(public_key), identity_buffer)
 
-    return ''.join([chr(s) for s in identity_buffer])
+    return bytes(identity_buffer).decode('utf-16-le')
 
 
 def sign(subseed: bytes, public_key: bytes, digest: bytes) -> bytes:
-    sign_C = qubic_verify_dll.sign_signature
-    sign_C.argtypes = [ctypes.c_char_p, ctypes.c_char_p,
-                       ctypes.c_char_p, ctypes.c_char_p]
-
     signature_buffer = create_string_buffer(64)
-    sign_C(ctypes.c_char_p(subseed), ctypes.c_char_p(
+    _sign_C(ctypes.c_char_p(subseed), ctypes.c_char_p(
         public_key), ctypes.c_char_p(digest), signature_buffer)
     return bytes(signature_buffer)
 
 
 def sign_message(subseed: bytes, public_key: bytes, message: bytes) -> bytes:
-    sign_message_C = qubic_verify_dll.sign_message
-    sign_message_C.argtypes = [ctypes.c_char_p, ctypes.c_char_p,
-                               ctypes.c_char_p, ctypes.c_uint64, ctypes.c_char_p]
-
     signature_buffer = create_string_buffer(64)
-    sign_message_C(ctypes.c_char_p(subseed), ctypes.c_char_p(
+    _sign_message_C(ctypes.c_char_p(subseed), ctypes.c_char_p(
         public_key), ctypes.c_char_p(message), ctypes.c_uint64(len(message)), signature_buffer)
     return bytes(signature_buffer)
 
@@ -143,22 +160,154 @@ def pretty_signatyre(signature: bytes) -> str:
     return signature_str
 
 
-c_nonce_type_array = ctypes.c_uint8 * 32 * 1000
-NUMBER_OF_SOLUTION_NONCES = 1000
+def get_score(nonces: c_nonce_type_array) -> int:
+    return _get_score_C(nonces, NUMBER_OF_SOLUTION_NONCES)
 
 
-def get_score(nonces: c_nonce_type_array) -> int:
-    get_score_C = qubic_verify_dll.get_score
-    get_score_C.argtypes = [c_nonce_type_array, ctypes.c_uint16]
-    get_score_C.restype = ctypes.c_uint32
+def get_real_score(public_key: bytes, nonces: c_nonce_type_array):
+    return _get_real_score_C(ctypes.c_char_p(public_key), nonces, NUMBER_OF_SOLUTION_NONCES)
 
-    return get_score_C(nonces, NUMBER_OF_SOLUTION_NONCES)
 
 
-def get_real_score(public_key: bytes, nonces: c_nonce_type_array):
-    get_real_score_C = qubic_verify_dll.get_real_score
-    get_real_score_C.argtypes = [ctypes.c_char_p,
-                                 c_nonce_type_array, ctypes.c_uint16]
-    get_real_score_C.restype = ctypes.c_uint32
+"""Bulk functions
+
+They take contiguous buffers (bytes, bytearray, numpy arrays or any object
+supporting the buffer protocol) holding one item after another and cross
+the library boundary without creating Python objects per item. Large
+inputs are split into shards which run in threads, the library releases
+the GIL.
+"""
+
+# Inputs smaller than this are processed in the calling thread
+SHARD_MIN_SIZE = 64
+_shard_executor = None
+
+
+def _get_shard_executor():
+    global _shard_executor
+    if _shard_executor is None:
+        import os
+        from concurrent.futures import ThreadPoolExecutor
+
+        _shard_executor = ThreadPoolExecutor(
+            max_workers=os.cpu_count() or 1, thread_name_prefix='qubic_verify')
+
+    return _shard_executor
+
+
+def _run_sharded(function, count: int, max_workers=None):
+    """Calls function(begin, end) for shards of the [0, count) range
+    """
+    import os
 
-    return get_real_score_C(ctypes.c_char_p(public_key), nonces, NUMBER_OF_SOLUTION_NONCES)
+    workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+    shards = min(workers, count // SHARD_MIN_SIZE)
+    if shards <= 1:
+        function(0, count)
+        return
+
+    shard_size = -(-count // shards)
+    executor = _get_shard_executor()
+    futures = [executor.submit(function, begin, min(begin + shard_size, count))
+               for begin in range(0, count, shard_size)]
+    for future in futures:
+        future.result()
+
+
+def _get_address(data) -> tuple:
+    """Returns the address of the buffer and the object which keeps it alive
+    """
+    if isinstance(data, bytes):
+        pointer = ctypes.c_char_p(data)
+        return (ctypes.cast(pointer, ctypes.c_void_p).value or 0, (data, pointer))
+
+    view = memoryview(data)
+    if view.readonly or not view.c_contiguous:
+        return _get_address(view.tobytes())
+
+    view = view.cast('B')
+    array = (ctypes.c_char * view.nbytes).from_buffer(view)
+    return (ctypes.addressof(array), array)
+
+
+def _get_count(data, item_size: int, name: str) -> int:
+    size = memoryview(data).nbytes
+    if size % item_size != 0:
+        raise ValueError(f'{name} size must be a multiple of {item_size}')
+
+    return size // item_size
+
+
+def kangaroo_twelve_many(data, item_size: int, max_workers=None) -> bytes:
+    """Digests of the `item_size` long items of `data`, one after another
+    """
+    count = _get_count(data, item_size, 'data')
+    address, keep_alive = _get_address(data)
+    digests = create_string_buffer(DIGEST_SIZE * count)
+    digests_address = ctypes.addressof(digests)
+
+    def shard(begin: int, end: int):
+        for idx in range(begin, end):
+            _kangaroo_twelve_ptr_C(address + idx * item_size, item_size,
+                                   digests_address + idx * DIGEST_SIZE, DIGEST_SIZE)
+
+    _run_sharded(shard, count, max_workers)
+    return digests.raw
+
+
+def verify_many(public_keys, digests, signatures, max_workers=None) -> list:
+    """Verifies the signatures of the digests, returns a list of bool
+    """
+    count = _get_count(public_keys, PUBLIC_KEY_SIZE, 'public_keys')
+    if _get_count(digests, DIGEST_SIZE, 'digests') != count or _get_count(signatures, SIGNATURE_SIZE, 'signatures') != count:
+        raise ValueError('The number of public keys, digests and signatures must be the same')
+
+    public_keys_address, keep_public_keys = _get_address(public_keys)
+    digests_address, keep_digests = _get_address(digests)
+    signatures_address, keep_signatures = _get_address(signatures)
+    results = [False] * count
+
+    def shard(begin: int, end: int):
+        for idx in range(begin, end):
+            results[idx] = _verify_ptr_C(public_keys_address + idx * PUBLIC_KEY_SIZE,
+                                         digests_address + idx * DIGEST_SIZE,
+                                         signatures_address + idx * SIGNATURE_SIZE)
+
+    _run_sharded(shard, count, max_workers)
+    return results
+
+
+def get_identities(public_keys, max_workers=None) -> list:
+    """Identities of the 32 bytes long public keys
+    """
+    count = _get_count(public_keys, PUBLIC_KEY_SIZE, 'public_keys')
+    address, keep_alive = _get_address(public_keys)
+    identities = (ctypes.c_uint16 * (IDENTITY_SIZE * count))()
+    identities_address = ctypes.addressof(identities)
+    identity_bytes = ctypes.sizeof(ctypes.c_uint16) * IDENTITY_SIZE
+
+    def shard(begin: int, end: int):
+        for idx in range(begin, end):
+            _get_identity_ptr_C(address + idx * PUBLIC_KEY_SIZE,
+                                identities_address + idx * identity_bytes)
+
+    _run_sharded(shard, count, max_workers)
+    text = bytes(identities).decode('utf-16-le')
+    return [text[idx:idx + IDENTITY_SIZE] for idx in range(0, len(text), IDENTITY_SIZE)]
+
+
+def get_public_keys(ids: list, max_workers=None) -> bytes:
+    """Public keys of the identities, one after another
+    """
+    encoded_ids = [id.encode('ascii') for id in ids]
+    count = len(encoded_ids)
+    public_keys = create_string_buffer(PUBLIC_KEY_SIZE * count)
+    public_keys_address = ctypes.addressof(public_keys)
+
+    def shard(begin: int, end: int):
+        for idx in range(begin, end):
+            _get_public_key_from_id_ptr_C(
+                encoded_ids[idx], public_keys_address + idx * PUBLIC_KEY_SIZE)
+
+    _run_sharded(shard, count, max_workers)
+    return public_keys.raw
@@ -0,0 +1,114 @@
+"""Frames/sec of the peer read path.
+
+Compares the StreamReader based reader (two readexactly calls per frame, each
+one wrapped in a task and asyncio.wait_for) with QubicProtocol.
+
+Usage (from the libs folder):
+    python -m benchmarks.frame_reader [--frames 20000] [--message solution|tick]
+"""
+import argparse
+import asyncio
+import time
+from ctypes import sizeof
+
+from qubic.qubicdata import (BROADCAST_RESOURCE_TESTING_SOLUTION,
+                             BROADCAST_TICK, BroadcastResourceTestingSolution,
+                             RequestResponseHeader, Tick)
+from qubic.qubicprotocol import QubicProtocol
+from qubic.qubicutils import (get_header_from_bytes, get_raw_payload,
+                              is_valid_header)
+from utils.backgroundtasks import BackgroundTasks
+
+READ_TIMEOUT = 10
+MESSAGES = {
+    'solution': (BROADCAST_RESOURCE_TESTING_SOLUTION, BroadcastResourceTestingSolution),
+    'tick': (BROADCAST_TICK, Tick)
+}
+
+
+def make_frame(header_type: int, payload_size: int) -> bytes:
+    header = RequestResponseHeader(size=sizeof(RequestResponseHeader) + payload_size, protocol=0,
+                                   type=header_type)
+    return bytes(header) + bytes(payload_size)
+
+
+async def start_server(frame: bytes, frames: int):
+    """Sends exactly `frames` frames in chunks of about 1 MB
+    """
+    per_chunk = max(1, (1024 * 1024) // len(frame))
+    chunk = frame * per_chunk
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        sent = 0
+        while sent < frames:
+            count = min(per_chunk, frames - sent)
+            writer.write(chunk if count == per_chunk else frame * count)
+            await writer.drain()
+            sent += count
+        writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def legacy_reader(port: int, frames: int, structure):
+    background_tasks = BackgroundTasks()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+
+    async def read_data(size):
+        task = background_tasks.create_task(reader.readexactly, size)
+        return await asyncio.wait_for(task, READ_TIMEOUT)
+
+    for _ in range(frames):
+        task = background_tasks.create_task(
+            read_data, sizeof(RequestResponseHeader))
+        raw_header = await asyncio.wait_for(task, READ_TIMEOUT)
+        header = RequestResponseHeader.from_buffer_copy(raw_header)
+        if not is_valid_header(header):
+            raise ValueError("Invalid header")
+        raw_payload = await read_data(header.size - sizeof(header))
+        raw_data = raw_header + raw_payload
+
+        header = get_header_from_bytes(raw_data)
+        structure.from_buffer_copy(get_raw_payload(raw_data))
+
+    writer.close()
+
+
+async def protocol_reader(port: int, frames: int, structure):
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_connection(
+        lambda: QubicProtocol(READ_TIMEOUT), '127.0.0.1', port)
+
+    for _ in range(frames):
+        header, raw_frame = await protocol.read_frame()
+        structure.from_buffer_copy(raw_frame[sizeof(RequestResponseHeader):])
+
+    transport.close()
+
+
+async def run(name: str, reader, structure, frame: bytes, frames: int):
+    server, port = await start_server(frame, frames)
+    async with server:
+        begin = time.perf_counter()
+        await reader(port, frames, structure)
+        elapsed = time.perf_counter() - begin
+
+    print(f'{name}: {frames} frames in {elapsed:.3f}s, {frames / elapsed:,.0f} frames/sec')
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=20000)
+    parser.add_argument('--message', choices=MESSAGES.keys(),
+                        default='solution')
+    args = parser.parse_args()
+
+    header_type, structure = MESSAGES[args.message]
+    frame = make_frame(header_type, sizeof(structure))
+    await run('StreamReader', legacy_reader, structure, frame, args.frames)
+    await run('QubicProtocol', protocol_reader, structure, frame, args.frames)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
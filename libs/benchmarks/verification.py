@@ -0,0 +1,70 @@
+"""Verified frames/sec against the number of SignatureVerifier workers.
+
+Usage (from the libs folder):
+    python -m benchmarks.verification [--frames 5000] [--workers 1 2 4 8]
+"""
+import argparse
+import asyncio
+import secrets
+import string
+import time
+from ctypes import sizeof
+
+from algorithms.verify import (get_private_key, get_public_key, get_subseed,
+                               kangaroo_twelve, sign)
+from qubic.qubicdata import SIGNATURE_SIZE, Tick
+from qubic.qubicutils import is_valid_signature, verification_cache
+from qubic.qubicverifier import SignatureVerifier
+
+
+def make_signed_data(frames: int) -> tuple[bytes, list]:
+    seed = ''.join(secrets.choice(string.ascii_lowercase) for _ in range(55))
+    _, subseed = get_subseed(seed)
+    public_key = get_public_key(get_private_key(subseed))
+
+    items = []
+    for _ in range(frames):
+        data = secrets.token_bytes(sizeof(Tick) - SIGNATURE_SIZE)
+        items.append((data, sign(subseed, public_key, kangaroo_twelve(data))))
+
+    return public_key, items
+
+
+def run_inline(public_key: bytes, items: list):
+    verification_cache.clear()
+    begin = time.perf_counter()
+    results = [is_valid_signature(public_key, data, signature)
+               for data, signature in items]
+    elapsed = time.perf_counter() - begin
+
+    assert all(results)
+    print(f'inline: {len(items) / elapsed:,.0f} frames/sec')
+
+
+async def run_verifier(public_key: bytes, items: list, workers: int):
+    verifier = SignatureVerifier(workers)
+    verification_cache.clear()
+    begin = time.perf_counter()
+    results = await asyncio.gather(*[verifier.verify(public_key, data, signature)
+                                     for data, signature in items])
+    elapsed = time.perf_counter() - begin
+    verifier.shutdown()
+
+    assert all(results)
+    print(f'{workers} workers: {len(items) / elapsed:,.0f} frames/sec')
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=5000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    public_key, items = make_signed_data(args.frames)
+    run_inline(public_key, items)
+    for workers in args.workers:
+        await run_verifier(public_key, items, workers)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
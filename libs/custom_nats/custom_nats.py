@@ -100,12 +100,12 @@ class Nats():
             logging.exception(e)
             return None
 
-    async def publish(self, subject: str, payload: bytes):
+    async def publish(self, subject: str, payload: bytes, headers: Optional[dict] = None):
         if self.is_disconected:
             return None
 
         try:
-            return await self.nc.publish(subject=subject, payload=payload)
+            return await self.nc.publish(subject=subject, payload=payload, headers=headers)
         except asyncio.CancelledError as e:
             raise e
         except nats.errors.Error as e:
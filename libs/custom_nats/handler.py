@@ -1,18 +1,54 @@
 import asyncio
 import logging
-from typing import Optional
+import time
+from typing import Callable, Hashable, Optional
 
 from nats.aio.msg import Msg
 from nats.aio.subscription import Subscription
+from utils.metrics import Counter, Gauge, Histogram, Metrics
 
 from custom_nats.custom_nats import Nats
 
 
+class HandlerMetrics(Metrics):
+    """Metrics of all handlers, labeled by the class name of the handler
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.queue_depth = self.add(Gauge(
+            'nats_handler_queue_depth', 'Received messages which are not handled yet', ('handler',)))
+        self.latency = self.add(Histogram(
+            'nats_handler_seconds', 'Time to handle a message', ('handler',)))
+        self.errors = self.add(Counter(
+            'nats_handler_errors_total', 'Messages whose handling raised an exception', ('handler',)))
+
+
+handler_metrics = HandlerMetrics()
+
+
 class Handler():
-    def __init__(self, nc: Nats) -> None:
+    """Handles the messages of one subscription.
+
+    `concurrency` messages are handled at the same time. If `key` is given
+    the messages with the same key are handled one after another in the
+    order they came, the other ones in parallel. At most `max_in_flight`
+    messages are received and not handled yet, then the subscription is not
+    read until a message is done.
+    """
+    IN_FLIGHT_PER_WORKER = 16
+
+    def __init__(self, nc: Nats, concurrency: int = 1, key: Optional[Callable[[Msg], Hashable]] = None,
+                 max_in_flight: Optional[int] = None) -> None:
         self._nc = nc
         self._sub: Optional[Subscription] = None
         self._background_tasks = set()
+        self._concurrency = max(concurrency, 1)
+        self._key = key
+        self._in_flight = asyncio.Semaphore(
+            max_in_flight if max_in_flight is not None else self._concurrency * Handler.IN_FLIGHT_PER_WORKER)
+        self._depth = 0
+        self._labels = (self.__class__.__name__,)
 
     def add_task(self, task: asyncio.Task):
         try:
@@ -57,15 +93,63 @@ class Handler():
             logging.exception(TypeError(f'Subscription must be of the {Subscription.__name__} type'))
 
         self._sub = sub
+        # Without a key all workers take the messages from one queue
+        queues = [asyncio.Queue() for _ in range(
+            self._concurrency if self._key is not None else 1)]
+        workers = [asyncio.create_task(self.__work(queues[idx % len(queues)]))
+                   for idx in range(self._concurrency)]
+        for worker in workers:
+            self.add_task(worker)
+
         try:
             while not sub._closed and not self._nc.is_disconected:
                 msg = await self._wait_msg(sub)
                 if msg is None:
                     continue
 
-                await self._handler_msg(msg)
+                await self._in_flight.acquire()
+                self.__set_depth(1)
+                self.__get_queue(queues, msg).put_nowait(msg)
         except Exception as e:
             logging.exception(e)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            # The queued messages are dropped, the one being handled releases itself
+            for queue in queues:
+                while not queue.empty():
+                    queue.get_nowait()
+                    self.__set_depth(-1)
+                    self._in_flight.release()
+
+    def __get_queue(self, queues: list, msg: Msg) -> asyncio.Queue:
+        if len(queues) <= 1:
+            return queues[0]
+
+        try:
+            return queues[hash(self._key(msg)) % len(queues)]
+        except Exception as e:
+            logging.exception(e)
+            return queues[0]
+
+    def __set_depth(self, change: int):
+        self._depth += change
+        handler_metrics.queue_depth.set(self._labels, self._depth)
+
+    async def __work(self, queue: asyncio.Queue):
+        while True:
+            msg = await queue.get()
+            begin = time.perf_counter()
+            try:
+                await self._handler_msg(msg)
+            except Exception as e:
+                logging.exception(e)
+                handler_metrics.errors.inc(self._labels)
+            finally:
+                handler_metrics.latency.observe(
+                    self._labels, time.perf_counter() - begin)
+                self.__set_depth(-1)
+                self._in_flight.release()
 
     async def cancel(self):
         task: asyncio.Task = None
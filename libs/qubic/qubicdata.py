@@ -53,6 +53,24 @@ class DataSubjects:
     SCORES = 'qubic.data.scores'
     REVENUES = 'qubic.data.revenues'
     EPOCH = 'qubic.data.epoch'
+    # Changes since the previous delta, the snapshots above are published less often
+    TICKS_DELTA = 'qubic.data.ticks.delta'
+    SCORES_DELTA = 'qubic.data.scores.delta'
+    REVENUES_DELTA = 'qubic.data.revenues.delta'
+    # Partial data of the data_processing replicas, combined by the merge stage
+    PARTIAL = 'qubic.data.partial'
+    # Header with the sequence number of the snapshots and the deltas. A snapshot
+    # contains every delta up to its sequence number
+    SEQUENCE_HEADER = 'Qubic-Sequence'
+    # Header with the format of the ticks, scores and revenues, see qubic.qubicencoding
+    FORMAT_HEADER = 'Qubic-Format'
+    FORMAT_BINARY = 'binary'
+    FORMAT_JSON = 'json'
+
+
+class MetricsSubjects:
+    NETWORK = 'qubic.metrics.network'
+    DATA_PROCESSING = 'qubic.metrics.data_processing'
 
 
 """Network packages
@@ -138,6 +156,22 @@ class BroadcastRevenues(ctypes.Structure):
     _fields_ = [('revenues', Revenues)]
 
 
+"""Payload sizes
+"""
+
+# Header type -> (minimum, maximum) payload size, the frames of other types are skipped
+PAYLOAD_SIZES = {
+    EXCHANGE_PUBLIC_PEERS: (ctypes.sizeof(ExchangePublicPeers),) * 2,
+    BROADCAST_RESOURCE_TESTING_SOLUTION: (ctypes.sizeof(BroadcastResourceTestingSolution),) * 2,
+    BROADCAST_COMPUTORS: (ctypes.sizeof(BroadcastComputors),) * 2,
+    BROADCAST_TICK: (ctypes.sizeof(Tick),) * 2,
+    BROADCAST_REVENUES: (ctypes.sizeof(Revenues),) * 2,
+    REQUEST_COMPUTORS: (0, 0),
+}
+MAX_FRAME_SIZE = ctypes.sizeof(RequestResponseHeader) + \
+    max([maximum for _, maximum in PAYLOAD_SIZES.values()])
+
+
 class System(ctypes.Structure):
     _fields_ = [('version', ctypes.c_short),
                 ('epoch', ctypes.c_ushort),
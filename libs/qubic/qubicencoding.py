@@ -0,0 +1,187 @@
+import ctypes
+from ctypes import sizeof
+from typing import Optional
+
+import numpy
+from algorithms.verify import PUBLIC_KEY_SIZE, get_identities, get_public_keys
+
+from qubic.qubicdata import NUMBER_OF_COMPUTORS
+
+"""Binary format of the DataSubjects payloads
+
+A DataHeader is followed by the body, the body is zstd compressed if
+FLAG_ZSTD is set. Everything is little endian and keyed by the computor
+index, the bodies are:
+
+KIND_TICKS     uint16 computor indices[count], padding to 4 bytes, uint32 ticks[count]
+KIND_REVENUES  uint16 sender indices[count], padding to 4 bytes,
+               uint32 revenues[count][NUMBER_OF_COMPUTORS], one row per sender
+               indexed by the computor index
+KIND_SCORES    SCORE_DTYPE records[count]
+
+A snapshot holds all known items, a delta only the changed ones.
+"""
+MAGIC = 0x54414451
+VERSION = 1
+
+KIND_TICKS = 1
+KIND_SCORES = 2
+KIND_REVENUES = 3
+
+FLAG_ZSTD = 1
+
+SCORE_DTYPE = numpy.dtype([('public_key', numpy.uint8, (PUBLIC_KEY_SIZE,)),
+                           ('score', '<u4'),
+                           ('real_score', '<u4'),
+                           ('timestamp', '<u4')])
+
+
+class DataHeader(ctypes.Structure):
+    _pack_ = 1
+    _fields_ = [('magic', ctypes.c_uint32),
+                ('version', ctypes.c_uint8),
+                ('kind', ctypes.c_uint8),
+                ('flags', ctypes.c_uint16),
+                ('epoch', ctypes.c_uint16),
+                ('reserved', ctypes.c_uint16),
+                ('seq', ctypes.c_uint64),
+                ('count', ctypes.c_uint32)]
+
+
+HEADER_SIZE = sizeof(DataHeader)
+
+
+def _get_values_offset(count: int) -> int:
+    """Offset of the values after `count` uint16 indices
+    """
+    return (count * 2 + 3) & ~3
+
+
+def _encode(kind: int, epoch: int, seq: int, count: int, body: bytes, compress: bool) -> bytes:
+    flags = 0
+    if compress:
+        import zstandard
+
+        body = zstandard.compress(body)
+        flags |= FLAG_ZSTD
+
+    header = DataHeader(magic=MAGIC, version=VERSION, kind=kind,
+                        flags=flags, epoch=epoch, seq=seq, count=count)
+    return bytes(header) + body
+
+
+def _encode_indexed(kind: int, epoch: int, seq: int, indices, values: numpy.ndarray, compress: bool) -> bytes:
+    count = len(indices)
+    body = bytearray(_get_values_offset(count))
+    body[:count * 2] = numpy.asarray(indices, dtype='<u2').tobytes()
+    body += numpy.ascontiguousarray(values, dtype='<u4').tobytes()
+    return _encode(kind, epoch, seq, count, bytes(body), compress)
+
+
+def encode_ticks(epoch: int, seq: int, ticks: dict, compress: bool = False) -> bytes:
+    """`ticks` is computor index -> tick
+    """
+    return _encode_indexed(KIND_TICKS, epoch, seq, list(ticks.keys()),
+                           numpy.fromiter(ticks.values(), dtype='<u4', count=len(ticks)), compress)
+
+
+def encode_revenues(epoch: int, seq: int, senders, revenues: numpy.ndarray, compress: bool = True) -> bytes:
+    """`revenues` has one row of NUMBER_OF_COMPUTORS values per sender
+    """
+    return _encode_indexed(KIND_REVENUES, epoch, seq, senders, revenues, compress)
+
+
+def encode_scores(epoch: int, seq: int, scores: list, compress: bool = False) -> bytes:
+    """`scores` is a list of (identity, score, real score, timestamp)
+    """
+    records = numpy.zeros(len(scores), dtype=SCORE_DTYPE)
+    if len(scores) > 0:
+        public_keys = get_public_keys([item[0] for item in scores])
+        records['public_key'] = numpy.frombuffer(
+            public_keys, dtype=numpy.uint8).reshape(-1, PUBLIC_KEY_SIZE)
+        records['score'] = [item[1] for item in scores]
+        records['real_score'] = [item[2] for item in scores]
+        records['timestamp'] = [item[3] for item in scores]
+
+    return _encode(KIND_SCORES, epoch, seq, len(scores), records.tobytes(), compress)
+
+
+"""Decoding
+"""
+
+
+def is_binary(payload: bytes) -> bool:
+    return len(payload) >= HEADER_SIZE and DataHeader.from_buffer_copy(payload).magic == MAGIC
+
+
+def decode_header(payload: bytes) -> tuple[DataHeader, bytes]:
+    """Returns the header and the uncompressed body, raises ValueError if the payload is not valid
+    """
+    if len(payload) < HEADER_SIZE:
+        raise ValueError('The payload is too small')
+
+    header = DataHeader.from_buffer_copy(payload)
+    if header.magic != MAGIC:
+        raise ValueError('The payload is not in the binary format')
+    if header.version != VERSION:
+        raise ValueError(f'Unsupported version {header.version}')
+
+    body = bytes(payload[HEADER_SIZE:])
+    if header.flags & FLAG_ZSTD:
+        import zstandard
+
+        body = zstandard.decompress(body)
+
+    return (header, body)
+
+
+def _decode_indexed(payload: bytes, kind: int, row_size: int) -> tuple[DataHeader, numpy.ndarray, numpy.ndarray]:
+    header, body = decode_header(payload)
+    if header.kind != kind:
+        raise ValueError(f'Kind {header.kind} is not {kind}')
+
+    count = header.count
+    offset = _get_values_offset(count)
+    if len(body) != offset + count * row_size * 4:
+        raise ValueError('The body size does not match the count')
+
+    indices = numpy.frombuffer(body, dtype='<u2', count=count)
+    values = numpy.frombuffer(body, dtype='<u4', offset=offset)
+    if row_size > 1:
+        values = values.reshape(count, row_size)
+
+    return (header, indices, values)
+
+
+def decode_ticks(payload: bytes) -> tuple[DataHeader, numpy.ndarray, numpy.ndarray]:
+    """Returns the header, the computor indices and their ticks
+    """
+    return _decode_indexed(payload, KIND_TICKS, 1)
+
+
+def decode_revenues(payload: bytes) -> tuple[DataHeader, numpy.ndarray, numpy.ndarray]:
+    """Returns the header, the sender indices and revenues[sender row, computor index]
+    """
+    return _decode_indexed(payload, KIND_REVENUES, NUMBER_OF_COMPUTORS)
+
+
+def decode_scores(payload: bytes) -> tuple[DataHeader, numpy.ndarray]:
+    """Returns the header and the SCORE_DTYPE records
+    """
+    header, body = decode_header(payload)
+    if header.kind != KIND_SCORES:
+        raise ValueError(f'Kind {header.kind} is not {KIND_SCORES}')
+    if len(body) != header.count * SCORE_DTYPE.itemsize:
+        raise ValueError('The body size does not match the count')
+
+    return (header, numpy.frombuffer(body, dtype=SCORE_DTYPE))
+
+
+def get_sorted_revenues(revenues: numpy.ndarray) -> numpy.ndarray:
+    """The revenues of every computor sorted, rows are indexed by the computor index
+    """
+    return numpy.sort(revenues.T, axis=1)
+
+
+def get_score_identities(records: numpy.ndarray, max_workers: Optional[int] = None) -> list:
+    return get_identities(numpy.ascontiguousarray(records['public_key']), max_workers)
@@ -0,0 +1,282 @@
+import asyncio
+from ctypes import sizeof
+from typing import Optional
+
+from qubic.qubicdata import PAYLOAD_SIZES, RequestResponseHeader
+from qubic.qubicutils import is_valid_header
+
+HEADER_SIZE = sizeof(RequestResponseHeader)
+
+
+class QubicProtocol(asyncio.BufferedProtocol):
+    """Splits a peer stream into Qubic frames.
+
+    The socket is read straight into a reusable buffer and every frame is
+    handed out as a memoryview over that buffer. The view is only valid
+    until the next call of read_frame.
+
+    The header is checked against `payload_sizes` (header type -> (minimum,
+    maximum) payload size) before the payload is read: a wrong size closes
+    the connection and the frames of other types are dropped as they arrive,
+    so the buffer never grows past the biggest expected frame.
+    """
+    BUFFER_SIZE = 256 * 1024
+    MIN_READ = 4096
+    # Reading from the socket is paused while this much data is unread
+    HIGH_WATER = 4 * 1024 * 1024
+
+    def __init__(self, read_timeout: float, payload_sizes: Optional[dict] = None) -> None:
+        self._payload_sizes = payload_sizes if payload_sizes is not None else PAYLOAD_SIZES
+        self._skip = 0
+        self._skipped_frames = 0
+        self._skipped_bytes = 0
+        self._buffer = bytearray(self.BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
+        self._begin = 0
+        self._end = 0
+        self._header: Optional[RequestResponseHeader] = None
+        self._frame_out = False
+        self._need = 0
+
+        self._read_timeout = read_timeout
+        self._last_data = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self._loop = asyncio.get_running_loop()
+        self._transport: Optional[asyncio.Transport] = None
+        self._waiter: Optional[asyncio.Future] = None
+        self._drain_waiter: Optional[asyncio.Future] = None
+        self._closed = self._loop.create_future()
+        self._exception: Optional[BaseException] = None
+        self._paused_reading = False
+        self._paused_writing = False
+
+    @property
+    def skipped_frames(self) -> int:
+        return self._skipped_frames
+
+    @property
+    def skipped_bytes(self) -> int:
+        return self._skipped_bytes
+
+    """Protocol callbacks
+    """
+
+    def connection_made(self, transport: asyncio.Transport):
+        self._transport = transport
+        self._last_data = self._loop.time()
+        self._timer = self._loop.call_later(
+            self._read_timeout, self.__check_idle)
+
+    def connection_lost(self, exc: Optional[Exception]):
+        if self._exception is None:
+            self._exception = exc if exc is not None else ConnectionResetError(
+                'Connection lost')
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        self.__wake(self._waiter)
+        self.__wake(self._drain_waiter)
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+    def get_buffer(self, sizehint: int):
+        self.__reserve(self.MIN_READ)
+        return self._view[self._end:]
+
+    def buffer_updated(self, nbytes: int):
+        self._end += nbytes
+        self._last_data = self._loop.time()
+        if self._skip > 0:
+            self.__discard()
+
+        unread = self._end - self._begin
+        if unread >= self.HIGH_WATER and not self._paused_reading:
+            self._paused_reading = True
+            self._transport.pause_reading()
+
+        if unread >= self._need:
+            self.__wake(self._waiter)
+
+    def eof_received(self):
+        # Closing the transport
+        return False
+
+    def pause_writing(self):
+        self._paused_writing = True
+
+    def resume_writing(self):
+        self._paused_writing = False
+        self.__wake(self._drain_waiter)
+
+    """Reading
+    """
+
+    async def read_frame(self) -> tuple[RequestResponseHeader, memoryview]:
+        """Returns the header and the whole frame (header included)
+        """
+        self.__release_frame()
+
+        while True:
+            frame = self.__next_frame()
+            if frame is not None:
+                return frame
+
+            if self._exception is not None:
+                raise self._exception
+
+            self._waiter = self._loop.create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+
+    def __next_frame(self):
+        while self._header is None:
+            if self._end - self._begin < HEADER_SIZE:
+                self._need = HEADER_SIZE
+                return None
+
+            header = RequestResponseHeader.from_buffer_copy(
+                self._view[self._begin:self._begin + HEADER_SIZE])
+            if not is_valid_header(header) or header.size < HEADER_SIZE:
+                raise ValueError("Invalid header")
+
+            payload_size = header.size - HEADER_SIZE
+            limits = self._payload_sizes.get(header.type)
+            if limits is None:
+                # Nobody reads this type, the payload is dropped without buffering it
+                self._begin += HEADER_SIZE
+                self._skip = payload_size
+                self._skipped_frames += 1
+                self._skipped_bytes += header.size
+                self.__discard()
+                if self._skip > 0:
+                    self._need = HEADER_SIZE
+                    return None
+                continue
+
+            if not limits[0] <= payload_size <= limits[1]:
+                raise ValueError(
+                    f'Invalid payload size {payload_size} of type {header.type}')
+
+            self._header = header
+
+        unread = self._end - self._begin
+        size = self._header.size
+        if unread < size:
+            self._need = size
+            self.__reserve(size - unread)
+            return None
+
+        header = self._header
+        frame = self._view[self._begin:self._begin + size]
+        self._header = None
+        self._begin += size
+        self._frame_out = True
+        self._need = 0
+        return (header, frame)
+
+    def __discard(self):
+        """Drops the received bytes of a skipped frame
+        """
+        discard = min(self._skip, self._end - self._begin)
+        self._begin += discard
+        self._skip -= discard
+        if self._begin == self._end and not self._frame_out:
+            self._begin = self._end = 0
+
+    def __release_frame(self):
+        self._frame_out = False
+        if self._begin == self._end:
+            self._begin = self._end = 0
+
+        if self._paused_reading and self._end - self._begin < self.HIGH_WATER:
+            self._paused_reading = False
+            self._transport.resume_reading()
+
+    def __reserve(self, size: int):
+        """Makes room for at least `size` bytes after the received data
+        """
+        if len(self._buffer) - self._end >= size:
+            return
+
+        unread = self._end - self._begin
+        if not self._frame_out and len(self._buffer) - unread >= size:
+            # Moving the unread data to the beginning of the buffer
+            unread_data = self._view[self._begin:self._end]
+            self._buffer[:unread] = unread_data if unread <= self._begin else bytes(
+                unread_data)
+        else:
+            # The handed out frame still points to the old buffer
+            new_size = len(self._buffer)
+            while new_size - unread < size:
+                new_size *= 2
+
+            buffer = bytearray(new_size)
+            buffer[:unread] = self._view[self._begin:self._end]
+            self._buffer = buffer
+            self._view = memoryview(buffer)
+
+        self._begin = 0
+        self._end = unread
+
+    def __check_idle(self):
+        if self._transport is None or self._transport.is_closing():
+            self._timer = None
+            return
+
+        idle = self._loop.time() - self._last_data
+        if self._waiter is not None and idle >= self._read_timeout:
+            self._exception = asyncio.TimeoutError(
+                f'No data for {self._read_timeout} seconds')
+            self._timer = None
+            self._transport.abort()
+            return
+
+        delay = self._read_timeout
+        if self._waiter is not None:
+            delay = max(self._read_timeout - idle, 0.1)
+        self._timer = self._loop.call_later(delay, self.__check_idle)
+
+    """Writing
+    """
+
+    def write(self, data):
+        self._transport.write(data)
+
+    def writelines(self, list_of_data):
+        self._transport.writelines(list_of_data)
+
+    async def drain(self):
+        if self._exception is not None:
+            raise self._exception
+
+        if not self._paused_writing:
+            return
+
+        self._drain_waiter = self._loop.create_future()
+        try:
+            await self._drain_waiter
+        finally:
+            self._drain_waiter = None
+
+        if self._exception is not None:
+            raise self._exception
+
+    def is_closing(self) -> bool:
+        return self._transport is None or self._transport.is_closing()
+
+    def close(self):
+        if self._transport is not None:
+            self._transport.close()
+
+    async def wait_closed(self):
+        await asyncio.shield(self._closed)
+
+    @staticmethod
+    def __wake(waiter: Optional[asyncio.Future]):
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from algorithms.verify import (c_nonce_type_array, get_real_score, get_score,
+                               kangaroo_twelve)
+from utils.lrucache import LRUCache
+
+
+class ScoreCache():
+    """Scores of the solutions already seen in the current epoch.
+
+    The same solution comes many times through the gossip, it is keyed by
+    (public key, digest of the nonces) so the repeats are not scored again.
+    Setting a new epoch clears the cache.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._cache = LRUCache(max_size)
+        self._scored = 0
+        self._scoring_time = 0.0
+
+    @staticmethod
+    def get_key(public_key: bytes, nonces) -> tuple:
+        return (bytes(public_key), kangaroo_twelve(bytes(nonces)))
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self._cache.hit_rate
+
+    @property
+    def scoring_time(self) -> float:
+        """Seconds spent in the scoring of the missed solutions
+        """
+        return self._scoring_time
+
+    @property
+    def saved_time(self) -> float:
+        """Estimated seconds saved by the hits, the average scoring time per hit
+        """
+        if self._scored <= 0:
+            return 0.0
+
+        return self.hits * self._scoring_time / self._scored
+
+    @property
+    def epoch(self):
+        return self._cache.epoch
+
+    def set_epoch(self, epoch):
+        self._cache.set_epoch(epoch)
+
+    def get(self, key: tuple):
+        """Returns (score, real score) or None
+        """
+        return self._cache.get(key)
+
+    def put(self, key: tuple, scores: tuple, scoring_time: float):
+        self._cache.put(key, scores)
+        self._scored += 1
+        self._scoring_time += scoring_time
+
+    def __len__(self):
+        return len(self._cache)
+
+
+score_cache = ScoreCache(int(os.getenv('QUBIC_SCORE_CACHE_SIZE', 16384)))
+
+
+def score_solution(public_key: bytes, nonces: bytes) -> tuple:
+    """Returns (score, real score, scoring time), runs in a worker of the ScoringEngine
+    """
+    begin = time.perf_counter()
+    nonces_array = c_nonce_type_array.from_buffer_copy(nonces)
+    scores = (get_score(nonces_array), get_real_score(
+        public_key=public_key, nonces=nonces_array))
+    return scores + (time.perf_counter() - begin,)
+
+
+class ScoringEngine():
+    """Scores the solutions in a pool of workers, the event loop only waits for the results.
+
+    The solutions wait in a bounded queue, `put` waits while it is full.
+    The library releases the GIL so threads are enough, processes are used
+    if `use_processes` is set. The nonces are shipped as one bytes buffer.
+    `on_scores(context, score, real_score)` is called in the event loop for
+    every scored solution of the current epoch of the cache.
+    """
+
+    def __init__(self, on_scores: Callable[[Any, int, int], None], workers: int, max_pending: int,
+                 use_processes: bool = False, cache: Optional[ScoreCache] = None) -> None:
+        self._on_scores = on_scores
+        self._workers = workers
+        self._use_processes = use_processes
+        self._cache = cache if cache is not None else score_cache
+        # (key, epoch, public key, nonces, context)
+        self._queue = asyncio.Queue(max_pending)
+        # Keys of the solutions being scored, their repeats are not queued
+        self._pending = set()
+        self._executor: Optional[Executor] = None
+        self._tasks = []
+
+    @property
+    def cache(self) -> ScoreCache:
+        return self._cache
+
+    @property
+    def queue_size(self) -> int:
+        return self._queue.qsize()
+
+    def start(self):
+        if self._use_processes:
+            self._executor = ProcessPoolExecutor(
+                self._workers, mp_context=multiprocessing.get_context('spawn'))
+        else:
+            self._executor = ThreadPoolExecutor(
+                self._workers, thread_name_prefix='scoring')
+
+        self._tasks = [asyncio.create_task(self.__work())
+                       for _ in range(self._workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def put(self, public_key: bytes, nonces, context: Any):
+        """Queues the solution, a cached one is handed out at once
+        """
+        public_key = bytes(public_key)
+        nonces = bytes(nonces)
+        key = ScoreCache.get_key(public_key, nonces)
+        scores = self._cache.get(key)
+        if scores is not None:
+            try:
+                self._on_scores(context, *scores)
+            except Exception as e:
+                logging.exception(e)
+            return
+
+        if key in self._pending:
+            return
+
+        self._pending.add(key)
+        try:
+            await self._queue.put((key, self._cache.epoch, public_key, nonces, context))
+        except asyncio.CancelledError:
+            # The solution was not queued, its repeats have to be
+            self._pending.discard(key)
+            raise
+
+    async def __work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            key, epoch, public_key, nonces, context = await self._queue.get()
+            try:
+                score, real_score, scoring_time = await loop.run_in_executor(
+                    self._executor, score_solution, public_key, nonces)
+            except Exception as e:
+                logging.exception(e)
+                continue
+            finally:
+                self._pending.discard(key)
+
+            # The scores of the previous epoch are not needed anymore
+            if epoch != self._cache.epoch:
+                continue
+
+            self._cache.put(key, (score, real_score), scoring_time)
+            try:
+                self._on_scores(context, score, real_score)
+            except Exception as e:
+                logging.exception(e)
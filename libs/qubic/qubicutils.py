@@ -1,15 +1,20 @@
 import logging
 import os
 import sys
+import threading
+from collections import OrderedDict
 from ctypes import sizeof
 from os import getenv
 
 import aiofiles
-from algorithms.verify import get_identity, kangaroo_twelve, verify
+from algorithms.verify import (PUBLIC_KEY_SIZE, get_identities, get_identity,
+                               kangaroo_twelve, verify, verify_many)
+from utils.lrucache import LRUCache
+
+from qubic.qubicvalidation import can_apply_revenues_payload
 
 from qubic.qubicdata import (ADMIN_PUBLIC_KEY, BROADCAST_REVENUES,
-                             BROADCAST_TICK, MAX_REVENUE_VALUE,
-                             NUMBER_OF_COMPUTORS, SIGNATURE_SIZE, Computors,
+                             BROADCAST_TICK, SIGNATURE_SIZE, Computors,
                              ExchangePublicPeers, RequestResponseHeader,
                              Revenues, Tick, broadcasted_computors, c_ip_type,
                              computors_system_data)
@@ -21,6 +26,10 @@ sys.path.append(os.path.dirname(SCRIPT_DIR))
 COMPUTORS_CACHE_PATH = os.path.join(
     os.getenv('DATA_FILES_PATH', './'), 'system.data')
 
+# (public key, digest, signature) -> result of the signature verification
+verification_cache = LRUCache(
+    int(os.getenv('QUBIC_VERIFICATION_CACHE_SIZE', 65536)))
+
 """ IP
 """
 
@@ -112,49 +121,106 @@ def get_raw_payload(raw_data: bytes):
 
 
 def can_apply_revenues(revenues: Revenues) -> bool:
-    if revenues.computorIndex >= NUMBER_OF_COMPUTORS:
-        return False
+    return can_apply_revenues_payload(revenues)
 
-    for i in range(0, NUMBER_OF_COMPUTORS):
-        if revenues.revenues[i] > MAX_REVENUE_VALUE:
-            return False
 
-    return True
+def get_computor_public_key(computor_index: int) -> bytes:
+    return bytes(broadcasted_computors.broadcastComputors.computors.public_keys[computor_index])
 
 
 def is_valid_data(data_without_signature: bytes, computor_index: int, signature: bytes):
+    return is_valid_signature(get_computor_public_key(computor_index), data_without_signature, signature)
+
+
+def is_valid_signature(public_key: bytes, data_without_signature: bytes, signature: bytes) -> bool:
     digest = kangaroo_twelve(data_without_signature)
-    return verify(bytes(broadcasted_computors.broadcastComputors.computors.public_keys[computor_index]), digest, signature)
+    key = (public_key, digest, signature)
+    result = verification_cache.get(key)
+    if result is None:
+        result = verify(public_key, digest, signature)
+        verification_cache.put(key, result)
 
+    return result
 
-def is_valid_tick_data(tick: Tick):
-    if tick.epoch != broadcasted_computors.epoch:
-        logging.warning('tick epoch is not valid')
-        return False
 
+def are_valid_signatures(items: list, max_workers=None) -> list:
+    """Checks a list of (public key, data without signature, signature) with one call to the library
+    """
+    results = []
+    missed = []
+    for public_key, data_without_signature, signature in items:
+        key = (public_key, kangaroo_twelve(data_without_signature), signature)
+        result = verification_cache.get(key)
+        if result is None:
+            missed.append((len(results), key))
+        results.append(result)
+
+    if len(missed) > 0:
+        verified = verify_many(b''.join([key[0] for _, key in missed]),
+                               b''.join([key[1] for _, key in missed]),
+                               b''.join([key[2] for _, key in missed]), max_workers)
+        for (idx, key), result in zip(missed, verified):
+            verification_cache.put(key, result)
+            results[idx] = result
+
+    return results
+
+
+def get_tick_signed_data(tick: Tick) -> tuple[bytes, bytes]:
+    """Returns the signed part of the tick and its signature
+    """
     tick.computorIndex ^= BROADCAST_TICK
     tick_without_signature = bytes(tick)[:sizeof(Tick) - SIGNATURE_SIZE]
     tick.computorIndex ^= BROADCAST_TICK
-    result = is_valid_data(tick_without_signature,
-                           tick.computorIndex, bytes(tick.signature))
-    return result
+    return (tick_without_signature, bytes(tick.signature))
 
 
-def is_valid_revenues_data(revenues: Revenues) -> bool:
+def get_revenues_signed_data(revenues: Revenues) -> tuple[bytes, bytes]:
+    """Returns the signed part of the revenues and its signature
+    """
     revenues.computorIndex ^= BROADCAST_REVENUES
     data_without_signature = bytes(
         revenues)[:sizeof(Revenues) - SIGNATURE_SIZE]
     revenues.computorIndex ^= BROADCAST_REVENUES
+    return (data_without_signature, bytes(revenues.signature))
+
+
+def get_computors_signed_data(payload: Computors) -> tuple[bytes, bytes]:
+    """Returns the signed part of the computors and its signature
+    """
+    data_withou_signature = bytes(payload)[:sizeof(Computors) - SIGNATURE_SIZE]
+    return (data_withou_signature, bytes(payload.signature))
+
+
+def is_valid_tick_epoch(tick: Tick) -> bool:
+    if tick.epoch != broadcasted_computors.epoch:
+        logging.warning('tick epoch is not valid')
+        return False
+
+    return True
+
+
+def is_valid_tick_data(tick: Tick):
+    if not is_valid_tick_epoch(tick):
+        return False
+
+    tick_without_signature, signature = get_tick_signed_data(tick)
+    result = is_valid_data(tick_without_signature,
+                           tick.computorIndex, signature)
+    return result
+
+
+def is_valid_revenues_data(revenues: Revenues) -> bool:
+    data_without_signature, signature = get_revenues_signed_data(revenues)
     result = is_valid_data(data_without_signature,
-                           revenues.computorIndex, bytes(revenues.signature))
+                           revenues.computorIndex, signature)
     return result
 
 
 def is_valid_computors_data(payload: Computors) -> bool:
     # Checking signature
-    data_withou_signature = bytes(payload)[:sizeof(Computors) - SIGNATURE_SIZE]
-    digest = kangaroo_twelve(data_withou_signature)
-    return verify(ADMIN_PUBLIC_KEY, digest, bytes(payload.signature))
+    data_withou_signature, signature = get_computors_signed_data(payload)
+    return is_valid_signature(ADMIN_PUBLIC_KEY, data_withou_signature, signature)
 
 
 def can_apply_computors_data(computors: Computors):
@@ -184,16 +250,71 @@ def get_comutors_system_data():
     return computors_system_data
 
 
-def get_identities_from_computors(computors: Computors):
-    identities = []
+class ComputorIdentities():
+    """Identities of the computors of one epoch
+    """
+
+    def __init__(self, epoch: int, public_keys: bytes) -> None:
+        self.epoch = epoch
+        # NUMBER_OF_COMPUTORS packed public keys
+        self.public_keys = public_keys
+        self.identities = get_identities(public_keys)
+        self.identity_indices = {identity: idx for idx,
+                                 identity in enumerate(self.identities)}
+        self.public_key_indices = {public_keys[idx * PUBLIC_KEY_SIZE:(idx + 1) * PUBLIC_KEY_SIZE]: idx
+                                   for idx in range(len(public_keys) // PUBLIC_KEY_SIZE)}
+
+    def get_identity(self, public_key: bytes) -> str:
+        """The identity of any public key, the computors are looked up
+        """
+        idx = self.public_key_indices.get(bytes(public_key))
+        return self.identities[idx] if idx is not None else get_identity(bytes(public_key))
+
+
+class IdentityCache():
+    """epoch -> ComputorIdentities, the identities are computed once per epoch.
+
+    The public keys are compared too, other computors of the same epoch
+    replace the cached ones.
+    """
+    MAX_EPOCHS = 2
+
+    def __init__(self) -> None:
+        self._epochs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, computors: Computors) -> ComputorIdentities:
+        public_keys = bytes(computors.public_keys)
+        with self._lock:
+            entry = self._epochs.get(computors.epoch)
+        if entry is not None and entry.public_keys == public_keys:
+            return entry
+
+        entry = ComputorIdentities(computors.epoch, public_keys)
+        with self._lock:
+            self._epochs[computors.epoch] = entry
+            self._epochs.move_to_end(computors.epoch)
+            while len(self._epochs) > IdentityCache.MAX_EPOCHS:
+                self._epochs.popitem(last=False)
+
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._epochs.clear()
+
+
+identity_cache = IdentityCache()
 
-    for public_key in computors.public_keys:
-        identities.append(get_identity(bytes(public_key)))
 
-    return identities
+def get_identities_from_computors(computors: Computors) -> list:
+    # A copy, the cached list is shared
+    return list(identity_cache.get(computors).identities)
 
 
 def apply_computors(computors: Computors):
     global broadcasted_computors
 
     broadcasted_computors.broadcastComputors.computors = computors
+    # Results of the previous epoch are not needed anymore
+    verification_cache.set_epoch(computors.epoch)
@@ -0,0 +1,50 @@
+"""Checks run on received payloads before the signature verification.
+
+The payloads are read through numpy views, nothing is copied and no ctypes
+structure is built for a payload which is going to be rejected. Every
+function takes a buffer with one or more structures one after another.
+"""
+import numpy
+
+from qubic.qubicdata import (MAX_REVENUE_VALUE, NUMBER_OF_COMPUTORS, Revenues,
+                             Tick)
+
+TICK_DTYPE = numpy.dtype(Tick)
+REVENUES_DTYPE = numpy.dtype(Revenues)
+
+
+def get_ticks_view(payload) -> numpy.ndarray:
+    return numpy.frombuffer(payload, dtype=TICK_DTYPE)
+
+
+def get_revenues_view(payload) -> numpy.ndarray:
+    return numpy.frombuffer(payload, dtype=REVENUES_DTYPE)
+
+
+def are_plausible_ticks(payload) -> numpy.ndarray:
+    """Returns an array of bool, one per tick
+    """
+    ticks = get_ticks_view(payload)
+    return ((ticks['hour'] <= 23) & (ticks['minute'] <= 59) & (ticks['second'] <= 59)
+            & (ticks['millisecond'] <= 999) & (ticks['computorIndex'] < NUMBER_OF_COMPUTORS))
+
+
+def are_applicable_revenues(payload) -> numpy.ndarray:
+    """Returns an array of bool, one per revenues structure
+    """
+    revenues = get_revenues_view(payload)
+    return (revenues['computorIndex'] < NUMBER_OF_COMPUTORS) & (revenues['revenues'] <= MAX_REVENUE_VALUE).all(axis=1)
+
+
+def is_plausible_tick(payload) -> bool:
+    if memoryview(payload).nbytes != TICK_DTYPE.itemsize:
+        return False
+
+    return bool(are_plausible_ticks(payload)[0])
+
+
+def can_apply_revenues_payload(payload) -> bool:
+    if memoryview(payload).nbytes != REVENUES_DTYPE.itemsize:
+        return False
+
+    return bool(are_applicable_revenues(payload)[0])
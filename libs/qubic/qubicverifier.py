@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from qubic.qubicdata import ADMIN_PUBLIC_KEY, Computors, Revenues, Tick
+from qubic.qubicutils import (are_valid_signatures, get_computor_public_key,
+                              get_computors_signed_data,
+                              get_revenues_signed_data, get_tick_signed_data,
+                              is_valid_signature, is_valid_tick_epoch)
+
+
+def _verify_batch(items: list) -> list:
+    """Runs in a worker thread, the verify library releases the GIL
+    """
+    # The batches are already spread over the workers
+    return are_valid_signatures(items, max_workers=1)
+
+
+class SignatureVerifier():
+    """Verifies signatures in a thread pool without blocking the event loop.
+
+    Verifications requested during one loop iteration are collected and
+    split into batches between the workers, the caller gets a future per
+    verification. With 0 workers the signatures are verified at once in the
+    event loop, the pool only pays off with more than one core.
+    """
+    MAX_BATCH_SIZE = 64
+
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        self._max_workers = max_workers if max_workers is not None and max_workers >= 0 else SignatureVerifier.get_default_workers()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix='verifier') if self._max_workers > 0 else None
+        # (public_key, data, signature, future)
+        self._pending = []
+        self._flush_scheduled = False
+
+    @staticmethod
+    def get_default_workers(processes: int = 1) -> int:
+        """The cores of one of `processes` processes, 0 (inline) if it has only one core
+        """
+        cores = (os.cpu_count() or 1) // max(processes, 1)
+        return cores if cores > 1 else 0
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def verify(self, public_key: bytes, data_without_signature: bytes, signature: bytes) -> asyncio.Future:
+        """Returns a future with the verification result (bool)
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if self._executor is None:
+            future.set_result(is_valid_signature(
+                public_key, data_without_signature, signature))
+            return future
+
+        self._pending.append(
+            (public_key, data_without_signature, signature, future))
+
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop.call_soon(self.__flush)
+
+        return future
+
+    def verify_tick(self, tick: Tick) -> asyncio.Future:
+        if not is_valid_tick_epoch(tick):
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(False)
+            return future
+
+        data, signature = get_tick_signed_data(tick)
+        return self.verify(get_computor_public_key(tick.computorIndex), data, signature)
+
+    def verify_revenues(self, revenues: Revenues) -> asyncio.Future:
+        data, signature = get_revenues_signed_data(revenues)
+        return self.verify(get_computor_public_key(revenues.computorIndex), data, signature)
+
+    def verify_computors(self, computors: Computors) -> asyncio.Future:
+        data, signature = get_computors_signed_data(computors)
+        return self.verify(ADMIN_PUBLIC_KEY, data, signature)
+
+    def __flush(self):
+        self._flush_scheduled = False
+        pending = self._pending
+        self._pending = []
+        if len(pending) <= 0:
+            return
+
+        loop = asyncio.get_running_loop()
+        # Spreading the verifications over all workers
+        batch_size = min(self.MAX_BATCH_SIZE,
+                         -(-len(pending) // self._max_workers))
+        for idx in range(0, len(pending), batch_size):
+            batch = pending[idx:idx + batch_size]
+            items = [(public_key, data, signature)
+                     for public_key, data, signature, _ in batch]
+            futures = [future for _, _, _, future in batch]
+
+            batch_future = loop.run_in_executor(
+                self._executor, _verify_batch, items)
+            batch_future.add_done_callback(
+                lambda f, futures=futures: self.__set_results(f, futures))
+
+    @staticmethod
+    def __set_results(batch_future: asyncio.Future, futures: list):
+        if batch_future.cancelled():
+            for future in futures:
+                future.cancel()
+            return
+
+        e = batch_future.exception()
+        if e is not None:
+            logging.exception(e)
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result in zip(futures, batch_future.result()):
+            if not future.done():
+                future.set_result(result)
+
+    def shutdown(self):
+        for _, _, _, future in self._pending:
+            future.cancel()
+        self._pending.clear()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
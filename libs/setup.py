@@ -7,7 +7,8 @@ setup(
     install_requires=[
         'nats-py',
         'python-dotenv',
-        'aiofiles'
+        'aiofiles',
+        'numpy'
     ],
     package_data={'qubic_verify':['linux/*.so', 'win64/*.dll', 'win64/*.exp', 'win64/*.lib']}
 )
\ No newline at end of file
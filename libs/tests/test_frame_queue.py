@@ -0,0 +1,82 @@
+import logging
+import unittest
+
+from utils.framequeue import PriorityFrameQueue
+
+SOLUTION = 1
+COMPUTORS = 2
+TICK = 3
+
+# Computors -> 0, ticks -> 1, solutions -> 2
+PRIORITIES = {COMPUTORS: 0, TICK: 1, SOLUTION: 2}
+
+
+class TestPriorityFrameQueue(unittest.IsolatedAsyncioTestCase):
+    async def test_priority_order(self):
+        queue = PriorityFrameQueue(10, PRIORITIES, 3, 1)
+        queue.put(SOLUTION, b's1')
+        queue.put(TICK, b't1')
+        queue.put(COMPUTORS, b'c1')
+        queue.put(TICK, b't2')
+
+        self.assertEqual([(COMPUTORS, b'c1'), (TICK, b't1'), (TICK, b't2'), (SOLUTION, b's1')],
+                         await queue.get_frames(1024))
+        self.assertEqual(0, len(queue))
+
+    async def test_drop_lowest_class(self):
+        queue = PriorityFrameQueue(3, PRIORITIES, 3, 1)
+        queue.put(SOLUTION, b's1')
+        queue.put(SOLUTION, b's2')
+        queue.put(TICK, b't1')
+
+        self.assertTrue(queue.put(COMPUTORS, b'c1'))
+        self.assertEqual(1, queue.get_dropped(2))
+        self.assertEqual([b'c1', b't1', b's2'], await queue.get_batch(1024),
+                         'The oldest solution must be dropped')
+
+    async def test_never_drop_higher_class(self):
+        queue = PriorityFrameQueue(2, PRIORITIES, 3, 1)
+        queue.put(COMPUTORS, b'c1')
+        queue.put(TICK, b't1')
+
+        self.assertFalse(queue.put(SOLUTION, b's1'))
+        self.assertEqual(1, queue.get_dropped(2))
+        self.assertEqual([b'c1', b't1'], await queue.get_batch(1024))
+
+    async def test_class_max_size(self):
+        queue = PriorityFrameQueue(10, PRIORITIES, 3, 1, {2: 2})
+        for i in range(0, 4):
+            queue.put(SOLUTION, bytes([i]))
+        queue.put(TICK, b't1')
+
+        self.assertEqual(2, queue.get_class_size(2))
+        self.assertEqual(2, queue.dropped)
+        self.assertEqual([b't1', bytes([2]), bytes([3])], await queue.get_batch(1024),
+                         'The newest solutions must be kept')
+
+    async def test_batch_size(self):
+        queue = PriorityFrameQueue(10, PRIORITIES, 3, 1)
+        queue.put(TICK, (b'x' * 10, 0.0), 10)
+        queue.put(SOLUTION, (b'x' * 10, 0.0), 10)
+
+        self.assertEqual([(TICK, (b'x' * 10, 0.0))], await queue.get_frames(15),
+                         'The given size must be used')
+        self.assertEqual(1, len(queue))
+
+    async def test_bytes(self):
+        queue = PriorityFrameQueue(2, PRIORITIES, 3, 1)
+        queue.put(SOLUTION, b'x' * 10)
+        queue.put(TICK, b'x' * 20)
+        queue.put(COMPUTORS, b'x' * 30)
+        self.assertEqual(50, queue.bytes, 'The dropped solution must not be counted')
+
+        await queue.get_frames(30)
+        self.assertEqual(20, queue.bytes)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import unittest
+
+from custom_nats.handler import Handler, handler_metrics
+
+
+class Subscription():
+    def __init__(self) -> None:
+        self._closed = False
+        self.messages = asyncio.Queue()
+
+    async def next_msg(self):
+        return await self.messages.get()
+
+    async def unsubscribe(self):
+        self._closed = True
+
+
+class Connection():
+    is_disconected = False
+
+
+class Msg():
+    def __init__(self, key: int, index: int) -> None:
+        self.key = key
+        self.index = index
+
+
+class SlowHandler(Handler):
+    def __init__(self, sub: Subscription, **kwargs) -> None:
+        super().__init__(Connection(), **kwargs)
+        self.sub = sub
+        self.handled = []
+        self.running = 0
+        self.max_running = 0
+
+    async def get_sub(self):
+        return self.sub
+
+    async def _handler_msg(self, msg: Msg):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        # The first messages of a key are the slowest ones
+        await asyncio.sleep(0.01 * (3 - msg.index))
+        self.running -= 1
+        self.handled.append((msg.key, msg.index))
+
+
+class TestHandler(unittest.IsolatedAsyncioTestCase):
+    async def run_handler(self, handler: SlowHandler, messages: list):
+        for msg in messages:
+            handler.sub.messages.put_nowait(msg)
+
+        task = asyncio.create_task(handler.loop())
+        while len(handler.handled) < len(messages):
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await handler.cancel()
+
+    async def test_key_order(self):
+        handler = SlowHandler(Subscription(), concurrency=4,
+                              key=lambda msg: msg.key)
+        messages = [Msg(key, index)
+                    for index in range(3) for key in range(4)]
+        await self.run_handler(handler, messages)
+
+        self.assertGreater(handler.max_running, 1,
+                           'The keys must be handled in parallel')
+        for key in range(4):
+            self.assertEqual([0, 1, 2], [index for k, index in handler.handled if k == key],
+                             'The messages of a key must keep their order')
+
+    async def test_in_flight_limit(self):
+        handler = SlowHandler(Subscription(), concurrency=8, max_in_flight=2)
+        await self.run_handler(handler, [Msg(0, 0) for _ in range(6)])
+
+        self.assertEqual(2, handler.max_running)
+        self.assertEqual(0, handler_metrics.queue_depth.get_values()[
+                         ('SlowHandler',)])
+
+    async def test_stop_with_queued_messages(self):
+        handler = SlowHandler(Subscription(), max_in_flight=4)
+        for _ in range(4):
+            handler.sub.messages.put_nowait(Msg(0, 0))
+
+        task = asyncio.create_task(handler.loop())
+        while len(handler.handled) < 1:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await handler.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        self.assertEqual(0, handler_metrics.queue_depth.get_values()[
+                         ('SlowHandler',)])
+        for _ in range(4):
+            await asyncio.wait_for(handler._in_flight.acquire(), 1)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
@@ -0,0 +1,58 @@
+import logging
+import secrets
+import unittest
+
+from algorithms.verify import get_identity
+from qubic.qubicdata import NUMBER_OF_COMPUTORS, Computors
+from qubic.qubicutils import (IdentityCache, get_identities_from_computors,
+                              identity_cache)
+
+
+def make_computors(epoch: int) -> Computors:
+    computors = Computors.from_buffer_copy(
+        secrets.token_bytes(len(bytes(Computors()))))
+    computors.epoch = epoch
+    return computors
+
+
+class TestIdentityCache(unittest.TestCase):
+    def test_once_per_epoch(self):
+        cache = IdentityCache()
+        computors = make_computors(1)
+        entry = cache.get(computors)
+
+        self.assertIs(entry, cache.get(computors))
+        self.assertEqual(NUMBER_OF_COMPUTORS, len(entry.identities))
+        public_key = bytes(computors.public_keys[5])
+        self.assertEqual(get_identity(public_key), entry.identities[5])
+        self.assertEqual(5, entry.identity_indices[entry.identities[5]])
+        self.assertEqual(entry.identities[5], entry.get_identity(public_key))
+        self.assertEqual(get_identity(bytes(32)),
+                         entry.get_identity(bytes(32)))
+
+    def test_other_computors(self):
+        cache = IdentityCache()
+        entry = cache.get(make_computors(1))
+
+        self.assertIsNot(entry, cache.get(make_computors(1)),
+                         'Other public keys of the same epoch must replace the entry')
+
+        cache.get(make_computors(2))
+        cache.get(make_computors(3))
+        self.assertEqual(IdentityCache.MAX_EPOCHS, len(cache._epochs))
+
+    def test_copy(self):
+        computors = make_computors(4)
+        identities = get_identities_from_computors(computors)
+        identities.clear()
+
+        self.assertEqual(NUMBER_OF_COMPUTORS,
+                         len(identity_cache.get(computors).identities))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
@@ -0,0 +1,37 @@
+import logging
+import unittest
+
+from utils.lrucache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_eviction(self):
+        cache = LRUCache(max_size=2)
+        cache.put('a', True)
+        cache.put('b', False)
+        self.assertTrue(cache.get('a'))
+
+        # 'b' is the least recently used
+        cache.put('c', True)
+        self.assertIsNone(cache.get('b'))
+        self.assertFalse(cache.get('missing', False))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(2, cache.misses)
+
+    def test_epoch(self):
+        cache = LRUCache(max_size=2)
+        cache.set_epoch(1)
+        cache.put('a', True)
+        cache.set_epoch(1)
+        self.assertEqual(1, len(cache))
+
+        cache.set_epoch(2)
+        self.assertEqual(0, len(cache), 'A new epoch must clear the cache')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+import unittest
+
+from utils.metrics import (Counter, Gauge, Histogram, Metrics,
+                           start_metrics_server)
+
+
+class TestMetrics(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+        self.frames = self.metrics.add(
+            Counter('frames_total', 'Frames', ('peer', 'type')))
+        self.depth = self.metrics.add(Gauge('depth', 'Depth', ('peer',)))
+        self.latency = self.metrics.add(
+            Histogram('latency_seconds', 'Latency', ('type',), buckets=(0.1, 1.0)))
+
+    def test_values(self):
+        self.frames.inc(('a', 'tick'))
+        self.frames.inc(('a', 'tick'), 2)
+        self.depth.set(('a',), 5)
+        for value in (0.05, 0.1, 0.5, 2.0):
+            self.latency.observe(('tick',), value)
+
+        data = self.metrics.to_dict()
+        self.assertEqual(3, data['frames_total'][0]['value'])
+        self.assertEqual(5, data['depth'][0]['value'])
+        histogram = data['latency_seconds'][0]['value']
+        self.assertEqual({'0.1': 2, '1.0': 3, '+Inf': 4},
+                         histogram['buckets'])
+        self.assertEqual(4, histogram['count'])
+
+        text = self.metrics.to_text()
+        self.assertIn('frames_total{peer="a",type="tick"} 3', text)
+        self.assertIn('latency_seconds_bucket{type="tick",le="1.0"} 3', text)
+
+    def test_remove(self):
+        self.frames.inc(('a', 'tick'))
+        self.frames.inc(('b', 'tick'))
+        self.depth.set(('a',), 1)
+        self.metrics.remove('peer', 'a')
+
+        self.assertEqual([('b', 'tick')], list(self.frames.get_values()))
+        self.assertEqual(0, len(self.depth.get_values()))
+
+    async def test_server(self):
+        self.frames.inc(('a', 'tick'))
+        server = await start_metrics_server(self.metrics, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /metrics HTTP/1.0\r\n\r\n')
+        response = await reader.read()
+        writer.close()
+        server.close()
+
+        self.assertTrue(response.startswith(b'HTTP/1.0 200 OK'))
+        self.assertIn(b'frames_total{peer="a",type="tick"} 1', response)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
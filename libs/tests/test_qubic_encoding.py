@@ -0,0 +1,61 @@
+import logging
+import secrets
+import unittest
+
+import numpy
+from algorithms.verify import get_identities
+from qubic.qubicdata import NUMBER_OF_COMPUTORS
+from qubic.qubicencoding import (KIND_TICKS, decode_header, decode_revenues,
+                                 decode_scores, decode_ticks, encode_revenues,
+                                 encode_scores, encode_ticks,
+                                 get_score_identities, get_sorted_revenues,
+                                 is_binary)
+
+
+class TestQubicEncoding(unittest.TestCase):
+    def test_ticks(self):
+        ticks = {0: 100, 5: 101, 675: 4000000000}
+        payload = encode_ticks(90, 7, ticks)
+        header, indices, values = decode_ticks(payload)
+
+        self.assertTrue(is_binary(payload))
+        self.assertEqual((KIND_TICKS, 90, 7), (header.kind, header.epoch, header.seq))
+        self.assertEqual(ticks, dict(zip(indices.tolist(), values.tolist())))
+
+    def test_revenues(self):
+        senders = [3, 8, 9]
+        revenues = numpy.random.randint(
+            0, 2 ** 32, (len(senders), NUMBER_OF_COMPUTORS), dtype=numpy.uint32)
+        header, decoded_senders, decoded_revenues = decode_revenues(
+            encode_revenues(90, 1, senders, revenues))
+
+        self.assertEqual(senders, decoded_senders.tolist())
+        self.assertTrue(numpy.array_equal(revenues, decoded_revenues))
+        self.assertEqual(sorted(revenues[:, 10].tolist()),
+                         get_sorted_revenues(decoded_revenues)[10].tolist())
+
+    def test_scores(self):
+        identities = get_identities(secrets.token_bytes(32 * 2))
+        scores = [(identities[0], 10, 9, 1700000000),
+                  (identities[1], 20, 0, 1700000060)]
+        header, records = decode_scores(encode_scores(90, 3, scores, True))
+
+        self.assertEqual(2, header.count)
+        self.assertEqual(identities, get_score_identities(records))
+        self.assertEqual([10, 20], records['score'].tolist())
+        self.assertEqual([9, 0], records['real_score'].tolist())
+
+    def test_invalid(self):
+        self.assertFalse(is_binary(b'{"1": 2}'))
+        with self.assertRaises(ValueError):
+            decode_header(b'{"1": 2}' * 4)
+        with self.assertRaises(ValueError):
+            decode_scores(encode_ticks(90, 1, {1: 1}))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import unittest
+from ctypes import sizeof
+
+from qubic.qubicdata import (BROADCAST_REVENUES, BROADCAST_TICK,
+                             RequestResponseHeader, Tick)
+from qubic.qubicprotocol import QubicProtocol
+
+
+def make_frame(header_type: int, payload: bytes) -> bytes:
+    header = RequestResponseHeader(size=sizeof(
+        RequestResponseHeader) + len(payload), protocol=0, type=header_type)
+    return bytes(header) + payload
+
+
+class TestQubicProtocol(unittest.IsolatedAsyncioTestCase):
+    # The last test frame is bigger than the receive buffer
+    PAYLOAD_SIZES = {BROADCAST_TICK: (0, QubicProtocol.BUFFER_SIZE + 100)}
+
+    async def asyncSetUp(self):
+        self.frames = [make_frame(BROADCAST_TICK, bytes([i]) * sizeof(Tick))
+                       for i in range(0, 5)]
+        self.frames.append(make_frame(
+            BROADCAST_TICK, b'\x07' * (QubicProtocol.BUFFER_SIZE + 100)))
+        self.data = b''.join(self.frames)
+
+        async def handle(reader, writer):
+            data = self.data
+            # Splitting frames between the writes
+            for idx in range(0, len(data), 1000):
+                writer.write(data[idx:idx + 1000])
+                await writer.drain()
+            writer.close()
+
+        self.server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def connect(self, payload_sizes: dict):
+        loop = asyncio.get_running_loop()
+        return await loop.create_connection(
+            lambda: QubicProtocol(read_timeout=5, payload_sizes=payload_sizes), '127.0.0.1', self.port)
+
+    async def test_read_frames(self):
+        transport, protocol = await self.connect(self.PAYLOAD_SIZES)
+
+        for frame in self.frames:
+            header, raw_frame = await protocol.read_frame()
+            self.assertEqual(BROADCAST_TICK, header.type)
+            self.assertEqual(len(frame), header.size)
+            self.assertEqual(frame, bytes(raw_frame), 'Frame is corrupted')
+
+        with self.assertRaises(ConnectionError):
+            await protocol.read_frame()
+
+        transport.close()
+
+    async def test_skip_unknown_types(self):
+        # Unknown frames between the ticks, one of them is bigger than the receive buffer
+        skipped = [make_frame(BROADCAST_REVENUES, b'\x01' * 10),
+                   make_frame(BROADCAST_REVENUES, b'\x02' * (QubicProtocol.BUFFER_SIZE * 2))]
+        self.data = skipped[0] + self.frames[0] + skipped[1] + self.frames[1]
+
+        transport, protocol = await self.connect(self.PAYLOAD_SIZES)
+        for frame in self.frames[:2]:
+            _, raw_frame = await protocol.read_frame()
+            self.assertEqual(frame, bytes(raw_frame), 'Frame is corrupted')
+
+        self.assertEqual(2, protocol.skipped_frames)
+        self.assertEqual(sum([len(frame) for frame in skipped]),
+                         protocol.skipped_bytes)
+        self.assertLessEqual(len(protocol._buffer), QubicProtocol.BUFFER_SIZE,
+                             'Skipped frame is buffered')
+
+        transport.close()
+
+    async def test_reject_wrong_size(self):
+        self.data = make_frame(BROADCAST_TICK, bytes(sizeof(Tick) + 1))
+
+        transport, protocol = await self.connect({BROADCAST_TICK: (sizeof(Tick), sizeof(Tick))})
+        with self.assertRaises(ValueError):
+            await protocol.read_frame()
+
+        transport.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
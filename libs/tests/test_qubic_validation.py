@@ -0,0 +1,41 @@
+import logging
+import unittest
+
+from qubic.qubicdata import MAX_REVENUE_VALUE, NUMBER_OF_COMPUTORS, Revenues, Tick
+from qubic.qubicvalidation import (are_plausible_ticks,
+                                   can_apply_revenues_payload,
+                                   is_plausible_tick)
+
+
+class TestQubicValidation(unittest.TestCase):
+    def test_ticks(self):
+        valid_tick = Tick(computorIndex=1, hour=23,
+                          minute=59, second=59, millisecond=999)
+        invalid_ticks = [Tick(hour=24), Tick(minute=60), Tick(second=60),
+                         Tick(millisecond=1000), Tick(computorIndex=NUMBER_OF_COMPUTORS)]
+
+        self.assertTrue(is_plausible_tick(bytes(valid_tick)))
+        self.assertFalse(is_plausible_tick(bytes(valid_tick)[:-1]),
+                         'Payload size is not checked')
+        self.assertEqual([True] + [False] * len(invalid_ticks),
+                         list(are_plausible_ticks(b''.join([bytes(tick) for tick in [valid_tick] + invalid_ticks]))))
+
+    def test_revenues(self):
+        revenues = Revenues(computorIndex=NUMBER_OF_COMPUTORS - 1)
+        revenues.revenues[NUMBER_OF_COMPUTORS - 1] = MAX_REVENUE_VALUE
+        self.assertTrue(can_apply_revenues_payload(bytes(revenues)))
+
+        revenues.revenues[0] = MAX_REVENUE_VALUE + 1
+        self.assertFalse(can_apply_revenues_payload(bytes(revenues)))
+
+        revenues.revenues[0] = 0
+        revenues.computorIndex = NUMBER_OF_COMPUTORS
+        self.assertFalse(can_apply_revenues_payload(bytes(revenues)))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
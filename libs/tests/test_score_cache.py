@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import os
+import unittest
+
+from qubic.qubicscores import ScoreCache, ScoringEngine, score_solution
+
+PUBLIC_KEY = bytes(range(32))
+
+
+class TestScoreCache(unittest.TestCase):
+    def test_repeated_solution(self):
+        cache = ScoreCache(max_size=4)
+        nonces = os.urandom(32000)
+        key = ScoreCache.get_key(PUBLIC_KEY, nonces)
+
+        self.assertIsNone(cache.get(key))
+        score, real_score, scoring_time = score_solution(PUBLIC_KEY, nonces)
+        cache.put(key, (score, real_score), scoring_time)
+        self.assertEqual((score, real_score), cache.get(key))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+        self.assertGreater(cache.saved_time, 0)
+
+        self.assertNotEqual(key, ScoreCache.get_key(bytes(32), nonces),
+                            'The public key must be a part of the key')
+
+    def test_epoch(self):
+        cache = ScoreCache(max_size=4)
+        cache.set_epoch(1)
+        cache.put(ScoreCache.get_key(PUBLIC_KEY, bytes(32000)), (1, 1), 0.1)
+        cache.set_epoch(2)
+
+        self.assertIsNone(cache.get(ScoreCache.get_key(PUBLIC_KEY, bytes(32000))),
+                          'A new epoch must clear the cache')
+
+
+class TestScoringEngine(unittest.IsolatedAsyncioTestCase):
+    async def test_scores(self):
+        results = []
+        done = asyncio.Event()
+
+        def on_scores(context, score, real_score):
+            results.append((context, score, real_score))
+            done.set()
+
+        cache = ScoreCache(max_size=4)
+        engine = ScoringEngine(on_scores, workers=2,
+                               max_pending=4, cache=cache)
+        engine.start()
+        try:
+            nonces = os.urandom(32000)
+            await engine.put(PUBLIC_KEY, nonces, 'first')
+            await engine.put(PUBLIC_KEY, nonces, 'repeat')
+            await asyncio.wait_for(done.wait(), 10)
+
+            self.assertEqual(1, len(results),
+                             'A solution being scored must not be queued again')
+            self.assertEqual(score_solution(PUBLIC_KEY, nonces)[:2], results[0][1:])
+
+            await engine.put(PUBLIC_KEY, nonces, 'cached')
+            self.assertEqual('cached', results[-1][0],
+                             'A cached solution must be handed out at once')
+        finally:
+            await engine.stop()
+
+    async def test_cancelled_put(self):
+        results = []
+        cache = ScoreCache(max_size=4)
+        engine = ScoringEngine(lambda context, score, real_score: results.append(context),
+                               workers=1, max_pending=1, cache=cache)
+        nonces = os.urandom(32000)
+
+        # The engine is not started, the queue stays full
+        await engine.put(PUBLIC_KEY, os.urandom(32000), 'first')
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(engine.put(PUBLIC_KEY, nonces, 'cancelled'), 0.1)
+
+        engine.start()
+        try:
+            await asyncio.wait_for(engine.put(PUBLIC_KEY, nonces, 'repeat'), 10)
+            while len(results) < 2:
+                await asyncio.sleep(0.01)
+            self.assertEqual(['first', 'repeat'], results)
+        finally:
+            await engine.stop()
+
+    async def test_failing_callback(self):
+        def on_scores(context, score, real_score):
+            raise ValueError(context)
+
+        cache = ScoreCache(max_size=4)
+        nonces = os.urandom(32000)
+        cache.put(ScoreCache.get_key(PUBLIC_KEY, nonces), (1, 1), 0.1)
+        engine = ScoringEngine(on_scores, workers=1, max_pending=1, cache=cache)
+
+        with self.assertLogs(level=logging.ERROR):
+            await engine.put(PUBLIC_KEY, nonces, 'cached')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
@@ -0,0 +1,40 @@
+import logging
+import time
+import unittest
+
+from utils.seenset import SeenSet
+
+
+class TestSeenSet(unittest.TestCase):
+    def test_duplicates(self):
+        seen = SeenSet(max_size=10, ttl=60)
+
+        self.assertTrue(seen.add(b'a'))
+        self.assertFalse(seen.add(b'a'), 'Duplicate is not detected')
+        self.assertTrue(seen.add(b'b'))
+        self.assertEqual(1, seen.hits)
+        self.assertEqual(2, seen.misses)
+
+    def test_bounds(self):
+        seen = SeenSet(max_size=3, ttl=60)
+        for key in range(0, 5):
+            seen.add(key)
+
+        self.assertEqual(3, len(seen))
+        self.assertNotIn(0, seen, 'The oldest key is not evicted')
+        self.assertIn(4, seen)
+
+    def test_expiration(self):
+        seen = SeenSet(max_size=10, ttl=0.01)
+        seen.add(b'a')
+        time.sleep(0.02)
+
+        self.assertTrue(seen.add(b'a'), 'The key is not expired')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
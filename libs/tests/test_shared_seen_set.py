@@ -0,0 +1,50 @@
+import logging
+import time
+import unittest
+
+from utils.sharedseenset import SharedSeenSet
+
+
+def make_key(value: int) -> bytes:
+    return value.to_bytes(16, 'little')
+
+
+class TestSharedSeenSet(unittest.TestCase):
+    def setUp(self):
+        self.seen = SharedSeenSet.create(slots=1024, ttl=60)
+
+    def tearDown(self):
+        self.seen.close()
+
+    def test_duplicates(self):
+        self.assertTrue(self.seen.add(make_key(1)))
+        self.assertFalse(self.seen.add(make_key(1)), 'Duplicate is not detected')
+        self.assertTrue(self.seen.add(make_key(2)))
+        self.assertEqual(1, self.seen.hits)
+        self.assertEqual(2, self.seen.misses)
+
+    def test_shared(self):
+        other = SharedSeenSet.attach(self.seen.name, self.seen.slots, ttl=60)
+        try:
+            self.seen.add(make_key(1))
+            self.assertFalse(other.add(make_key(1)),
+                             'Key is not visible in the attached set')
+        finally:
+            other.close()
+
+    def test_expiration(self):
+        seen = SharedSeenSet.create(slots=16, ttl=0)
+        try:
+            seen.add(make_key(1))
+            time.sleep(0.01)
+            self.assertTrue(seen.add(make_key(1)), 'The key is not expired')
+        finally:
+            seen.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
@@ -0,0 +1,55 @@
+import asyncio
+import logging
+import unittest
+from unittest import mock
+
+from algorithms.verify import (get_private_key, get_public_key, get_subseed,
+                               kangaroo_twelve, sign)
+from qubic.qubicverifier import SignatureVerifier
+
+SEED = 'a' * 55
+
+
+class TestSignatureVerifier(unittest.IsolatedAsyncioTestCase):
+    async def verify(self, max_workers: int) -> list:
+        _, subseed = get_subseed(SEED)
+        public_key = get_public_key(get_private_key(subseed))
+
+        items = []
+        for idx in range(0, 10):
+            data = bytes([idx]) * 100
+            signature = sign(subseed, public_key, kangaroo_twelve(data))
+            if idx % 2 == 1:
+                # Corrupting the signed data
+                data = bytes([idx + 1]) * 100
+            items.append((data, signature))
+
+        verifier = SignatureVerifier(max_workers=max_workers)
+        try:
+            return await asyncio.gather(*[verifier.verify(public_key, data, signature)
+                                          for data, signature in items])
+        finally:
+            verifier.shutdown()
+
+    async def test_verify(self):
+        self.assertEqual([idx % 2 == 0 for idx in range(0, 10)], await self.verify(2))
+
+    async def test_verify_inline(self):
+        self.assertEqual([idx % 2 == 0 for idx in range(0, 10)], await self.verify(0))
+
+    def test_default_workers(self):
+        with mock.patch('os.cpu_count', return_value=8):
+            self.assertEqual(8, SignatureVerifier.get_default_workers())
+            self.assertEqual(4, SignatureVerifier.get_default_workers(2))
+            self.assertEqual(0, SignatureVerifier.get_default_workers(8),
+                             'One core per process verifies inline')
+        with mock.patch('os.cpu_count', return_value=1):
+            self.assertEqual(0, SignatureVerifier.get_default_workers())
+            self.assertEqual(0, SignatureVerifier(None).max_workers)
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
@@ -0,0 +1,49 @@
+import logging
+import secrets
+import unittest
+
+from algorithms.verify import (get_identities, get_identity, get_private_key,
+                               get_public_key, get_public_keys, get_subseed,
+                               kangaroo_twelve, kangaroo_twelve_many, sign,
+                               verify_many)
+
+SEED = 'a' * 55
+
+
+class TestVerifyBulk(unittest.TestCase):
+    def test_identities(self):
+        public_keys = secrets.token_bytes(32 * 200)
+        identities = get_identities(public_keys)
+
+        self.assertEqual([get_identity(public_keys[idx:idx + 32])
+                         for idx in range(0, len(public_keys), 32)], identities)
+        self.assertEqual(identities, get_identities(bytearray(public_keys)))
+        self.assertEqual(public_keys, get_public_keys(identities))
+
+    def test_kangaroo_twelve_many(self):
+        data = secrets.token_bytes(100 * 10)
+        digests = kangaroo_twelve_many(data, 100)
+
+        self.assertEqual(b''.join([kangaroo_twelve(data[idx:idx + 100])
+                         for idx in range(0, len(data), 100)]), digests)
+        with self.assertRaises(ValueError):
+            kangaroo_twelve_many(data, 99)
+
+    def test_verify_many(self):
+        _, subseed = get_subseed(SEED)
+        public_key = get_public_key(get_private_key(subseed))
+        digests = [secrets.token_bytes(32) for _ in range(0, 100)]
+        signatures = [sign(subseed, public_key, digest) for digest in digests]
+        signatures[5] = bytes(64)
+
+        results = verify_many(public_key * 100, b''.join(digests),
+                              b''.join(signatures))
+        self.assertEqual([idx != 5 for idx in range(0, 100)], results)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
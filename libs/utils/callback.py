@@ -29,6 +29,9 @@ class Callbacks():
                 except Exception as e:
                     logging.exception(e)
 
+    def __len__(self):
+        return len(self.__callbacks)
+
     async def stop(self):
         if len(self.__tasks) > 0:
             task: asyncio.Task = None
@@ -0,0 +1,127 @@
+import asyncio
+from collections import deque
+from typing import Optional
+
+
+class PriorityFrameQueue():
+    """Bounded queue of frames served by priority.
+
+    Every kind of frame belongs to a priority class, class 0 goes first and
+    the frames of one class keep their order. When the queue (or a class
+    with a size limit) is full the oldest frame of the lowest class is
+    dropped, a frame is never dropped to make room for a lower class frame.
+    """
+
+    def __init__(self, max_size: int, priorities: dict, number_of_classes: int, default_class: int,
+                 class_max_sizes: Optional[dict] = None) -> None:
+        self._max_size = max_size
+        # kind -> class
+        self._priorities = priorities
+        self._default_class = default_class
+        # class -> maximum number of frames of the class
+        self._class_max_sizes = class_max_sizes if class_max_sizes is not None else dict()
+        # (kind, data, size) per class
+        self._classes = [deque() for _ in range(number_of_classes)]
+        self._size = 0
+        self._bytes = 0
+        self._not_empty = asyncio.Event()
+        self._dropped = [0] * number_of_classes
+
+    @property
+    def dropped(self) -> int:
+        return sum(self._dropped)
+
+    @property
+    def bytes(self) -> int:
+        """Total size of the queued frames
+        """
+        return self._bytes
+
+    def get_dropped(self, priority_class: int) -> int:
+        return self._dropped[priority_class]
+
+    def get_class_size(self, priority_class: int) -> int:
+        return len(self._classes[priority_class])
+
+    def get_class(self, kind: int) -> int:
+        return self._priorities.get(kind, self._default_class)
+
+    def put(self, kind: int, data, size: Optional[int] = None) -> bool:
+        """Returns False if the new frame was dropped, `size` is len(data) by default
+        """
+        priority_class = self.get_class(kind)
+        frames = self._classes[priority_class]
+
+        class_max_size = self._class_max_sizes.get(priority_class)
+        if class_max_size is not None and len(frames) >= class_max_size:
+            # The newest frames of the class are kept
+            if class_max_size <= 0:
+                self._dropped[priority_class] += 1
+                return False
+            self.__drop_oldest(priority_class)
+        elif self._size >= self._max_size and not self.__drop_lowest(priority_class):
+            self._dropped[priority_class] += 1
+            return False
+
+        if size is None:
+            size = len(data)
+        frames.append((kind, data, size))
+        self._size += 1
+        self._bytes += size
+        self._not_empty.set()
+        return True
+
+    def __drop_oldest(self, priority_class: int):
+        self._bytes -= self._classes[priority_class].popleft()[2]
+        self._size -= 1
+        self._dropped[priority_class] += 1
+
+    def __drop_lowest(self, priority_class: int) -> bool:
+        for lowest_class in range(len(self._classes) - 1, priority_class - 1, -1):
+            if len(self._classes[lowest_class]) > 0:
+                self.__drop_oldest(lowest_class)
+                return True
+
+        return False
+
+    async def wait(self):
+        """Waits until the queue is not empty
+        """
+        while self._size <= 0:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+
+    async def get_frames(self, max_bytes: int) -> list:
+        """Waits for frames and takes (kind, data) by priority as long as they fit in `max_bytes` (at least one)
+        """
+        await self.wait()
+
+        batch = []
+        total = 0
+        for frames in self._classes:
+            while len(frames) > 0:
+                kind, data, size = frames[0]
+                if len(batch) > 0 and total + size > max_bytes:
+                    return batch
+
+                frames.popleft()
+                self._size -= 1
+                self._bytes -= size
+                batch.append((kind, data))
+                total += size
+
+        return batch
+
+    async def get_batch(self, max_bytes: int) -> list:
+        """Same as get_frames without the kinds
+        """
+        return [data for _, data in await self.get_frames(max_bytes)]
+
+    def clear(self):
+        for frames in self._classes:
+            frames.clear()
+        self._size = 0
+        self._bytes = 0
+
+    def __len__(self):
+        return self._size
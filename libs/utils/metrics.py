@@ -0,0 +1,204 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable, Optional
+
+# Seconds
+DEFAULT_TIME_BUCKETS = (0.0001, 0.0005, 0.001, 0.005,
+                        0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class Metric(ABC):
+    """Values of one metric, one per combination of label values
+    """
+    TYPE = 'untyped'
+
+    def __init__(self, name: str, help: str, label_names: tuple = ()) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+
+    @abstractmethod
+    def get_values(self) -> dict:
+        """label values -> value
+        """
+
+    def clear(self):
+        self.get_values().clear()
+
+    def remove(self, label_name: str, label_value):
+        """Drops the values of a label value, for example of a forgotten peer
+        """
+        idx = self.label_names.index(label_name)
+        values = self.get_values()
+        for labels in [labels for labels in values if labels[idx] == label_value]:
+            del values[labels]
+
+    def to_dict(self) -> list:
+        return [{'labels': dict(zip(self.label_names, labels)), 'value': self._value_to_dict(value)}
+                for labels, value in self.get_values().items()]
+
+    def _value_to_dict(self, value):
+        return value
+
+    def _format_labels(self, labels: tuple, extra: str = '') -> str:
+        items = [f'{name}="{value}"' for name,
+                 value in zip(self.label_names, labels)]
+        if len(extra) > 0:
+            items.append(extra)
+        if len(items) <= 0:
+            return ''
+
+        return '{' + ','.join(items) + '}'
+
+    def to_text(self) -> list:
+        lines = [f'# HELP {self.name} {self.help}',
+                 f'# TYPE {self.name} {self.TYPE}']
+        for labels, value in self.get_values().items():
+            lines.append(f'{self.name}{self._format_labels(labels)} {value}')
+
+        return lines
+
+
+class Counter(Metric):
+    TYPE = 'counter'
+
+    def __init__(self, name: str, help: str, label_names: tuple = ()) -> None:
+        super().__init__(name, help, label_names)
+        self._values = defaultdict(int)
+
+    def get_values(self) -> dict:
+        return self._values
+
+    def inc(self, labels: tuple = (), value: int = 1):
+        self._values[labels] += value
+
+
+class Gauge(Metric):
+    TYPE = 'gauge'
+
+    def __init__(self, name: str, help: str, label_names: tuple = ()) -> None:
+        super().__init__(name, help, label_names)
+        self._values = dict()
+
+    def get_values(self) -> dict:
+        return self._values
+
+    def set(self, labels: tuple = (), value: float = 0):
+        self._values[labels] = value
+
+
+class HistogramValue():
+    def __init__(self, buckets: tuple) -> None:
+        self.buckets = buckets
+        # The last count is for the values above the last bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def get_cumulative_counts(self) -> list:
+        counts = []
+        total = 0
+        for count in self.counts:
+            total += count
+            counts.append(total)
+
+        return counts
+
+
+class Histogram(Metric):
+    TYPE = 'histogram'
+
+    def __init__(self, name: str, help: str, label_names: tuple = (), buckets: tuple = DEFAULT_TIME_BUCKETS) -> None:
+        super().__init__(name, help, label_names)
+        self._buckets = buckets
+        self._values = dict()
+
+    def get_values(self) -> dict:
+        return self._values
+
+    def observe(self, labels: tuple = (), value: float = 0):
+        histogram = self._values.get(labels)
+        if histogram is None:
+            histogram = self._values[labels] = HistogramValue(self._buckets)
+
+        histogram.observe(value)
+
+    def _value_to_dict(self, value: HistogramValue):
+        return {'buckets': dict(zip([str(bucket) for bucket in value.buckets] + ['+Inf'], value.get_cumulative_counts())),
+                'sum': value.sum,
+                'count': value.count}
+
+    def to_text(self) -> list:
+        lines = [f'# HELP {self.name} {self.help}',
+                 f'# TYPE {self.name} {self.TYPE}']
+        for labels, value in self.get_values().items():
+            for bucket, count in zip(list(value.buckets) + ['+Inf'], value.get_cumulative_counts()):
+                le = f'le="{bucket}"'
+                lines.append(
+                    f'{self.name}_bucket{self._format_labels(labels, le)} {count}')
+            lines.append(
+                f'{self.name}_sum{self._format_labels(labels)} {value.sum}')
+            lines.append(
+                f'{self.name}_count{self._format_labels(labels)} {value.count}')
+
+        return lines
+
+
+class Metrics():
+    """Set of metrics which can be exported as a dict or in the Prometheus text format
+    """
+
+    def __init__(self) -> None:
+        self._metrics = []
+
+    def add(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def remove(self, label_name: str, label_value):
+        for metric in self._metrics:
+            if label_name in metric.label_names:
+                metric.remove(label_name, label_value)
+
+    def to_dict(self) -> dict:
+        return {metric.name: metric.to_dict() for metric in self._metrics}
+
+    def to_text(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.to_text())
+
+        return '\n'.join(lines) + '\n'
+
+
+async def start_metrics_server(metrics: Metrics, host: str, port: int, update: Optional[Callable[[], None]] = None) -> asyncio.AbstractServer:
+    """Serves the metrics in the text format to any HTTP GET, `update` is called before each answer
+    """
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            # The request itself does not matter
+            await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 5)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+
+        try:
+            if update is not None:
+                update()
+            body = metrics.to_text().encode()
+            writer.write(b'HTTP/1.0 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n' +
+                         f'Content-Length: {len(body)}\r\n\r\n'.encode() + body)
+            await writer.drain()
+        except Exception as e:
+            logging.exception(e)
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
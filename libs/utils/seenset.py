@@ -0,0 +1,60 @@
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class SeenSet():
+    """Bounded set of keys which are forgotten after `ttl` seconds
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        # key -> expiration time, the oldest keys go first
+        self._keys = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def add(self, key: Hashable) -> bool:
+        """Returns True if the key has not been seen yet
+        """
+        now = time.monotonic()
+        self.__expire(now)
+
+        if key in self._keys:
+            self._hits += 1
+            return False
+
+        self._misses += 1
+        self._keys[key] = now + self._ttl
+        if len(self._keys) > self._max_size:
+            self._keys.popitem(last=False)
+
+        return True
+
+    def __expire(self, now: float):
+        keys = self._keys
+        while len(keys) > 0:
+            key, expiration = next(iter(keys.items()))
+            if expiration > now:
+                break
+
+            del keys[key]
+
+    def clear(self):
+        self._keys.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        expiration = self._keys.get(key)
+        return expiration is not None and expiration > time.monotonic()
+
+    def __len__(self):
+        return len(self._keys)
@@ -0,0 +1,74 @@
+import time
+from multiprocessing import shared_memory
+
+# Bytes per slot: the key (uint64) and the expiration time (uint32)
+SLOT_SIZE = 12
+
+
+class SharedSeenSet():
+    """Seen set living in shared memory, used by several processes at once.
+
+    Every key owns one slot picked by its bytes, a new key overwrites the slot.
+    The set is lossy: a duplicate can be missed after its slot was taken by
+    another key or when two processes write the slot at the same time.
+    Keys must be bytes with good distribution (digests), at least 16 bytes long.
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, slots: int, ttl: float, owner: bool) -> None:
+        self._memory = memory
+        self._slots = slots
+        self._ttl = ttl
+        self._owner = owner
+        self._keys = memory.buf[:slots * 8].cast('Q')
+        self._expirations = memory.buf[slots * 8:slots * SLOT_SIZE].cast('I')
+        self._hits = 0
+        self._misses = 0
+
+    @classmethod
+    def create(cls, slots: int, ttl: float):
+        memory = shared_memory.SharedMemory(create=True, size=slots * SLOT_SIZE)
+        memory.buf[:slots * SLOT_SIZE] = bytes(slots * SLOT_SIZE)
+        return cls(memory, slots, ttl, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, slots: int, ttl: float):
+        return cls(shared_memory.SharedMemory(name=name), slots, ttl, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    @property
+    def slots(self) -> int:
+        return self._slots
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def add(self, key: bytes) -> bool:
+        """Returns True if the key has not been seen yet
+        """
+        value = int.from_bytes(key[:8], 'little') or 1
+        slot = int.from_bytes(key[8:16], 'little') % self._slots
+        now = int(time.time())
+
+        if self._keys[slot] == value and self._expirations[slot] > now:
+            self._hits += 1
+            return False
+
+        self._keys[slot] = value
+        self._expirations[slot] = now + int(self._ttl)
+        self._misses += 1
+        return True
+
+    def close(self):
+        self._keys.release()
+        self._expirations.release()
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
@@ -4,8 +4,8 @@ from discord import Member, User
 from discord.ext.commands import Context
 from discord.utils import get
 
-from utils.botutils import (get_guild, get_guild_id, get_member_by_id,
-                            get_poll_channel_id, get_role, get_role_name)
+from bot_utils.botutils import (get_guild, get_guild_id, get_member_by_id,
+                                get_poll_channel_id, get_role, get_role_name)
 
 
 async def is_bot_in_guild(ctx: Context):
@@ -1,15 +1,15 @@
 import json
 import os
 
+from bot_utils.botutils import get_username_with_discr
+from bot_utils.message import (get_identity_list_from_json, get_username_from_json,
+                               is_valid_json)
 from checkers import is_user_in_guild
 from data.identity import identity_manager
 from data.users import user_data
 from discord import Client, DMChannel, Embed
 from discord.ext import commands
 from discord.ext.commands import Context
-from utils.botutils import get_username_with_discr
-from utils.message import (get_identity_list_from_json, get_username_from_json,
-                           is_valid_json)
 from verify.user import get_member_by_username, get_user_id_from_username
 
 from commands.pool import pool_commands
@@ -11,8 +11,10 @@ from discord.ext import commands
 from dotenv import load_dotenv
 from nats.aio.client import Client
 from qubic.qubicdata import BroadcastComputors, Computors, Subjects
-from qubic.qubicutils import (cache_computors, get_comutors_system_data,
-                              get_identities_from_computors, load_computors)
+from qubic.qubicutils import (ComputorIdentities, cache_computors,
+                              get_comutors_system_data,
+                              get_identities_from_computors, identity_cache,
+                              load_computors)
 
 from checkers import has_role_in_guild, is_bot_in_guild
 from commands.pool import pool_commands
@@ -43,12 +45,12 @@ __nc: Optional[Client] = None
 class HandlerWaitBroadcastComputors(Handler):
     def __init__(self, nc) -> None:
         super().__init__(nc)
+        self.__applied: Optional[ComputorIdentities] = None
 
     async def get_sub(self):
         return await self._nc.nc.subscribe(Subjects.BROADCAST_COMPUTORS)
 
     async def _handler_msg(self, msg):
-        from qubic.qubicutils import get_identities_from_computors
         if msg is None or msg.data is None:
             return
 
@@ -60,9 +62,14 @@ class HandlerWaitBroadcastComputors(Handler):
 
         computors: Computors = BroadcastComputors.from_buffer_copy(
             data).computors
+        # The same computors are broadcasted again and again during the epoch
+        computor_identities = identity_cache.get(computors)
+        if computor_identities is self.__applied:
+            return
+
         await cache_computors(computors)
-        identities = get_identities_from_computors(computors=computors)
-        identity_manager.apply_identity(identities)
+        identity_manager.apply_identity(list(computor_identities.identities))
+        self.__applied = computor_identities
         await identity_manager.save_to_file()
 
 
@@ -6,6 +6,10 @@ from typing import Optional
 from uuid import UUID, uuid4
 
 import aiofiles
+from bot_utils.botutils import (get_buttons_from_message,
+                                get_messages_from_poll_channel, get_poll_channel,
+                                get_poll_channel_id, get_poll_message_by_id,
+                                get_role_name)
 from checkers import has_role_on_member
 from commands.pool import pool_commands
 from data.identity import identity_manager
@@ -14,10 +18,6 @@ from discord import ButtonStyle, Client, Embed, Interaction, Message, errors
 from discord.ext import commands
 from discord.ext.commands import Context
 from discord.ui import Button, View
-from utils.botutils import (get_buttons_from_message,
-                            get_messages_from_poll_channel, get_poll_channel,
-                            get_poll_channel_id, get_poll_message_by_id,
-                            get_role_name)
 
 DESCRIPTION_FIELD = "description"
 VARIANTS_FIELD = "variants"
@@ -5,10 +5,10 @@ import traceback
 import discord.utils
 from discord import Client, Member, Role, HTTPException
 
+from bot_utils.botutils import get_member_by_id, get_role
+from bot_utils.message import is_valid_identity
 from data.identity import identity_manager
 from data.users import UserData, user_data
-from utils.botutils import get_member_by_id, get_role
-from utils.message import is_valid_identity
 
 
 class RoleManager():
@@ -1,7 +1,7 @@
 import re
 from discord import Client, User, Member
 
-from utils.botutils import get_guild, get_username_with_discr
+from bot_utils.botutils import get_guild, get_username_with_discr
 
 USERNAME_RE = re.compile(r".+\#\d{4}")
 
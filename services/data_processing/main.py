@@ -6,20 +6,102 @@ from ctypes import sizeof
 from typing import Optional
 
 import numpy
-from algorithms.verify import get_score, get_real_score
+from algorithms.verify import PUBLIC_KEY_SIZE
 from custom_nats.custom_nats import Nats
-from custom_nats.handler import Handler, HandlerStarter
+from custom_nats.handler import Handler, HandlerStarter, handler_metrics
 from nats.aio.msg import Msg
 from qubic.qubicdata import (NUMBER_OF_COMPUTORS, BroadcastComputors,
                              BroadcastResourceTestingSolution, Computors,
-                             DataSubjects, ResourceTestingSolution, Revenues,
-                             Subjects, Tick)
-from qubic.qubicutils import get_identities_from_computors, get_identity
+                             DataSubjects, MetricsSubjects,
+                             ResourceTestingSolution, Revenues, Subjects, Tick)
+from qubic.qubicencoding import encode_revenues, encode_scores, encode_ticks
+from qubic.qubicscores import ScoringEngine, score_cache
+from qubic.qubicutils import get_identity, identity_cache
 from utils.backgroundtasks import BackgroundTasks
+from utils.metrics import Gauge, Metrics
+
+# How often the metrics snapshot is published to MetricsSubjects.DATA_PROCESSING
+METRICS_INTERVAL_S = int(os.getenv('QUBIC_DATA_METRICS_INTERVAL', 10))
+
+# Changes are published every DELTA_INTERVAL_S, all snapshots every FULL_SNAPSHOT_INTERVAL_S
+DELTA_INTERVAL_S = float(os.getenv('QUBIC_DATA_DELTA_INTERVAL', 1))
+FULL_SNAPSHOT_INTERVAL_S = int(
+    os.getenv('QUBIC_DATA_FULL_SNAPSHOT_INTERVAL', 60))
+# Format of the ticks, scores and revenues. JSON by default for the existing consumers,
+# QUBIC_DATA_FORMAT=binary opts in to the compact DataSubjects.FORMAT_BINARY once they decode it
+DATA_FORMAT = os.getenv('QUBIC_DATA_FORMAT', DataSubjects.FORMAT_JSON)
+
+# Solutions are scored outside the event loop, threads are used unless QUBIC_SCORING_PROCESSES is 1
+SCORING_WORKERS = int(os.getenv('QUBIC_SCORING_WORKERS', os.cpu_count() or 1))
+SCORING_QUEUE_SIZE = int(os.getenv('QUBIC_SCORING_QUEUE_SIZE', 1024))
+SCORING_PROCESSES = os.getenv('QUBIC_SCORING_PROCESSES', '0') == '1'
+
+"""Scale-out
+
+'single' processes all data. A 'replica' scores the solutions of its shard
+of public keys, keeps the ticks and revenues of its shard of computors and
+publishes them to DataSubjects.PARTIAL. The repeats of a solution go to the
+same replica, so its score cache and the order of the solutions hold. Every
+replica still receives all solutions and drops the other shards, so each one
+pays the full solution bandwidth, only the scoring is divided. 'merge' combines
+the partial data and publishes the DataSubjects snapshots.
+"""
+MODE_SINGLE = 'single'
+MODE_REPLICA = 'replica'
+MODE_MERGE = 'merge'
+DATA_MODE = os.getenv('QUBIC_DATA_MODE', MODE_SINGLE)
+NUMBER_OF_REPLICAS = int(os.getenv('QUBIC_DATA_REPLICAS', 1))
+REPLICA_INDEX = int(os.getenv('QUBIC_DATA_REPLICA_INDEX', 0))
+
+
+def is_valid_mode() -> bool:
+    """Checks the scale-out settings, the service does not start with invalid ones
+    """
+    if DATA_MODE not in (MODE_SINGLE, MODE_REPLICA, MODE_MERGE):
+        logging.error(f'Invalid QUBIC_DATA_MODE: {DATA_MODE}')
+        return False
+
+    if NUMBER_OF_REPLICAS < 1 or not 0 <= REPLICA_INDEX < NUMBER_OF_REPLICAS:
+        logging.error(
+            f'Invalid QUBIC_DATA_REPLICA_INDEX {REPLICA_INDEX} of QUBIC_DATA_REPLICAS {NUMBER_OF_REPLICAS}')
+        return False
+
+    return True
+
+
+def get_backup_file_name(name: str) -> str:
+    """Every replica and the merge stage have their own backup files
+    """
+    if DATA_MODE == MODE_REPLICA:
+        return f'{name}.{DATA_MODE}.{REPLICA_INDEX}.data'
+    if DATA_MODE == MODE_MERGE:
+        return f'{name}.{DATA_MODE}.data'
+
+    return f'{name}.data'
+
+
+def is_own_computor(computor_index: int) -> bool:
+    """Whether the data of the computor is processed by this replica
+    """
+    return DATA_MODE != MODE_REPLICA or computor_index % NUMBER_OF_REPLICAS == REPLICA_INDEX
 
 
-def _get_empty_revenues():
-    return numpy.full((NUMBER_OF_COMPUTORS, NUMBER_OF_COMPUTORS), None, dtype=object).tolist()
+def is_own_solution(public_key: bytes) -> bool:
+    """Whether the solutions of the public key are scored by this replica
+    """
+    return DATA_MODE != MODE_REPLICA or int.from_bytes(public_key[:8], 'little') % NUMBER_OF_REPLICAS == REPLICA_INDEX
+
+
+def _get_empty_revenues() -> numpy.ndarray:
+    """revenues[computor index, sender index]
+    """
+    return numpy.zeros((NUMBER_OF_COMPUTORS, NUMBER_OF_COMPUTORS), dtype=numpy.uint32)
+
+
+def _get_empty_revenues_mask() -> numpy.ndarray:
+    """Whether the sender has sent its revenues
+    """
+    return numpy.zeros(NUMBER_OF_COMPUTORS, dtype=bool)
 
 
 class ItemContainer():
@@ -47,6 +129,9 @@ class ItemContainer():
     def is_empty(self):
         return True
 
+    def get_data(self):
+        return self._data
+
     def dumps(self) -> str:
         import json
         if self._data is not None:
@@ -149,7 +234,7 @@ class ScoresIC(ItemContainer):
         super().__init__()
         self._data = dict()
         self._file_name = os.path.join(
-            os.getenv('DATA_FILES_PATH', './'), 'scores.data')
+            os.getenv('DATA_FILES_PATH', './'), get_backup_file_name('scores'))
 
     def __get_timestamp(self) -> int:
         from datetime import datetime
@@ -173,8 +258,11 @@ class ScoresIC(ItemContainer):
             ScoresIC.REAL_SCORE_KEY: real_score,
             ScoresIC.TIMESTAMP_KEY: timestamp
         }
-        found_data = self._data.setdefault(
-            identity, current_data)
+        found_data = self._data.get(identity)
+        if found_data is None:
+            self._data[identity] = current_data
+            return True
+
         found_score = found_data.get(ScoresIC.SCORE_KEY, 0)
         found_real_score = found_data.get(ScoresIC.REAL_SCORE_KEY, 0)
         if found_score < new_score or found_real_score < real_score:
@@ -190,23 +278,75 @@ class ScoresIC(ItemContainer):
         return len(self._data) <= 0
 
 
+class ChangeTracker():
+    """Keys changed since the last delta and the sequence number of the data.
+
+    Every delta increments the sequence number, a snapshot is needed only if
+    it has changed since the previous snapshot.
+    """
+
+    def __init__(self) -> None:
+        self._changes = set()
+        self._seq = 0
+        self._snapshot_seq = 0
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def add(self, key):
+        self._changes.add(key)
+
+    def reset(self):
+        """All data is dropped, only a snapshot can tell it
+        """
+        self._changes = set()
+        self._seq += 1
+
+    def take_delta(self) -> Optional[set]:
+        """Returns the changed keys or None if nothing has changed
+        """
+        if len(self._changes) <= 0:
+            return None
+
+        changes = self._changes
+        self._changes = set()
+        self._seq += 1
+        return changes
+
+    def take_snapshot(self, force: bool = False) -> bool:
+        """Whether a snapshot has to be published
+        """
+        if not force and self._seq == self._snapshot_seq:
+            return False
+
+        self._snapshot_seq = self._seq
+        return True
+
+
 class DataContainer():
     __SEND_INTERVAL_S = 10
     __ticks = dict()
     __scores_ic = ScoresIC()
+    __ticks_changes = ChangeTracker()
+    __scores_changes = ChangeTracker()
+    __revenues_changes = ChangeTracker()
+    __new_epoch = False
     __btasks = BackgroundTasks()
     __computors: Optional[Computors] = None
 
     __revenues = _get_empty_revenues()
+    __revenues_mask = _get_empty_revenues_mask()
 
     __BACKUP_INTERVAL_S = 10
     __need_backup = False
 
     @classmethod
     def add_tick(cls, computor_index: int, new_tick: int):
-        found_tick = cls.__ticks.setdefault(computor_index, new_tick)
-        if found_tick < new_tick:
+        found_tick = cls.__ticks.get(computor_index)
+        if found_tick is None or found_tick < new_tick:
             cls.__ticks[computor_index] = new_tick
+            cls.__ticks_changes.add(computor_index)
 
     @classmethod
     def add_scores(cls, identity, new_score: int, real_score: int):
@@ -217,11 +357,19 @@ class DataContainer():
 
         if cls.__scores_ic.add_data(epoch=epoch, identity=identity, score=new_score, real_score=real_score):
             cls.__need_backup = True
+            cls.__scores_changes.add(identity)
 
     @classmethod
-    def add_revenues(cls, index_sender: int, revenues: list):
-        for idx, r in enumerate(revenues):
-            cls.__revenues[idx][index_sender] = r
+    def add_revenues(cls, index_sender: int, revenues):
+        """`revenues` is a sequence of NUMBER_OF_COMPUTORS uint32 (a numpy array or a list)
+        """
+        column = cls.__revenues[:, index_sender]
+        if cls.__revenues_mask[index_sender] and numpy.array_equal(column, revenues):
+            return
+
+        column[:] = revenues
+        cls.__revenues_mask[index_sender] = True
+        cls.__revenues_changes.add(index_sender)
 
     @classmethod
     def add_computors(cls, computors: Computors):
@@ -232,11 +380,16 @@ class DataContainer():
     @classmethod
     def new_epoch(cls, epoch: int):
         cls.__revenues = _get_empty_revenues()
+        cls.__revenues_mask = _get_empty_revenues_mask()
         if cls.__scores_ic.epoch is None or epoch > cls.__scores_ic.epoch:
             cls.__scores_ic.clear()
             cls.__btasks.create_task(cls.__scores_ic.delete_file)
+            cls.__scores_changes.reset()
 
         cls.__ticks.clear()
+        cls.__ticks_changes.reset()
+        cls.__revenues_changes.reset()
+        cls.__new_epoch = True
 
     @classmethod
     async def recovery(cls):
@@ -270,23 +423,42 @@ class DataContainer():
         if cls.__computors is None:
             return dict()
 
-        pretty_revenues = dict()
-        identities = get_identities_from_computors(cls.__computors)
-        for idx, r_list in enumerate(cls.__revenues):
-            pretty_revenues[identities[idx]] = sorted(
-                [rev for rev in r_list if rev is not None])
+        senders = numpy.flatnonzero(cls.__revenues_mask)
+        # Every row is sorted at once, only the columns of the senders are taken
+        sorted_revenues = numpy.sort(
+            cls.__revenues[:, senders], axis=1).tolist()
+        identities = identity_cache.get(cls.__computors).identities
+        return dict(zip(identities, sorted_revenues))
 
-        return pretty_revenues
+    @classmethod
+    def get_revenue_columns(cls) -> dict:
+        """Sender index -> revenues it sent, only the senders of this replica
+        """
+        return {int(index_sender): cls.__revenues[:, index_sender].tolist()
+                for index_sender in numpy.flatnonzero(cls.__revenues_mask)
+                if is_own_computor(int(index_sender))}
 
     @classmethod
-    def get_epoch(cls) -> int | None:
-        if cls.__computors is None:
-            return None
+    def add_partial(cls, partial: dict):
+        """Applies the partial data of a replica, the data of other epochs is ignored
+        """
+        if partial.get('epoch') != cls.get_epoch():
+            return
 
-        return cls.__computors.epoch
+        for computor_index, tick in partial['ticks'].items():
+            cls.add_tick(int(computor_index), tick)
+
+        for identity, scores in partial['scores'].items():
+            cls.add_scores(identity=identity, new_score=scores[ScoresIC.SCORE_KEY],
+                           real_score=scores[ScoresIC.REAL_SCORE_KEY])
+
+        for index_sender, revenues in partial['revenues'].items():
+            cls.add_revenues(int(index_sender), revenues)
 
     @classmethod
-    async def send_data(cls):
+    async def send_partial(cls):
+        """The replica loop, replaces send_data
+        """
         import json
 
         nc = Nats()
@@ -295,39 +467,185 @@ class DataContainer():
             return
 
         while not nc.is_disconected:
-            tasks = set()
-            tasks.add(asyncio.create_task(
-                asyncio.sleep(cls.__SEND_INTERVAL_S)))
+            await asyncio.sleep(cls.__SEND_INTERVAL_S)
+
+            epoch = cls.get_epoch()
+            if epoch is None:
+                continue
+
+            try:
+                partial = {'replica': REPLICA_INDEX,
+                           'epoch': epoch,
+                           'ticks': cls.__ticks,
+                           'scores': cls.__scores_ic.get_data(),
+                           'revenues': cls.get_revenue_columns()}
+                payload = zstandard.compress(json.dumps(partial).encode())
+            except Exception as e:
+                logging.exception(e)
+                continue
 
-            tick_number = len(cls.__ticks)
-            if tick_number > 0:
-                logging.info(f'Send ticks')
-                tasks.add(cls.__btasks.create_task(nc.publish,
-                                                   DataSubjects.TICKS, json.dumps(cls.__ticks).encode()))
+            logging.info('Send partial data')
+            await nc.publish(DataSubjects.PARTIAL, payload)
 
-            if not cls.__scores_ic.is_empty():
-                logging.info(f'Send scores')
-                tasks.add(cls.__btasks.create_task(
-                    nc.publish, DataSubjects.SCORES, cls.__scores_ic.dumps().encode()))
+    @classmethod
+    def get_identity(cls, public_key: bytes) -> str:
+        """The identities of the computors are computed once per epoch
+        """
+        if cls.__computors is None:
+            return get_identity(public_key)
 
-            epoch = cls.get_epoch()
-            if epoch is not None:
-                logging.info(f'Send epoch: {epoch}')
-                tasks.add(cls.__btasks.create_task(
-                    nc.publish, DataSubjects.EPOCH, json.dumps(epoch).encode()))
+        return identity_cache.get(cls.__computors).get_identity(public_key)
+
+    @classmethod
+    def get_epoch(cls) -> int | None:
+        if cls.__computors is None:
+            return None
+
+        return cls.__computors.epoch
+
+    @classmethod
+    def __get_headers(cls, tracker: ChangeTracker) -> dict:
+        return {DataSubjects.SEQUENCE_HEADER: str(tracker.seq),
+                DataSubjects.FORMAT_HEADER: DATA_FORMAT}
+
+    """Payloads in DATA_FORMAT
+    """
+
+    @classmethod
+    def __encode_ticks(cls, ticks: dict) -> bytes:
+        if DATA_FORMAT == DataSubjects.FORMAT_BINARY:
+            return encode_ticks(cls.get_epoch() or 0, cls.__ticks_changes.seq, ticks)
+
+        import json
+        return json.dumps(ticks).encode()
+
+    @classmethod
+    def __encode_scores(cls, scores: dict) -> bytes:
+        if DATA_FORMAT == DataSubjects.FORMAT_BINARY:
+            return encode_scores(cls.get_epoch() or 0, cls.__scores_changes.seq,
+                                 [(identity, data[ScoresIC.SCORE_KEY], data[ScoresIC.REAL_SCORE_KEY], data[ScoresIC.TIMESTAMP_KEY])
+                                  for identity, data in scores.items()])
+
+        import json
+        return json.dumps(scores).encode()
+
+    @classmethod
+    def __encode_revenues(cls, senders) -> bytes:
+        """The binary format has a row per sender, the JSON one the columns by identity of the sender
+        """
+        if DATA_FORMAT == DataSubjects.FORMAT_BINARY:
+            return encode_revenues(cls.get_epoch() or 0, cls.__revenues_changes.seq,
+                                   senders, cls.__revenues[:, senders].T)
 
+        import json
+        computor_identities = identity_cache.get(cls.__computors)
+        return zstandard.compress(json.dumps({computor_identities.identities[index_sender]: cls.__revenues[:, index_sender].tolist()
+                                              for index_sender in senders}).encode())
+
+    @classmethod
+    def __send_deltas(cls, nc: Nats) -> set:
+        tasks = set()
+        changes = cls.__ticks_changes.take_delta()
+        if changes is not None:
+            delta = {computor_index: cls.__ticks[computor_index]
+                     for computor_index in changes if computor_index in cls.__ticks}
+            tasks.add(cls.__btasks.create_task(nc.publish, DataSubjects.TICKS_DELTA, cls.__encode_ticks(delta),
+                                               cls.__get_headers(cls.__ticks_changes)))
+
+        changes = cls.__scores_changes.take_delta()
+        if changes is not None:
+            scores = cls.__scores_ic.get_data()
+            delta = {identity: scores[identity]
+                     for identity in changes if identity in scores}
+            tasks.add(cls.__btasks.create_task(nc.publish, DataSubjects.SCORES_DELTA, cls.__encode_scores(delta),
+                                               cls.__get_headers(cls.__scores_changes)))
+
+        changes = cls.__revenues_changes.take_delta()
+        if changes is not None and cls.__computors is not None:
+            tasks.add(cls.__btasks.create_task(nc.publish, DataSubjects.REVENUES_DELTA,
+                                               cls.__encode_revenues(
+                                                   sorted(changes)),
+                                               cls.__get_headers(cls.__revenues_changes)))
+
+        return tasks
+
+    @classmethod
+    def __send_snapshots(cls, nc: Nats, full: bool) -> set:
+        """Publishes the data which changed since its last snapshot, all data if `full` is set
+        """
+        import json
+
+        tasks = set()
+        if cls.__ticks_changes.take_snapshot(full) and len(cls.__ticks) > 0:
+            logging.info(f'Send ticks')
+            tasks.add(cls.__btasks.create_task(nc.publish, DataSubjects.TICKS, cls.__encode_ticks(cls.__ticks),
+                                               cls.__get_headers(cls.__ticks_changes)))
+
+        if cls.__scores_changes.take_snapshot(full) and not cls.__scores_ic.is_empty():
+            logging.info(f'Send scores')
+            tasks.add(cls.__btasks.create_task(nc.publish, DataSubjects.SCORES, cls.__encode_scores(cls.__scores_ic.get_data()),
+                                               cls.__get_headers(cls.__scores_changes)))
+
+        epoch = cls.get_epoch()
+        if full and epoch is not None:
+            logging.info(f'Send epoch: {epoch}')
+            tasks.add(cls.__btasks.create_task(
+                nc.publish, DataSubjects.EPOCH, json.dumps(epoch).encode()))
+
+        if cls.__revenues_changes.take_snapshot(full):
             try:
-                revenues = cls.get_revenues()
-                if len(revenues) > 0:
+                if DATA_FORMAT == DataSubjects.FORMAT_BINARY:
+                    senders = numpy.flatnonzero(cls.__revenues_mask)
+                    payload = cls.__encode_revenues(
+                        senders) if len(senders) > 0 else None
+                else:
+                    # The JSON snapshot keeps the sorted revenues of every computor by identity
+                    revenues = cls.get_revenues()
+                    payload = zstandard.compress(json.dumps(
+                        revenues).encode()) if len(revenues) > 0 else None
+
+                if payload is not None:
                     logging.info(f'Send revenues')
-                    compressed_revenues = zstandard.compress(
-                        json.dumps(revenues).encode())
-                    tasks.add(cls.__btasks.create_task(nc.publish,
-                                                       DataSubjects.REVENUES, compressed_revenues))
+                    tasks.add(cls.__btasks.create_task(nc.publish, DataSubjects.REVENUES, payload,
+                                                       cls.__get_headers(cls.__revenues_changes)))
             except Exception as e:
                 logging.exception(e)
 
-            await asyncio.wait(tasks)
+        return tasks
+
+    @classmethod
+    async def send_data(cls):
+        """Publishes the changes every DELTA_INTERVAL_S and the changed snapshots every __SEND_INTERVAL_S.
+
+        All snapshots are published every FULL_SNAPSHOT_INTERVAL_S and after
+        a new epoch, the late subscribers resync from them.
+        """
+        import time
+
+        nc = Nats()
+        if nc.is_disconected:
+            logging.error(f'{DataContainer.__name__}: Nats is disconected')
+            return
+
+        last_snapshot = last_full_snapshot = time.monotonic()
+        cls.__new_epoch = True
+        while not nc.is_disconected:
+            await asyncio.sleep(DELTA_INTERVAL_S)
+
+            tasks = cls.__send_deltas(nc)
+
+            now = time.monotonic()
+            full = cls.__new_epoch or now - \
+                last_full_snapshot >= FULL_SNAPSHOT_INTERVAL_S
+            if full or now - last_snapshot >= cls.__SEND_INTERVAL_S:
+                tasks.update(cls.__send_snapshots(nc, full))
+                last_snapshot = now
+                if full:
+                    cls.__new_epoch = False
+                    last_full_snapshot = now
+
+            if len(tasks) > 0:
+                await asyncio.wait(tasks)
 
 
 class HandleBroadcastComputors(Handler):
@@ -354,8 +672,11 @@ class HandleBroadcastComputors(Handler):
 
 
 class HandleBroadcastResourceTestingSolution(Handler):
-    def __init__(self, nc: Nats) -> None:
-        super().__init__(nc)
+    def __init__(self, nc: Nats, scoring_engine: ScoringEngine) -> None:
+        # The solutions of one computor are handled in order, the others in parallel
+        super().__init__(nc, concurrency=SCORING_WORKERS,
+                         key=lambda msg: bytes(msg.data[:PUBLIC_KEY_SIZE]))
+        self.__scoring_engine = scoring_engine
 
     async def get_sub(self):
         if self._nc.is_disconected:
@@ -374,6 +695,10 @@ class HandleBroadcastResourceTestingSolution(Handler):
                 'BroadcastResourceTestingSolution structure size does not match payload size')
             return None
 
+        # Every replica gets all solutions and keeps its shard
+        if not is_own_solution(data[:PUBLIC_KEY_SIZE]):
+            return None
+
         logging.info('Got scores')
         try:
             broadcastResourceTestingSolution = BroadcastResourceTestingSolution.from_buffer_copy(
@@ -382,16 +707,12 @@ class HandleBroadcastResourceTestingSolution(Handler):
             logging.exception(e)
             return
         resourceTestingSolution: ResourceTestingSolution = broadcastResourceTestingSolution.resourceTestingSolution
-        public_key = resourceTestingSolution.computorPublicKey
-        identity = get_identity(
-            bytes(public_key))
-        nonces = resourceTestingSolution.nonces
-        new_score = get_score(nonces)
-        real_score = get_real_score(public_key=bytes(public_key), nonces=nonces)
-        logging.info(f'{new_score}/{real_score}')
-
-        DataContainer.add_scores(
-            identity=identity, new_score=new_score, real_score=real_score)
+        public_key = bytes(resourceTestingSolution.computorPublicKey)
+        identity = DataContainer.get_identity(public_key)
+        # The same solution comes many times, only the first one is scored
+        score_cache.set_epoch(DataContainer.get_epoch())
+        # Waits only while the queue of the scoring engine is full
+        await self.__scoring_engine.put(public_key, resourceTestingSolution.nonces, identity)
 
 
 class HandlerRevenues(Handler):
@@ -413,8 +734,11 @@ class HandlerRevenues(Handler):
             logging.exception(e)
             return
 
+        if not is_own_computor(revenues.computorIndex):
+            return
+
         DataContainer.add_revenues(
-            revenues.computorIndex, list(revenues.revenues))
+            revenues.computorIndex, numpy.frombuffer(revenues.revenues, dtype=numpy.uint32))
 
 
 class HandleBroadcastTick(Handler):
@@ -439,14 +763,88 @@ class HandleBroadcastTick(Handler):
             return None
 
         tick_structure = Tick.from_buffer_copy(data)
+        if not is_own_computor(tick_structure.computorIndex):
+            return
 
         DataContainer.add_tick(
             tick_structure.computorIndex, tick_structure.tick)
 
 
+def add_scores(identity: str, new_score: int, real_score: int):
+    logging.info(f'{new_score}/{real_score}')
+    DataContainer.add_scores(
+        identity=identity, new_score=new_score, real_score=real_score)
+
+
+class HandlePartialData(Handler):
+    async def get_sub(self):
+        if self._nc.is_disconected:
+            return None
+
+        return await self._nc.subscribe(DataSubjects.PARTIAL)
+
+    async def _handler_msg(self, msg: Msg):
+        import json
+
+        if msg is None or len(msg.data) <= 0:
+            return
+
+        try:
+            partial = json.loads(zstandard.decompress(msg.data))
+            DataContainer.add_partial(partial)
+        except Exception as e:
+            logging.exception(e)
+            return
+
+
+class DataMetrics(Metrics):
+    def __init__(self, scoring_engine: ScoringEngine) -> None:
+        super().__init__()
+        self.__scoring_engine = scoring_engine
+        self.score_cache_hits = self.add(Gauge(
+            'qubic_data_score_cache_hits', 'Solutions whose scores were found in the cache'))
+        self.score_cache_misses = self.add(Gauge(
+            'qubic_data_score_cache_misses', 'Solutions which were scored'))
+        self.score_cache_hit_ratio = self.add(Gauge(
+            'qubic_data_score_cache_hit_ratio', 'Hits of the score cache per lookup'))
+        self.scoring_time = self.add(Gauge(
+            'qubic_data_scoring_seconds', 'Time spent in the scoring of the solutions'))
+        self.scoring_saved_time = self.add(Gauge(
+            'qubic_data_scoring_saved_seconds', 'Estimated scoring time saved by the score cache'))
+        self.scoring_queue_size = self.add(Gauge(
+            'qubic_data_scoring_queue_size', 'Solutions waiting to be scored'))
+
+    def update(self):
+        self.score_cache_hits.set(value=score_cache.hits)
+        self.score_cache_misses.set(value=score_cache.misses)
+        self.score_cache_hit_ratio.set(value=score_cache.hit_rate)
+        self.scoring_time.set(value=score_cache.scoring_time)
+        self.scoring_saved_time.set(value=score_cache.saved_time)
+        self.scoring_queue_size.set(value=self.__scoring_engine.queue_size)
+
+
+async def publish_metrics(metrics: DataMetrics):
+    import json
+    import time
+
+    nc = Nats()
+    while True:
+        await asyncio.sleep(METRICS_INTERVAL_S)
+        if nc.is_disconected:
+            continue
+
+        metrics.update()
+        payload = json.dumps({'timestamp': int(time.time()),
+                              'metrics': {**metrics.to_dict(), **handler_metrics.to_dict()}})
+        await nc.publish(MetricsSubjects.DATA_PROCESSING, payload.encode())
+
+
 async def main():
     logging.info('Start data processig')
 
+    if not is_valid_mode():
+        return
+
     logging.info('Connecting to the nats server')
 
     nc = Nats()
@@ -458,18 +856,44 @@ async def main():
 
     tasks = [
         asyncio.create_task(HandlerStarter.start(
-            HandleBroadcastResourceTestingSolution(nc))),
+            HandleBroadcastComputors(nc))),
+        asyncio.create_task(DataContainer.backup_loop())
+    ]
+
+    if DATA_MODE == MODE_MERGE:
+        logging.info('Merging the data of the replicas')
+        tasks.extend([
+            asyncio.create_task(HandlerStarter.start(
+                HandlePartialData(nc))),
+            asyncio.create_task(DataContainer.send_data())
+        ])
+        await asyncio.wait(tasks)
+        return
+
+    if DATA_MODE == MODE_REPLICA:
+        logging.info(
+            f'Replica {REPLICA_INDEX} of {NUMBER_OF_REPLICAS}')
+
+    scoring_engine = ScoringEngine(
+        add_scores, SCORING_WORKERS, SCORING_QUEUE_SIZE, SCORING_PROCESSES)
+    scoring_engine.start()
+
+    tasks.extend([
         asyncio.create_task(HandlerStarter.start(
-            HandleBroadcastTick(nc))),
+            HandleBroadcastResourceTestingSolution(nc, scoring_engine))),
         asyncio.create_task(HandlerStarter.start(
-            HandleBroadcastComputors(nc))),
+            HandleBroadcastTick(nc))),
         asyncio.create_task(HandlerStarter.start(
             HandlerRevenues(nc))),
-        asyncio.create_task(DataContainer.backup_loop()),
-        asyncio.create_task(DataContainer.send_data())
-    ]
-
-    await asyncio.wait(tasks)
+        asyncio.create_task(DataContainer.send_partial(
+        ) if DATA_MODE == MODE_REPLICA else DataContainer.send_data()),
+        asyncio.create_task(publish_metrics(DataMetrics(scoring_engine)))
+    ])
+
+    try:
+        await asyncio.wait(tasks)
+    finally:
+        await scoring_engine.stop()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,153 @@
+import asyncio
+import ctypes
+import itertools
+import json
+import logging
+import os
+import secrets
+import tempfile
+import unittest
+from unittest import mock
+
+os.environ.setdefault('DATA_FILES_PATH', tempfile.mkdtemp())
+
+from algorithms.verify import get_identities
+from qubic.qubicdata import Computors, DataSubjects
+from qubic.qubicencoding import decode_scores, get_score_identities
+
+import main
+from main import ChangeTracker, DataContainer
+
+_epochs = itertools.count(1)
+
+
+def get_computors() -> Computors:
+    """Computors of a new epoch with random public keys
+    """
+    computors = Computors()
+    computors.epoch = next(_epochs)
+    public_keys = secrets.token_bytes(ctypes.sizeof(computors.public_keys))
+    ctypes.memmove(computors.public_keys, public_keys, len(public_keys))
+    return computors
+
+
+class Connection():
+    def __init__(self) -> None:
+        # subject -> [(payload, headers)]
+        self.published = dict()
+
+    async def publish(self, subject: str, payload: bytes, headers=None):
+        self.published.setdefault(subject, []).append((payload, headers))
+
+
+class TestChangeTracker(unittest.TestCase):
+    def test_delta(self):
+        tracker = ChangeTracker()
+        self.assertIsNone(tracker.take_delta())
+        self.assertEqual(0, tracker.seq)
+
+        tracker.add(1)
+        tracker.add(2)
+        tracker.add(1)
+        self.assertEqual({1, 2}, tracker.take_delta())
+        self.assertEqual(1, tracker.seq)
+        self.assertIsNone(tracker.take_delta())
+
+    def test_snapshot(self):
+        tracker = ChangeTracker()
+        self.assertFalse(tracker.take_snapshot())
+        self.assertTrue(tracker.take_snapshot(force=True))
+
+        tracker.add(1)
+        tracker.take_delta()
+        self.assertTrue(tracker.take_snapshot())
+        self.assertFalse(tracker.take_snapshot())
+
+        tracker.reset()
+        self.assertTrue(tracker.take_snapshot())
+
+
+class TestDataContainer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        DataContainer.add_computors(get_computors())
+
+    async def send_deltas(self) -> Connection:
+        nc = Connection()
+        tasks = DataContainer._DataContainer__send_deltas(nc)
+        if len(tasks) > 0:
+            await asyncio.wait(tasks)
+        return nc
+
+    async def send_snapshots(self) -> Connection:
+        nc = Connection()
+        tasks = DataContainer._DataContainer__send_snapshots(nc, False)
+        if len(tasks) > 0:
+            await asyncio.wait(tasks)
+        return nc
+
+    async def test_new_scores(self):
+        identities = get_identities(secrets.token_bytes(32 * 2))
+        DataContainer.add_scores(identities[0], 10, 9)
+        DataContainer.add_scores(identities[1], 20, 0)
+
+        with mock.patch.object(main, 'DATA_FORMAT', DataSubjects.FORMAT_BINARY):
+            nc = await self.send_deltas()
+        self.assertEqual(1, len(nc.published[DataSubjects.SCORES_DELTA]))
+        payload, headers = nc.published[DataSubjects.SCORES_DELTA][0]
+        self.assertEqual(DataSubjects.FORMAT_BINARY,
+                         headers[DataSubjects.FORMAT_HEADER])
+        header, records = decode_scores(payload)
+        self.assertEqual(sorted(identities), sorted(
+            get_score_identities(records)))
+        self.assertEqual(str(header.seq),
+                         headers[DataSubjects.SEQUENCE_HEADER])
+
+        # The snapshot follows the delta
+        nc = await self.send_snapshots()
+        self.assertIn(DataSubjects.SCORES, nc.published)
+
+    async def test_json_scores(self):
+        identity = get_identities(secrets.token_bytes(32))[0]
+        DataContainer.add_scores(identity, 10, 9)
+
+        nc = await self.send_deltas()
+        payload, headers = nc.published[DataSubjects.SCORES_DELTA][0]
+        self.assertEqual(DataSubjects.FORMAT_JSON, headers[DataSubjects.FORMAT_HEADER],
+                         'JSON is the default format')
+        self.assertIn(identity, json.loads(payload))
+
+    async def test_unchanged_scores(self):
+        identity = get_identities(secrets.token_bytes(32))[0]
+        DataContainer.add_scores(identity, 10, 9)
+        await self.send_deltas()
+        await self.send_snapshots()
+
+        # A lower score changes nothing
+        DataContainer.add_scores(identity, 5, 5)
+        nc = await self.send_deltas()
+        self.assertNotIn(DataSubjects.SCORES_DELTA, nc.published)
+        nc = await self.send_snapshots()
+        self.assertNotIn(DataSubjects.SCORES, nc.published)
+
+        DataContainer.add_scores(identity, 11, 9)
+        nc = await self.send_deltas()
+        self.assertIn(DataSubjects.SCORES_DELTA, nc.published)
+
+    async def test_ticks(self):
+        DataContainer.add_tick(1, 100)
+        DataContainer.add_tick(2, 100)
+        nc = await self.send_deltas()
+        self.assertEqual(1, len(nc.published[DataSubjects.TICKS_DELTA]))
+
+        # An older tick is not a change
+        DataContainer.add_tick(1, 99)
+        nc = await self.send_deltas()
+        self.assertNotIn(DataSubjects.TICKS_DELTA, nc.published)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
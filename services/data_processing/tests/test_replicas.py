@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import secrets
+import tempfile
+import unittest
+from unittest import mock
+
+os.environ.setdefault('DATA_FILES_PATH', tempfile.mkdtemp())
+
+import main
+import numpy
+from algorithms.verify import get_identities
+from main import (MODE_MERGE, MODE_REPLICA, MODE_SINGLE, DataContainer,
+                  ScoresIC, get_backup_file_name, is_own_computor,
+                  is_own_solution, is_valid_mode)
+from qubic.qubicdata import NUMBER_OF_COMPUTORS
+
+from test_data_container import get_computors
+
+
+def as_replica(index: int, replicas: int = 3):
+    return mock.patch.multiple(main, DATA_MODE=MODE_REPLICA, NUMBER_OF_REPLICAS=replicas, REPLICA_INDEX=index)
+
+
+class TestReplicas(unittest.TestCase):
+    def test_valid_mode(self):
+        with as_replica(2):
+            self.assertTrue(is_valid_mode())
+        with as_replica(3):
+            self.assertFalse(is_valid_mode())
+        with as_replica(-1):
+            self.assertFalse(is_valid_mode())
+        with as_replica(0, replicas=0):
+            self.assertFalse(is_valid_mode())
+        with mock.patch.object(main, 'DATA_MODE', 'other'):
+            self.assertFalse(is_valid_mode())
+
+    def test_backup_file_name(self):
+        names = set()
+        for index in range(3):
+            with as_replica(index):
+                names.add(get_backup_file_name('scores'))
+        for mode in (MODE_SINGLE, MODE_MERGE):
+            with mock.patch.object(main, 'DATA_MODE', mode):
+                names.add(get_backup_file_name('scores'))
+
+        self.assertEqual(5, len(names))
+        with mock.patch.object(main, 'DATA_MODE', MODE_SINGLE):
+            self.assertEqual('scores.data', get_backup_file_name('scores'))
+
+    def test_own_computor(self):
+        for index in range(3):
+            with as_replica(index):
+                self.assertEqual(list(range(index, NUMBER_OF_COMPUTORS, 3)),
+                                 [i for i in range(NUMBER_OF_COMPUTORS) if is_own_computor(i)])
+
+        with mock.patch.object(main, 'DATA_MODE', MODE_MERGE):
+            self.assertTrue(all(is_own_computor(i)
+                            for i in range(NUMBER_OF_COMPUTORS)))
+
+    def test_own_solution(self):
+        public_keys = [secrets.token_bytes(32) for _ in range(64)]
+        owners = []
+        for public_key in public_keys:
+            owner = []
+            for index in range(3):
+                with as_replica(index):
+                    if is_own_solution(public_key):
+                        owner.append(index)
+            owners.append(owner)
+
+        for public_key, owner in zip(public_keys, owners):
+            self.assertEqual(1, len(owner), 'One replica scores a solution')
+            # The repeats of a solution go to the same replica
+            with as_replica(owner[0]):
+                self.assertTrue(is_own_solution(bytes(public_key)))
+
+        self.assertEqual({0, 1, 2}, {owner[0] for owner in owners})
+
+        with mock.patch.object(main, 'DATA_MODE', MODE_SINGLE):
+            self.assertTrue(all(is_own_solution(public_key)
+                            for public_key in public_keys))
+
+
+class TestPartialData(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        DataContainer.add_computors(get_computors())
+
+    def add_revenues(self, senders: list) -> dict:
+        revenues = dict()
+        for index_sender in senders:
+            revenues[index_sender] = numpy.random.randint(
+                0, 2 ** 32, NUMBER_OF_COMPUTORS, dtype=numpy.uint32)
+            DataContainer.add_revenues(index_sender, revenues[index_sender])
+        return revenues
+
+    async def test_revenue_columns(self):
+        revenues = self.add_revenues([0, 1, 4, 5, 600])
+
+        with as_replica(1):
+            columns = DataContainer.get_revenue_columns()
+        self.assertEqual([1, 4], sorted(columns.keys()))
+        for index_sender, column in columns.items():
+            self.assertEqual(revenues[index_sender].tolist(), column)
+
+        with mock.patch.object(main, 'DATA_MODE', MODE_SINGLE):
+            self.assertEqual([0, 1, 4, 5, 600], sorted(
+                DataContainer.get_revenue_columns().keys()))
+
+    async def test_add_partial(self):
+        identity = get_identities(secrets.token_bytes(32))[0]
+        revenues = numpy.arange(NUMBER_OF_COMPUTORS, dtype=numpy.uint32)
+        # The keys are strings after the JSON round trip
+        partial = json.loads(json.dumps({'replica': 1,
+                                         'epoch': DataContainer.get_epoch(),
+                                         'ticks': {1: 100, 4: 101},
+                                         'scores': {identity: {ScoresIC.SCORE_KEY: 10, ScoresIC.REAL_SCORE_KEY: 9, ScoresIC.TIMESTAMP_KEY: 0}},
+                                         'revenues': {4: revenues.tolist()}}))
+
+        with mock.patch.object(main, 'DATA_MODE', MODE_MERGE):
+            DataContainer.add_partial(dict(partial, epoch=partial['epoch'] - 1))
+            self.assertEqual({}, DataContainer.get_ticks())
+
+            DataContainer.add_partial(partial)
+            self.assertEqual({1: 100, 4: 101}, DataContainer.get_ticks())
+            self.assertEqual({4: revenues.tolist()},
+                             DataContainer.get_revenue_columns())
+
+        scores = DataContainer._DataContainer__scores_ic.get_data()
+        self.assertEqual(10, scores[identity][ScoresIC.SCORE_KEY])
+        self.assertEqual(9, scores[identity][ScoresIC.REAL_SCORE_KEY])
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
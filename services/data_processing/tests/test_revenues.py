@@ -0,0 +1,73 @@
+import logging
+import os
+import tempfile
+import unittest
+
+os.environ.setdefault('DATA_FILES_PATH', tempfile.mkdtemp())
+
+import numpy
+from main import DataContainer
+from qubic.qubicdata import NUMBER_OF_COMPUTORS
+from qubic.qubicutils import get_identities_from_computors
+
+from test_data_container import get_computors
+
+
+def get_list_revenues(identities: list, columns: dict) -> dict:
+    """The revenues computed with lists, sender index -> revenues it sent
+    """
+    revenues = [[None] * NUMBER_OF_COMPUTORS for _ in range(NUMBER_OF_COMPUTORS)]
+    for index_sender, column in columns.items():
+        for idx, r in enumerate(column):
+            revenues[idx][index_sender] = r
+
+    return {identities[idx]: sorted([rev for rev in r_list if rev is not None])
+            for idx, r_list in enumerate(revenues)}
+
+
+class TestRevenues(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.computors = get_computors()
+        self.identities = get_identities_from_computors(self.computors)
+        DataContainer.add_computors(self.computors)
+
+    def add_revenues(self, columns: dict, senders: list):
+        for index_sender in senders:
+            column = numpy.random.randint(
+                0, 2 ** 32, NUMBER_OF_COMPUTORS, dtype=numpy.uint32)
+            columns[index_sender] = column.tolist()
+            DataContainer.add_revenues(index_sender, column)
+
+    async def test_no_senders(self):
+        revenues = DataContainer.get_revenues()
+        self.assertEqual(get_list_revenues(self.identities, {}), revenues)
+        self.assertEqual(NUMBER_OF_COMPUTORS, len(revenues))
+
+    async def test_partial_senders(self):
+        columns = dict()
+        self.add_revenues(columns, [0, 3, 17, 675])
+        self.assertEqual(get_list_revenues(
+            self.identities, columns), DataContainer.get_revenues())
+
+        # A sender replaces its revenues
+        self.add_revenues(columns, [3, 100])
+        self.assertEqual(get_list_revenues(
+            self.identities, columns), DataContainer.get_revenues())
+
+    async def test_list_revenues(self):
+        """The handler passes numpy arrays, the merge stage lists
+        """
+        columns = {5: list(range(NUMBER_OF_COMPUTORS, 0, -1))}
+        DataContainer.add_revenues(5, columns[5])
+        revenues = DataContainer.get_revenues()
+
+        self.assertEqual(get_list_revenues(self.identities, columns), revenues)
+        self.assertEqual([NUMBER_OF_COMPUTORS], revenues[self.identities[0]])
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
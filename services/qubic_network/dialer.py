@@ -0,0 +1,225 @@
+import logging
+import random
+import time
+from collections import OrderedDict
+from enum import Enum
+
+from utils.backgroundtasks import BackgroundTasks
+
+from peerstats import PeerStats
+
+
+class PeerState(Enum):
+    IDLE = 0
+    DIALING = 1
+    CONNECTED = 2
+    BACKOFF = 3
+
+
+class PeerRecord():
+    def __init__(self, ip: str) -> None:
+        self.ip = ip
+        self.state = PeerState.IDLE
+        self.failures = 0
+        self.next_dial_time = 0.0
+        # Unix times, kept between restarts
+        self.last_seen = time.time()
+        self.last_success = 0.0
+        self.stats = PeerStats()
+
+
+class DialScheduler():
+    """Decides which known peers are dialed and when.
+
+    Idle peers wait in a single queue (one entry per ip). A dial coroutine is
+    started only when there is a free connection slot and the number of dials
+    in flight is below `max_dials`, the best scoring idle peer goes first.
+    After a failed dial the peer waits BACKOFF_BASE_S * 2^failures seconds
+    before it can be dialed again.
+    """
+    BACKOFF_BASE_S = 5
+    BACKOFF_MAX_S = 600
+    # A connected peer is evicted only after it had time to show its quality
+    EVICTION_MIN_SESSION_S = 120
+    # The candidate score must be this much higher than the score of the worst peer
+    EVICTION_MARGIN = 1.5
+
+    def __init__(self, dial, max_connections: int, max_dials: int) -> None:
+        # Coroutine function taking an ip, it returns when the connection is closed
+        self._dial = dial
+        self._max_connections = max_connections
+        self._max_dials = max_dials
+        self._records: dict[str, PeerRecord] = dict()
+        self._pending = OrderedDict()
+        self._dials = 0
+        self._connected = 0
+        self._running = False
+        self._background_tasks = BackgroundTasks()
+
+    @property
+    def connected(self) -> int:
+        return self._connected
+
+    @property
+    def dials(self) -> int:
+        return self._dials
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def get_record(self, ip: str) -> PeerRecord | None:
+        return self._records.get(ip)
+
+    def get_records(self) -> list:
+        return list(self._records.values())
+
+    def count(self, state: PeerState) -> int:
+        return len([record for record in self._records.values() if record.state == state])
+
+    def add(self, ip: str) -> PeerRecord:
+        record = self._records.get(ip)
+        if record is not None:
+            record.last_seen = time.time()
+            return record
+
+        record = PeerRecord(ip)
+        self._records[ip] = record
+        self._pending[ip] = None
+        return record
+
+    def forget(self, ip: str):
+        self._pending.pop(ip, None)
+        record = self._records.pop(ip, None)
+        if record is not None and record.state == PeerState.CONNECTED:
+            self._connected -= 1
+            record.state = PeerState.IDLE
+
+    def unknown_score(self) -> float:
+        """Peers which have never been connected get the average score
+        """
+        scores = [record.stats.score()
+                  for record in self._records.values() if record.stats.has_history]
+        if len(scores) <= 0:
+            return 1.0
+
+        return sum(scores) / len(scores)
+
+    def get_score(self, ip: str, unknown_score: float = 1.0) -> float:
+        record = self._records.get(ip)
+        if record is None:
+            return 0.0
+
+        return record.stats.score(unknown_score)
+
+    def get_scores(self) -> list:
+        """Peers with their states and quality, the best ones go first
+        """
+        unknown_score = self.unknown_score()
+        scores = []
+        for record in self._records.values():
+            data = {
+                'ip': record.ip,
+                'state': record.state.name,
+                'score': record.stats.score(unknown_score),
+                'failures': record.failures
+            }
+            data.update(record.stats.to_dict())
+            scores.append(data)
+
+        return sorted(scores, key=lambda data: data['score'], reverse=True)
+
+    def get_eviction_candidate(self) -> str | None:
+        """Returns the ip of the worst connected peer if a much better idle peer is waiting
+        """
+        if self._connected < self._max_connections or len(self._pending) <= 0:
+            return None
+
+        unknown_score = self.unknown_score()
+        connected = [record for record in self._records.values()
+                     if record.state == PeerState.CONNECTED and record.stats.session_time >= self.EVICTION_MIN_SESSION_S]
+        if len(connected) <= 0:
+            return None
+
+        worst = min(connected, key=lambda record: record.stats.score())
+        best_score = max([self.get_score(ip, unknown_score)
+                         for ip in self._pending])
+        if best_score > worst.stats.score() * self.EVICTION_MARGIN:
+            return worst.ip
+
+        return None
+
+    def add_frame(self, ip: str, valid: bool):
+        record = self._records.get(ip)
+        if record is not None:
+            record.stats.add_frame(valid)
+
+    def set_connected(self, ip: str, connect_latency: float):
+        record = self._records.get(ip)
+        if record is None or record.state != PeerState.DIALING:
+            return
+
+        record.state = PeerState.CONNECTED
+        record.failures = 0
+        record.last_seen = record.last_success = time.time()
+        record.stats.session_started(connect_latency)
+        self._dials -= 1
+        self._connected += 1
+        self.schedule()
+
+    def schedule(self):
+        if not self._running:
+            return
+
+        now = time.monotonic()
+        for record in self._records.values():
+            if record.state == PeerState.BACKOFF and record.next_dial_time <= now:
+                record.state = PeerState.IDLE
+                self._pending[record.ip] = None
+
+        unknown_score = None
+        while len(self._pending) > 0 and self._dials < self._max_dials and self._connected + self._dials < self._max_connections:
+            if unknown_score is None:
+                unknown_score = self.unknown_score()
+
+            ip = max(self._pending, key=lambda ip: self.get_score(
+                ip, unknown_score))
+            del self._pending[ip]
+            record = self._records[ip]
+            record.state = PeerState.DIALING
+            self._dials += 1
+            self._background_tasks.create_task(self.__dial, record)
+
+    async def __dial(self, record: PeerRecord):
+        try:
+            await self._dial(record.ip)
+        except Exception as e:
+            logging.exception(e)
+        finally:
+            self.__dial_done(record)
+
+    def __dial_done(self, record: PeerRecord):
+        if record.state == PeerState.CONNECTED:
+            self._connected -= 1
+            record.stats.session_ended()
+        elif record.state == PeerState.DIALING:
+            self._dials -= 1
+            record.failures += 1
+        else:
+            # The connected peer has been forgotten
+            return
+
+        delay = min(self.BACKOFF_BASE_S * (2 ** record.failures),
+                    self.BACKOFF_MAX_S)
+        record.state = PeerState.BACKOFF
+        record.next_dial_time = time.monotonic() + delay * random.uniform(0.8, 1.2)
+
+        self.schedule()
+
+    def start(self):
+        self._running = True
+        self.schedule()
+
+    async def stop(self):
+        self._running = False
+        await self._background_tasks.close()
@@ -1,60 +1,151 @@
 import asyncio
+import json
 import logging
-from typing import Any
+import time
+from os import getenv
+from typing import Callable
 
 from custom_nats.custom_nats import Nats
-from qubic.qubicdata import (BROADCAST_COMPUTORS,
-                             BROADCAST_RESOURCE_TESTING_SOLUTION,
-                             BROADCAST_REVENUES, BROADCAST_TICK,
-                             EXCHANGE_PUBLIC_PEERS, BroadcastComputors,
-                             BroadcastResourceTestingSolution,
-                             ExchangePublicPeers, Revenues, Subjects, Tick)
+from qubic.qubicdata import MetricsSubjects
+from utils.metrics import start_metrics_server
+from utils.sharedseenset import SharedSeenSet
 
-from manager import QubicNetworkManager
+from manager import QubicNetworkManager, get_verify_workers
+from peerstore import (PeerStore, get_peer_store_path, get_peer_store_paths,
+                       rank_peers)
+from publisher import Publisher
+from sharding import ShardCoordinator, ShardWorker
 
+PUBLIC_IP_LIST = ["93.125.105.208", "178.172.194.154", "91.43.75.241", "178.172.194.148", "178.172.194.130",
+                  "178.172.194.150", "178.172.194.147"]
 
-async def publish_data(header_type: int, data: Any):
-    nc = Nats()
-    if await nc.connect() is None:
-        logging.error('Failed to connect to Nats')
-        return
+# Number of ingestion processes, 1 runs everything in this process
+NUMBER_OF_WORKERS = int(getenv('QUBIC_NETWORK_WORKERS', 1))
 
-    if header_type == BROADCAST_COMPUTORS and isinstance(data, BroadcastComputors):
-        # logging.debug('BROADCAST_COMPUTORS')
-        payload = bytes(data)
+# How often the metrics snapshot is published to MetricsSubjects.NETWORK
+METRICS_INTERVAL_S = int(getenv('QUBIC_NETWORK_METRICS_INTERVAL', 10))
+# Local text endpoint of the metrics, 0 disables it. The worker N listens on the port + N
+METRICS_HOST = getenv('QUBIC_NETWORK_METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(getenv('QUBIC_NETWORK_METRICS_PORT', 9464))
 
-        await nc.publish(Subjects.BROADCAST_COMPUTORS, payload=payload)
-    elif header_type == EXCHANGE_PUBLIC_PEERS and isinstance(data, ExchangePublicPeers):
-        # logging.debug('EXCHANGE_PUBLIC_PEERS')
-        payload = bytes(data)
+async def publish_metrics(qubic: QubicNetworkManager, worker_index: int, update: Callable[[], None]):
+    while True:
+        await asyncio.sleep(METRICS_INTERVAL_S)
+        update()
 
-        await nc.publish(Subjects.EXCHANGE_PUBLIC_PEERS, payload=payload)
-    elif header_type == BROADCAST_RESOURCE_TESTING_SOLUTION and isinstance(data, BroadcastResourceTestingSolution):
-        # logging.debug('BROADCAST_RESOURCE_TESTING_SOLUTION')
-        await nc.publish(Subjects.BROADCAST_RESOURCE_TESTING_SOLUTION, bytes(data))
-    elif header_type == BROADCAST_TICK and isinstance(data, Tick):
-        # logging.debug('BROADCAST_TICK')
-        await nc.publish(Subjects.BROADCAST_TICK, payload=bytes(data))
-    elif header_type == BROADCAST_REVENUES and isinstance(data, Revenues):
-        await nc.publish(Subjects.BROADCAST_REVENUES, payload=bytes(data))
+        nc = Nats()
+        if await nc.connect() is None:
+            logging.error('Failed to connect to Nats')
+            continue
 
+        payload = json.dumps({'worker': worker_index,
+                              'timestamp': int(time.time()),
+                              'metrics': qubic.metrics.to_dict()})
+        try:
+            await nc.publish(MetricsSubjects.NETWORK, payload=payload.encode())
+        except Exception as e:
+            logging.exception(e)
 
-async def main():
 
+async def run_manager(qubic: QubicNetworkManager, worker_index: int = 0):
+    """Runs the manager with its publisher and metrics until it stops
+    """
+    publisher = Publisher(qubic.metrics)
+    qubic.add_payload_callback(publisher.add_payload)
+
+    def update_metrics():
+        qubic.update_metrics()
+        publisher.update_metrics()
+
+    server = None
+    if METRICS_PORT > 0:
+        try:
+            server = await start_metrics_server(qubic.metrics, METRICS_HOST, METRICS_PORT + worker_index, update_metrics)
+        except OSError as e:
+            logging.exception(e)
+
+    publisher_task = asyncio.create_task(publisher.run())
+    metrics_task = asyncio.create_task(
+        publish_metrics(qubic, worker_index, update_metrics))
+    try:
+        await qubic.start()
+    finally:
+        publisher_task.cancel()
+        metrics_task.cancel()
+        if server is not None:
+            server.close()
+        await qubic.stop()
+
+
+async def worker_main(index: int, ip_list: list, inbox, outbox, seen_frames_name: str, seen_frames_slots: int, seen_frames_ttl: float):
     nc = await Nats().connect()
     if nc is None:
         logging.error('Failed to connect to Nats')
         return
 
-    qubic = QubicNetworkManager(["93.125.105.208", "178.172.194.154", "91.43.75.241", "178.172.194.148", "178.172.194.130",
-                                 "178.172.194.150", "178.172.194.147"])
+    seen_frames = SharedSeenSet.attach(
+        seen_frames_name, seen_frames_slots, seen_frames_ttl)
+    worker = ShardWorker(index, inbox, outbox)
+    # Every worker saves its peers in its own file and reads the files of all workers
+    peer_store = PeerStore(get_peer_store_path(index),
+                           load_paths=get_peer_store_paths())
+    # The workers share the cores
+    qubic = QubicNetworkManager(
+        ip_list, seen_frames=seen_frames, ip_router=worker.route_ip, peer_store=peer_store,
+        verify_workers=get_verify_workers(NUMBER_OF_WORKERS))
 
-    qubic.add_callback(publish_data)
+    qubic.add_callback(worker.share_computors)
 
+    manager_task = asyncio.create_task(run_manager(qubic, index))
+    coordinator_task = asyncio.create_task(worker.run(qubic))
     try:
-        await qubic.start()
+        # run_manager stops the manager when it ends or the coordinator asks to stop
+        await asyncio.wait({manager_task, coordinator_task}, return_when=asyncio.FIRST_COMPLETED)
     finally:
-        await qubic.stop()
+        coordinator_task.cancel()
+        manager_task.cancel()
+        await asyncio.gather(manager_task, coordinator_task, return_exceptions=True)
+        seen_frames.close()
+
+
+def run_worker(*args):
+    """Entry point of a worker process
+    """
+    logging.basicConfig(level=logging.DEBUG)
+    try:
+        asyncio.run(worker_main(*args))
+    except KeyboardInterrupt:
+        pass
+
+
+async def run_workers():
+    # The peers known before the restart are spread over the workers, the best ones first
+    stored_ip_list = rank_peers(
+        PeerStore(get_peer_store_path(), load_paths=get_peer_store_paths()).load())
+    coordinator = ShardCoordinator(
+        NUMBER_OF_WORKERS, stored_ip_list + PUBLIC_IP_LIST, QubicNetworkManager.SEEN_FRAMES_TTL_S)
+    coordinator.start(run_worker)
+
+    try:
+        await coordinator.run()
+    finally:
+        await coordinator.stop()
+
+
+async def main():
+    if NUMBER_OF_WORKERS > 1:
+        await run_workers()
+        return
+
+    nc = await Nats().connect()
+    if nc is None:
+        logging.error('Failed to connect to Nats')
+        return
+
+    qubic = QubicNetworkManager(
+        PUBLIC_IP_LIST, peer_store=PeerStore(get_peer_store_path()))
+
+    await run_manager(qubic)
 
 
 if __name__ == '__main__':
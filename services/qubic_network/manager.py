@@ -1,46 +1,114 @@
 import asyncio
 import ctypes
 import logging
+import time
 from ctypes import sizeof
 from os import getenv
 from random import shuffle
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
+from algorithms.verify import kangaroo_twelve
 from qubic.qubicdata import (BROADCAST_COMPUTORS,
                              BROADCAST_RESOURCE_TESTING_SOLUTION,
                              BROADCAST_REVENUES, BROADCAST_TICK,
-                             EXCHANGE_PUBLIC_PEERS, NUMBER_OF_COMPUTORS,
+                             EXCHANGE_PUBLIC_PEERS,
                              REQUEST_COMPUTORS, REQUEST_COMPUTORS_HEADER,
                              BroadcastComputors,
                              BroadcastResourceTestingSolution, Computors,
                              ConnectionState, ExchangePublicPeers,
                              RequestResponseHeader, Revenues, Tick,
                              broadcasted_computors)
+from qubic.qubicprotocol import HEADER_SIZE, QubicProtocol
 from qubic.qubicutils import (apply_computors, can_apply_computors_data,
-                              can_apply_revenues,
                               exchange_public_peers_to_list,
-                              get_header_from_bytes, get_protocol_version,
-                              get_raw_payload, is_valid_computors_data,
-                              is_valid_header, is_valid_ip,
-                              is_valid_revenues_data, is_valid_tick_data)
+                              get_protocol_version, is_valid_ip,
+                              verification_cache)
+from qubic.qubicvalidation import (can_apply_revenues_payload,
+                                   is_plausible_tick)
+from qubic.qubicverifier import SignatureVerifier
 from utils.backgroundtasks import BackgroundTasks
 from utils.callback import Callbacks
+from utils.framequeue import PriorityFrameQueue
+from utils.seenset import SeenSet
+
+from dialer import DialScheduler, PeerState
+from networkmetrics import NetworkMetrics, get_type_name
+from peerstore import (PeerStore, int_to_ip, rank_peers, restore_record,
+                       to_peer_data)
+from priorities import (CLASS_MAX_SIZES, NUMBER_OF_PRIORITIES, PRIORITIES,
+                        PRIORITY_NORMAL)
+
+
+def get_verify_workers(processes: int = 1) -> int:
+    """QUBIC_NETWORK_VERIFY_WORKERS or the share of the cores of one of `processes` processes, 0 verifies inline
+    """
+    value = getenv('QUBIC_NETWORK_VERIFY_WORKERS')
+    if value is not None:
+        return int(value)
+
+    return SignatureVerifier.get_default_workers(processes)
 
 
 class QubicNetworkManager():
     NUBMER_OF_CONNECTION = 10
-
-    def __init__(self, public_ip_list: list) -> None:
+    # Maximum number of connection attempts at the same time
+    NUMBER_OF_DIALS = 4
+    # How often the worst peer is replaced by a better one
+    EVICTION_INTERVAL_S = 60
+    SEEN_FRAMES_SIZE = 65536
+    SEEN_FRAMES_TTL_S = 300
+    # How often the known peers are saved
+    PEER_STORE_INTERVAL_S = 60
+
+    def __init__(self, public_ip_list: list, seen_frames=None, ip_router: Optional[Callable[[set], None]] = None,
+                 peer_store: Optional[PeerStore] = None, metrics: Optional[NetworkMetrics] = None,
+                 verify_workers: Optional[int] = None) -> None:
+        """`seen_frames` replaces the local seen set, `ip_router` receives the new ips
+        instead of connecting to them (another process decides who connects).
+        Without `peer_store` the known peers are not kept between restarts.
+        `verify_workers` is get_verify_workers() by default.
+        """
         self._know_ip = set(public_ip_list)
-        self._fogeted_ip = set()
+        # ip -> when it was forgotten, the store drops it after PeerStore.MAX_AGE_S
+        self._fogeted_ip = dict()
+        self._peer_store = peer_store
+        self._routed_ip = set()
         self._peers = set()
+        self._seen_frames = seen_frames if seen_frames is not None else SeenSet(
+            QubicNetworkManager.SEEN_FRAMES_SIZE, QubicNetworkManager.SEEN_FRAMES_TTL_S)
+        self.__ip_router = ip_router
+        self._metrics = metrics if metrics is not None else NetworkMetrics()
         self._backgound_tasks = BackgroundTasks()
+        self._verifier = SignatureVerifier(
+            verify_workers if verify_workers is not None else get_verify_workers())
         self.__connection_state: ConnectionState = ConnectionState.NONE
         self.__callbacks = Callbacks()
-        self.__semaphore = asyncio.Semaphore(
-            QubicNetworkManager.NUBMER_OF_CONNECTION)
+        self.__payload_callbacks = Callbacks()
+        self._dialer = DialScheduler(self.connect_to_peer,
+                                     QubicNetworkManager.NUBMER_OF_CONNECTION, QubicNetworkManager.NUMBER_OF_DIALS)
+
+        stored_peers = self._peer_store.load() if peer_store is not None else []
+        # ip -> PeerData, used until the peer is added
+        self._stored_peers = {int_to_ip(data.ip): data for data in stored_peers}
+        self._fogeted_ip.update(
+            [(ip, data.last_seen) for ip, data in self._stored_peers.items() if data.forgotten])
+
+        # The peers known before the restart go first, the best ones are dialed first
+        ip_list = [ip for ip in self._know_ip if is_valid_ip(ip)]
+        shuffle(ip_list)
+        if ip_router is None:
+            ip_list = rank_peers(stored_peers) + ip_list
+
+        if peer_store is not None:
+            logging.info(
+                f'Loaded {len(self._stored_peers)} peers from {peer_store.path}')
+        for ip in ip_list:
+            if ip not in self._fogeted_ip:
+                self.__add_to_dialer(ip)
 
     async def connect_to_peer(self, ip):
+        """Connects to the peer and returns when the connection is closed
+        """
         if not is_valid_ip(ip):
             logging.warning(
                 f'{self.connect_to_peer.__name__}: {ip} is not valid')
@@ -49,34 +117,111 @@ class QubicNetworkManager():
             logging.info(f'{self.connect_to_peer.__name__}: {ip} is connected')
             return
 
-        async with self.__semaphore:
-            peer = Peer(self)
-            self._peers.add(peer)
-            peer.add_callback(self.__data_from_peer)
+        peer = Peer(self)
+        self._peers.add(peer)
+        peer.add_callback(self.__data_from_peer)
 
-            try:
-                await peer.connect(ip=ip, port=self.port, timeout=self.connection_timeout)
-            except Exception as e:
-                logging.exception(e)
-            except BaseException as e:
-                logging.exception(e)
-                raise e
+        try:
+            await peer.connect(ip=ip, port=self.port, timeout=self.connection_timeout)
+        except Exception as e:
+            logging.exception(e)
+        except BaseException as e:
+            logging.exception(e)
+            raise e
 
-            if peer.state is not ConnectionState.CLOSED:
-                await peer._disconection()
+        if peer.state is not ConnectionState.CLOSED:
+            await peer._disconection()
 
-        # TODO: reconnect to all when the number of connected peers <= 2
+    def peer_connected(self, peer):
+        """The connection to the peer is established and the handshake is sent
+        """
+        self._dialer.set_connected(peer.ip, peer.connect_latency)
+
+    def peer_frame(self, peer, valid: bool, header_type: int):
+        """The peer was the first to deliver a frame
+        """
+        self._dialer.add_frame(peer.ip, valid)
+        if not valid:
+            self._metrics.invalid.inc((peer.ip, get_type_name(header_type)))
+
+    def get_peer_scores(self) -> list:
+        """Known peers with their quality, the best ones go first
+        """
+        return self._dialer.get_scores()
+
+    async def evict_worst_peer(self):
+        ip = self._dialer.get_eviction_candidate()
+        if ip is None:
+            return
+
+        for peer in list(self._peers):
+            if peer.ip == ip:
+                await peer._disconection(f'{ip} is evicted for a better peer')
 
     def add_ip(self, ip_set: set):
+        """Ips received from the peers
+        """
+        if self.__ip_router is None:
+            self.assign_ip(ip_set)
+            return
+
+        new_ip = {ip for ip in ip_set if is_valid_ip(ip)
+                  and ip not in self._know_ip and ip not in self._routed_ip}
+        if len(new_ip) > 0:
+            self._routed_ip.update(new_ip)
+            self.__ip_router(new_ip)
+
+    def assign_ip(self, ip_set: set):
+        """Ips this manager connects to
+        """
         for ip in ip_set:
-            if is_valid_ip(ip) and ip not in self._know_ip:
-                self._know_ip.add(ip)
-                self._backgound_tasks.create_task(self.connect_to_peer, ip)
+            if is_valid_ip(ip) and ip not in self._know_ip and ip not in self._fogeted_ip:
+                self.__add_to_dialer(ip)
+
+        self._dialer.schedule()
+
+    def __add_to_dialer(self, ip: str):
+        self._know_ip.add(ip)
+        record = self._dialer.add(ip)
+        data = self._stored_peers.pop(ip, None)
+        if data is not None:
+            restore_record(record, data)
 
     @property
     def know_ip(self):
         return self._know_ip
 
+    @property
+    def seen_frames(self):
+        return self._seen_frames
+
+    @property
+    def metrics(self) -> NetworkMetrics:
+        return self._metrics
+
+    def update_metrics(self):
+        """Sets the gauges, called before the metrics are exported
+        """
+        metrics = self._metrics
+        metrics.connected_peers.set(value=self._dialer.connected)
+        metrics.relay_queue_depth.clear()
+        metrics.relay_dropped.clear()
+        metrics.skipped_bytes.clear()
+        for peer in self._peers:
+            metrics.relay_queue_depth.set((peer.ip,), len(peer.outbound_queue))
+            metrics.relay_dropped.set((peer.ip,), peer.outbound_queue.dropped)
+            metrics.skipped_bytes.set((peer.ip,), peer.skipped_bytes)
+
+    @property
+    def verifier(self) -> SignatureVerifier:
+        return self._verifier
+
+    def is_new_frame(self, header_type: int, raw_payload) -> bool:
+        """Remembers the frame and returns False if it has already been received from any peer
+        """
+        digest = kangaroo_twelve(bytes(raw_payload))
+        return self._seen_frames.add(bytes((header_type,)) + digest)
+
     @property
     def connection_timeout(self) -> int:
         return 15
@@ -94,6 +239,22 @@ class QubicNetworkManager():
     def add_callback(self, callback):
         self.__callbacks.add_callback(callback=callback)
 
+    def add_payload_callback(self, callback):
+        """`callback(header_type, payload)` receives the raw payload of every accepted frame.
+
+        The payload is a memoryview over an immutable copy of the frame shared
+        with the relay, no struct is built for it.
+        """
+        self.__payload_callbacks.add_callback(callback=callback)
+
+    @property
+    def has_data_callbacks(self) -> bool:
+        return len(self.__callbacks) > 0
+
+    def dispatch_payload(self, header_type: int, payload: memoryview):
+        self.__payload_callbacks.execute(
+            header_type=header_type, payload=payload)
+
     def __data_from_peer(self, header_type: int, data: Any):
         """
         Send data from peers to listeners
@@ -117,27 +278,55 @@ class QubicNetworkManager():
                 return False
         return True
 
+    def get_peer_data(self) -> list:
+        """Known and forgotten peers in the format of the peer store
+        """
+        peers = [to_peer_data(record.ip, record.last_seen, record.last_success, record.failures, record.stats)
+                 for record in self._dialer.get_records()]
+        peers += [to_peer_data(ip, forgotten_time, 0, 0, None, forgotten=True)
+                  for ip, forgotten_time in self._fogeted_ip.items() if is_valid_ip(ip)]
+        return peers
+
+    async def save_peers(self):
+        if self._peer_store is None:
+            return
+
+        try:
+            await self._peer_store.save(self.get_peer_data())
+        except Exception as e:
+            logging.exception(e)
+
     async def main_loop(self):
+        loop = asyncio.get_running_loop()
+        last_eviction = loop.time()
+        last_save = loop.time()
         while self.__connection_state == ConnectionState.CONNECTED:
-            connected = self.NUBMER_OF_CONNECTION - self.__semaphore._value
-            waiters = len(self.__semaphore._waiters)
+            # Peers whose backoff has expired are put back in line
+            self._dialer.schedule()
 
             logging.info(f'Epoch: {broadcasted_computors.epoch}')
 
             logging.info(
-                f'Maximum number of connections: {self.NUBMER_OF_CONNECTION}. Connected peers: {connected}. Waiting in line for connection: {waiters}')
+                f'Maximum number of connections: {self.NUBMER_OF_CONNECTION}. Connected peers: {self._dialer.connected}. Dialing: {self._dialer.dials}. Waiting in line for connection: {self._dialer.pending}. Backoff: {self._dialer.count(PeerState.BACKOFF)}')
 
             ips = [ip for ip in [peer.ip for peer in self._peers]]
             logging.info(f'Connected to {", ".join(ips)}')
 
-            # Reconnect to all is queue is empty
-            if waiters <= 0 and connected <= 2:
-                logging.info('Reconnect to all')
-                ip_list = list(self.know_ip)
-                shuffle(ip_list)
-                logging.info(ip_list)
-                for ip in ip_list:
-                    self._backgound_tasks.create_task(self.connect_to_peer, ip)
+            logging.info(
+                f'Duplicate frames: {self._seen_frames.hits}. Unique frames: {self._seen_frames.misses}')
+            logging.info(
+                f'Verification cache hits: {verification_cache.hits}. Misses: {verification_cache.misses}. Hit rate: {verification_cache.hit_rate:.2%}')
+
+            if loop.time() - last_eviction >= self.EVICTION_INTERVAL_S:
+                last_eviction = loop.time()
+                connected_scores = [
+                    f'{data["ip"]}: {data["score"]:.3f}' for data in self.get_peer_scores() if data['state'] == PeerState.CONNECTED.name]
+                logging.info(f'Peer scores: {", ".join(connected_scores)}')
+                await self.evict_worst_peer()
+
+            if loop.time() - last_save >= self.PEER_STORE_INTERVAL_S:
+                last_save = loop.time()
+                await self.save_peers()
 
             await asyncio.sleep(1)
 
@@ -146,13 +335,15 @@ class QubicNetworkManager():
             if broadcasted_computors.epoch > 0:
                 self.__data_from_peer(
                     header_type=BROADCAST_COMPUTORS, data=broadcasted_computors.broadcastComputors)
+                # The late subscribers learn the epoch from the repeat
+                self.dispatch_payload(BROADCAST_COMPUTORS, memoryview(
+                    bytes(broadcasted_computors.broadcastComputors)))
 
             await asyncio.sleep(30)
 
     async def start(self):
         self.__connection_state = ConnectionState.CONNECTING
-        for ip in self.know_ip:
-            self._backgound_tasks.create_task(self.connect_to_peer, ip)
+        self._dialer.start()
 
         self.__connection_state = ConnectionState.CONNECTED
         self._backgound_tasks.create_task(self.send_computors)
@@ -160,46 +351,57 @@ class QubicNetworkManager():
 
     async def stop(self):
         self.__connection_state = ConnectionState.CLOSED
+        await self._dialer.stop()
+        await self.save_peers()
+
         tasks = []
         for peer in self._peers:
             tasks.append(peer.stop())
 
         await asyncio.gather(*tasks)
+        self._verifier.shutdown()
 
-    async def send_other(self, raw_data: bytes, peer_requestor):
-        tasks = []
-        try:
-            for peer in self._peers:
-                if peer != peer_requestor:
-                    tasks.append(peer.send_data(raw_data))
-
-            await asyncio.gather(*tasks)
-        except Exception as e:
+    def send_other(self, header_type: int, raw_data: bytes, peer_requestor):
+        """Queues the frame to all peers except the requestor, a slow peer only drops its own frames
+        """
+        fanout = 0
+        for peer in self._peers:
+            if peer != peer_requestor and peer.enqueue_data(header_type, raw_data):
+                fanout += 1
 
-            logging.exception(e)
-            pass
+        self._metrics.relay_fanout.observe(
+            (get_type_name(header_type),), fanout)
 
     def foget_peer(self, peer):
         if peer in self._peers:
             self._peers.remove(peer)
             self._know_ip.remove(peer.ip)
-            self._fogeted_ip.add(peer.ip)
+            self._fogeted_ip[peer.ip] = time.time()
+            self._dialer.forget(peer.ip)
+            self._metrics.remove('peer', peer.ip)
 
     def remove_peer(self, peer):
         if peer in self._peers:
             self._peers.remove(peer)
+            self._metrics.remove('peer', peer.ip)
 
 
 class Peer():
+    OUTBOUND_QUEUE_SIZE = int(getenv('QUBIC_NETWORK_OUTBOUND_QUEUE_SIZE', 1024))
+    OUTBOUND_BATCH_BYTES = 256 * 1024
+
     def __init__(self, qubic_network: QubicNetworkManager) -> None:
         self.__qubic_manager = qubic_network
         self.__connect_task: Optional[asyncio.Task] = None
-        self.__reader: Optional[asyncio.StreamReader] = None
-        self.__writer: Optional[asyncio.StreamWriter] = None
+        self.__protocol: Optional[QubicProtocol] = None
         self.__ip = ""
+        self.__connect_latency = 0.0
         self.__state: ConnectionState = ConnectionState.NONE
         self.__callbacks = Callbacks()
         self.__backgound_tasks = BackgroundTasks()
+        # Computors and ticks are sent first, solutions are shed under load
+        self.__outbound = PriorityFrameQueue(Peer.OUTBOUND_QUEUE_SIZE, PRIORITIES, NUMBER_OF_PRIORITIES,
+                                             PRIORITY_NORMAL, CLASS_MAX_SIZES)
 
     @property
     def ip(self):
@@ -209,10 +411,22 @@ class Peer():
     def state(self):
         return self.__state
 
+    @property
+    def connect_latency(self) -> float:
+        return self.__connect_latency
+
     @property
     def read_timeout(self):
         return 10
 
+    @property
+    def outbound_queue(self) -> PriorityFrameQueue:
+        return self.__outbound
+
+    @property
+    def skipped_bytes(self) -> int:
+        return self.__protocol.skipped_bytes if self.__protocol is not None else 0
+
     async def connect(self, ip: str, port: int, timeout: int):
         self.__ip = ip
 
@@ -220,18 +434,21 @@ class Peer():
 
         self.__state = ConnectionState.CONNECTING
 
-        self.__connect_task = asyncio.create_task(
-            asyncio.open_connection(ip, port))
+        loop = asyncio.get_running_loop()
+        connect_begin = loop.time()
+        self.__connect_task = asyncio.create_task(loop.create_connection(
+            lambda: QubicProtocol(self.read_timeout), ip, port))
 
         try:
-            reader, writer = await asyncio.wait_for(self.__connect_task, timeout)
+            transport, protocol = await asyncio.wait_for(self.__connect_task, timeout)
         except Exception as e:
             await self._disconection(e)
             return
 
+        self.__connect_latency = loop.time() - connect_begin
+
         self.__state = ConnectionState.CONNECTED
-        self.__reader = reader
-        self.__writer = writer
+        self.__protocol = protocol
 
         try:
             await self.handshake()
@@ -239,6 +456,12 @@ class Peer():
             await self._disconection(e)
             return
 
+        if self.__state != ConnectionState.CONNECTED:
+            return
+
+        self.__qubic_manager.peer_connected(self)
+
+        self.__backgound_tasks.create_task(self.__write_loop)
         task = self.__backgound_tasks.create_task(self.__read_loop)
         done, pending = await asyncio.wait([task])
         result_task: asyncio.Task = None
@@ -263,7 +486,7 @@ class Peer():
         from qubic.qubicdata import NUMBER_OF_EXCHANGED_PEERS
         from qubic.qubicutils import ip_to_ctypes
         print("Handshake")
-        if not self.__writer.is_closing():
+        if not self.__protocol.is_closing():
             # TODO: add public peers
             exchange_public_peers = ExchangePublicPeers()
 
@@ -276,9 +499,9 @@ class Peer():
             header.nonce = 0
 
             know_ip = self.__qubic_manager.know_ip
-            random_ip_list = random.sample(know_ip, min(
+            random_ip_list = random.sample(list(know_ip), min(
                 len(know_ip), NUMBER_OF_EXCHANGED_PEERS))
-            for i in range(0, NUMBER_OF_EXCHANGED_PEERS):
+            for i in range(0, len(random_ip_list)):
                 exchange_public_peers.peers[i] = ip_to_ctypes(
                     random_ip_list[i])
 
@@ -300,17 +523,6 @@ class Peer():
         self.__qubic_manager.remove_peer(self)
         await self.stop()
 
-    async def __read_data(self, size) -> bytes:
-        task = self.__backgound_tasks.create_task(
-            self.__reader.readexactly, size)
-
-        raw_data = await asyncio.wait_for(task, self.read_timeout)
-
-        if len(raw_data) != size:
-            raise ConnectionError(f"Unable to read the data ({len(raw_data)}")
-
-        return raw_data
-
     async def send_data(self, raw_data: bytes):
         if self.__state != ConnectionState.CONNECTED:
             return
@@ -319,38 +531,73 @@ class Peer():
             await self._disconection("Data cannot be empty")
             return
 
-        if self.__writer.is_closing():
+        if self.__protocol.is_closing():
             await self._disconection("Writer closed")
             return
 
         try:
-            self.__writer.write(raw_data)
-            await self.__writer.drain()
+            self.__protocol.write(raw_data)
+            await self.__protocol.drain()
         except Exception as e:
             await self._disconection(e)
             return
-        # await self.__writer.drain()
+
+    def enqueue_data(self, header_type: int, raw_data: bytes) -> bool:
+        """Queues the frame for the writer without waiting for it to be sent, returns False if the frame is dropped
+        """
+        if self.__state != ConnectionState.CONNECTED:
+            return False
+
+        return self.__outbound.put(header_type, raw_data)
+
+    async def __write_loop(self):
+        """Sends the queued frames, everything queued while waiting for the socket goes in one batch
+        """
+        while self.__state == ConnectionState.CONNECTED:
+            batch = await self.__outbound.get_batch(Peer.OUTBOUND_BATCH_BYTES)
+            if self.__protocol.is_closing():
+                await self._disconection("Writer closed")
+                return
+
+            try:
+                self.__protocol.writelines(batch)
+                await self.__protocol.drain()
+            except Exception as e:
+                await self._disconection(e)
+                return
 
     async def __read_loop(self):
+        metrics = self.__qubic_manager.metrics
         while self.__state == ConnectionState.CONNECTED:
             try:
-                raw_data = await self.__read_message()
-                header = get_header_from_bytes(raw_data)
+                header, raw_frame = await self.__protocol.read_frame()
                 header_type = header.type
-                raw_payload = get_raw_payload(raw_data)
+                raw_payload = raw_frame[HEADER_SIZE:]
 
             except Exception as e:
                 logging.exception(e)
                 await self._disconection(e)
                 return
 
+            labels = (self.__ip, get_type_name(header_type))
+            metrics.frames.inc(labels)
+            metrics.bytes.inc(labels, header.size)
+
+            # The same frame comes from every neighbour, only the first one is processed and relayed
+            if header_type != REQUEST_COMPUTORS and not self.__qubic_manager.is_new_frame(header_type, raw_payload):
+                metrics.duplicates.inc(labels)
+                continue
+
+            # The frame buffer is reused by the next read, one copy is shared by the relay and the listeners
+            frame = None
             if header_type == EXCHANGE_PUBLIC_PEERS:
                 exchange_public_peers = ExchangePublicPeers.from_buffer_copy(
                     raw_payload)
                 self.__qubic_manager.add_ip(
                     set(exchange_public_peers_to_list(exchange_public_peers)))
-                self.__callbacks.execute(
-                    header_type=EXCHANGE_PUBLIC_PEERS, data=exchange_public_peers)
+                frame = bytes(raw_frame)
+                self.__dispatch(EXCHANGE_PUBLIC_PEERS,
+                                exchange_public_peers, frame)
 
             if header_type == BROADCAST_COMPUTORS:
                 logging.info('BROADCAST_COMPUTORS')
@@ -362,84 +609,95 @@ class Peer():
                     await self._disconection()
                     return
 
+                frame = bytes(raw_frame)
                 computors: Computors = broadcast_computors.computors
                 if can_apply_computors_data(computors=computors):
-                    if is_valid_computors_data(computors):
-                        apply_computors(computors=computors)
-
-                        self.__callbacks.execute(
-                            header_type=BROADCAST_COMPUTORS, data=broadcast_computors)
+                    self.__verify(self.__qubic_manager.verifier.verify_computors(computors),
+                                  header_type, broadcast_computors, frame)
             elif header_type == BROADCAST_RESOURCE_TESTING_SOLUTION:
                 logging.info('BROADCAST_RESOURCE_TESTING_SOLUTION')
-                self.__callbacks.execute(
-                    header_type=header_type, data=BroadcastResourceTestingSolution.from_buffer_copy(raw_payload))
+                self.__qubic_manager.peer_frame(
+                    self, valid=True, header_type=header_type)
+                frame = bytes(raw_frame)
+                # Nobody may need the struct, the publisher takes the raw payload
+                solution = None
+                if self.__qubic_manager.has_data_callbacks:
+                    solution = BroadcastResourceTestingSolution.from_buffer_copy(
+                        frame, HEADER_SIZE)
+                self.__dispatch(header_type, solution, frame)
             elif header_type == BROADCAST_TICK:
-                try:
+                if is_plausible_tick(raw_payload):
                     tick = Tick.from_buffer_copy(raw_payload)
-                except Exception as e:
-                    logging.exception(e)
-                    continue
-
-                if tick.hour <= 23 and tick.minute <= 59 and tick.second <= 59 and tick.millisecond <= 999 and tick.computorIndex < NUMBER_OF_COMPUTORS:
-                    if is_valid_tick_data(tick):
-                        self.__callbacks.execute(
-                            header_type=header_type, data=tick)
-                    else:
-                        logging.info('tick is not valid')
+                    frame = bytes(raw_frame)
+                    self.__verify(self.__qubic_manager.verifier.verify_tick(tick),
+                                  header_type, tick, frame)
+                else:
+                    self.__qubic_manager.peer_frame(
+                        self, valid=False, header_type=header_type)
             elif header_type == REQUEST_COMPUTORS:
                 logging.info('REQUEST_COMPUTORS')
                 if broadcasted_computors.epoch > 0:
                     logging.info('Send broadcasted_computors')
-                    self.__backgound_tasks.create_task(
-                        self.send_data, bytes(broadcasted_computors))
+                    self.enqueue_data(BROADCAST_COMPUTORS,
+                                      bytes(broadcasted_computors))
                 # Do not send this request to other piers
                 continue
             elif header_type == BROADCAST_REVENUES:
                 logging.info('BROADCAST_REVENUES')
-                try:
-                    revenues = Revenues.from_buffer_copy(raw_payload)
-                except Exception as e:
-                    logging.exception(e)
-                    await self._disconection(None)
-                    return
-
-                if not can_apply_revenues(revenues=revenues):
+                # The payload size has been checked by the protocol
+                if not can_apply_revenues_payload(raw_payload):
+                    self.__qubic_manager.peer_frame(
+                        self, valid=False, header_type=header_type)
                     continue
 
-                if not is_valid_revenues_data(revenues):
-                    logging.warning('Revenues failed the signature check')
-                    continue
+                revenues = Revenues.from_buffer_copy(raw_payload)
 
-                self.__callbacks.execute(
-                    header_type=header_type, data=revenues)
+                # Revenues are relayed only after the signature check
+                self.__verify(self.__qubic_manager.verifier.verify_revenues(revenues),
+                              header_type, revenues, bytes(raw_frame), relay=True)
+                continue
 
-            self.__backgound_tasks.create_task(
-                self.__qubic_manager.send_other, raw_data, self)
+            self.__qubic_manager.send_other(
+                header_type, frame if frame is not None else bytes(raw_frame), self)
 
-    async def __read_message(self):
-        if self.__state != ConnectionState.CONNECTED:
-            raise ConnectionRefusedError()
+    def __dispatch(self, header_type: int, data: Any, frame: bytes):
+        """Hands the raw payload and the struct (if it is built) to the listeners
+        """
+        self.__qubic_manager.dispatch_payload(
+            header_type, memoryview(frame)[HEADER_SIZE:])
+        if data is not None:
+            self.__callbacks.execute(header_type=header_type, data=data)
 
-        # Reading Header
-        try:
-            task = self.__backgound_tasks.create_task(
-                self.__read_data, sizeof(RequestResponseHeader))
-            raw_header = await asyncio.wait_for(task, self.read_timeout)
-        except Exception as e:
-            raise e
-        header = RequestResponseHeader.from_buffer_copy(raw_header)
+    def __verify(self, future: asyncio.Future, header_type: int, data: Any, frame: bytes, relay: bool = False):
+        """Dispatches the data when the signature check is done, the reader does not wait for it
+        """
+        begin = time.perf_counter()
+        future.add_done_callback(lambda f: self.__on_verified(
+            f, header_type, data, frame, relay, begin))
+
+    def __on_verified(self, future: asyncio.Future, header_type: int, data: Any, frame: bytes, relay: bool, begin: float):
+        self.__qubic_manager.metrics.verification_time.observe(
+            (get_type_name(header_type),), time.perf_counter() - begin)
+
+        valid = not future.cancelled() and future.exception() is None and future.result()
+        if not valid:
+            logging.info(f'Invalid signature (type {header_type})')
+            self.__qubic_manager.peer_frame(
+                self, valid=False, header_type=header_type)
+            return
 
-        # Checking package validity
-        if not is_valid_header(header):
-            raise ValueError("Invalid header")
+        if header_type == BROADCAST_COMPUTORS:
+            computors: Computors = data.computors
+            if not can_apply_computors_data(computors=computors):
+                return
+            apply_computors(computors=computors)
 
-        # Reading payload
-        try:
-            raw_payload = await self.__read_data(header.size - sizeof(header))
-        except Exception as e:
-            raise e
+        self.__qubic_manager.peer_frame(
+            self, valid=True, header_type=header_type)
+        self.__dispatch(header_type, data, frame)
 
-        return raw_header + raw_payload
+        if relay:
+            self.__qubic_manager.send_other(header_type, frame, self)
 
     def foget_peer(self):
         """We forget about this peer so we don't connect to it again.
@@ -457,17 +715,15 @@ class Peer():
     async def stop(self):
         logging.info("Stop Peer")
         self.__state = ConnectionState.CLOSED
+        self.__outbound.clear()
 
         logging.info("Cancel connect")
         if self.__connect_task != None:
             await self.cancel_task(self.__connect_task)
 
         logging.info("Close write")
-        if self.__writer != None and not self.__writer.is_closing():
-            self.__writer.close()
-            try:
-                await self.__writer.wait_closed()
-            except ConnectionResetError:
-                pass
+        if self.__protocol != None and not self.__protocol.is_closing():
+            self.__protocol.close()
+            await self.__protocol.wait_closed()
 
         await self.__backgound_tasks.close()
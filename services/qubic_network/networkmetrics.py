@@ -0,0 +1,60 @@
+from qubic.qubicdata import (BROADCAST_COMPUTORS,
+                             BROADCAST_RESOURCE_TESTING_SOLUTION,
+                             BROADCAST_REVENUES, BROADCAST_TICK,
+                             EXCHANGE_PUBLIC_PEERS, REQUEST_COMPUTORS)
+from utils.metrics import Counter, Gauge, Histogram, Metrics
+
+TYPE_NAMES = {
+    EXCHANGE_PUBLIC_PEERS: 'exchange_public_peers',
+    BROADCAST_RESOURCE_TESTING_SOLUTION: 'broadcast_resource_testing_solution',
+    BROADCAST_COMPUTORS: 'broadcast_computors',
+    BROADCAST_TICK: 'broadcast_tick',
+    BROADCAST_REVENUES: 'broadcast_revenues',
+    REQUEST_COMPUTORS: 'request_computors',
+}
+
+FANOUT_BUCKETS = (0, 1, 2, 4, 8, 16, 32)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+def get_type_name(header_type: int) -> str:
+    name = TYPE_NAMES.get(header_type)
+    return name if name is not None else str(header_type)
+
+
+class NetworkMetrics(Metrics):
+    """Ingest metrics of the qubic network service, labeled by peer ip and message type
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.frames = self.add(Counter(
+            'qubic_network_frames_total', 'Received frames', ('peer', 'type')))
+        self.bytes = self.add(Counter(
+            'qubic_network_bytes_total', 'Received bytes', ('peer', 'type')))
+        self.duplicates = self.add(Counter(
+            'qubic_network_duplicates_total', 'Frames already received from another peer', ('peer', 'type')))
+        self.invalid = self.add(Counter(
+            'qubic_network_invalid_total', 'Frames with an invalid signature or content', ('peer', 'type')))
+        self.skipped_bytes = self.add(Gauge(
+            'qubic_network_skipped_bytes', 'Bytes of unknown message types dropped on the current connection', ('peer',)))
+        self.verification_time = self.add(Histogram(
+            'qubic_network_verification_seconds', 'Time from the signature check request to its result', ('type',)))
+        self.relay_fanout = self.add(Histogram(
+            'qubic_network_relay_fanout', 'Number of peers a frame is queued to', ('type',), FANOUT_BUCKETS))
+        self.relay_queue_depth = self.add(Gauge(
+            'qubic_network_relay_queue_depth', 'Frames waiting to be sent to the peer', ('peer',)))
+        self.relay_dropped = self.add(Gauge(
+            'qubic_network_relay_dropped', 'Frames dropped because the queue of the peer was full', ('peer',)))
+        self.publish_latency = self.add(Histogram(
+            'qubic_network_publish_seconds', 'Time from the reception of a message to its flush to NATS', ('type',)))
+        self.publish_batch_size = self.add(Histogram(
+            'qubic_network_publish_batch_size', 'Messages published before one flush', (), BATCH_BUCKETS))
+        self.publish_flush_time = self.add(Histogram(
+            'qubic_network_publish_flush_seconds', 'Time of one flush to NATS'))
+        self.publish_queue_depth = self.add(Gauge(
+            'qubic_network_publish_queue_depth', 'Messages waiting to be published', ('priority',)))
+        self.publish_dropped = self.add(Gauge(
+            'qubic_network_publish_dropped', 'Messages dropped because the publish queue was full', ('priority',)))
+        self.connected_peers = self.add(Gauge(
+            'qubic_network_connected_peers', 'Connected peers'))
@@ -0,0 +1,101 @@
+import time
+from typing import Optional
+
+
+class PeerStats():
+    """Quality of a peer collected over all of its connections.
+
+    Only unique frames are counted: a valid frame means the peer was the
+    first one to deliver it.
+    """
+    # Weight of the last sample in the moving averages
+    ALPHA = 0.3
+
+    def __init__(self) -> None:
+        self.connect_latency: Optional[float] = None
+        self.first_frame_delay: Optional[float] = None
+        self.valid_frames = 0
+        self.invalid_frames = 0
+        self.connections = 0
+        self.connected_time = 0.0
+        self._session_start: Optional[float] = None
+        self._first_frame_received = False
+
+    @classmethod
+    def __average(cls, current: Optional[float], value: float) -> float:
+        if current is None:
+            return value
+
+        return current + cls.ALPHA * (value - current)
+
+    @property
+    def has_history(self) -> bool:
+        return self.connections > 0
+
+    @property
+    def session_time(self) -> float:
+        """Seconds since the current connection has been established
+        """
+        if self._session_start is None:
+            return 0.0
+
+        return time.monotonic() - self._session_start
+
+    @property
+    def valid_frame_rate(self) -> float:
+        total_time = self.connected_time + self.session_time
+        if total_time <= 0:
+            return 0.0
+
+        return self.valid_frames / total_time
+
+    @property
+    def invalid_share(self) -> float:
+        total = self.valid_frames + self.invalid_frames
+        if total <= 0:
+            return 0.0
+
+        return self.invalid_frames / total
+
+    def session_started(self, connect_latency: float):
+        self.connections += 1
+        self.connect_latency = self.__average(
+            self.connect_latency, connect_latency)
+        self._session_start = time.monotonic()
+        self._first_frame_received = False
+
+    def session_ended(self):
+        self.connected_time += self.session_time
+        self._session_start = None
+
+    def add_frame(self, valid: bool):
+        if not valid:
+            self.invalid_frames += 1
+            return
+
+        self.valid_frames += 1
+        if not self._first_frame_received and self._session_start is not None:
+            self._first_frame_received = True
+            self.first_frame_delay = self.__average(
+                self.first_frame_delay, self.session_time)
+
+    def score(self, unknown_score: float = 1.0) -> float:
+        """Valid frames per second, lowered by invalid frames and slow connection
+        """
+        if not self.has_history:
+            return unknown_score
+
+        delay = (self.connect_latency or 0.0) + \
+            (self.first_frame_delay or 0.0)
+        return self.valid_frame_rate * (1 - self.invalid_share) ** 2 / (1 + delay)
+
+    def to_dict(self) -> dict:
+        return {
+            'connect_latency': self.connect_latency,
+            'first_frame_delay': self.first_frame_delay,
+            'valid_frames': self.valid_frames,
+            'invalid_frames': self.invalid_frames,
+            'valid_frame_rate': self.valid_frame_rate,
+            'invalid_share': self.invalid_share,
+            'connections': self.connections,
+        }
@@ -0,0 +1,180 @@
+import ctypes
+import glob
+import logging
+import os
+import socket
+import time
+from ctypes import sizeof
+from typing import Optional
+
+import aiofiles
+
+from peerstats import PeerStats
+
+DATA_FILES_PATH = os.getenv('DATA_FILES_PATH', './')
+PEER_STORE_PATH = os.path.join(DATA_FILES_PATH, 'peers.data')
+
+
+def get_peer_store_path(worker_index: Optional[int] = None) -> str:
+    if worker_index is None:
+        return PEER_STORE_PATH
+
+    return os.path.join(DATA_FILES_PATH, f'peers.{worker_index}.data')
+
+
+def get_peer_store_paths() -> list:
+    """Stores of all workers and of the single process mode
+    """
+    return sorted(glob.glob(os.path.join(DATA_FILES_PATH, 'peers*.data')))
+
+
+def ip_to_int(ip: str) -> int:
+    return int.from_bytes(socket.inet_aton(ip), 'big')
+
+
+def int_to_ip(value: int) -> str:
+    return socket.inet_ntoa(value.to_bytes(4, 'big'))
+
+
+class PeerStoreHeader(ctypes.Structure):
+    _pack_ = 1
+    _fields_ = [('magic', ctypes.c_uint32),
+                ('version', ctypes.c_uint16),
+                ('reserved', ctypes.c_uint16),
+                ('count', ctypes.c_uint32)]
+
+
+class PeerData(ctypes.Structure):
+    """One peer on the disk, the times are unix seconds and -1 is an unknown average
+    """
+    _pack_ = 1
+    _fields_ = [('ip', ctypes.c_uint32),
+                ('last_seen', ctypes.c_uint32),
+                ('last_success', ctypes.c_uint32),
+                ('failures', ctypes.c_uint16),
+                ('forgotten', ctypes.c_uint8),
+                ('reserved', ctypes.c_uint8),
+                ('connect_latency', ctypes.c_float),
+                ('first_frame_delay', ctypes.c_float),
+                ('valid_frames', ctypes.c_uint32),
+                ('invalid_frames', ctypes.c_uint32),
+                ('connections', ctypes.c_uint32),
+                ('connected_time', ctypes.c_float)]
+
+
+def to_peer_data(ip: str, last_seen: float, last_success: float, failures: int, stats: Optional[PeerStats], forgotten: bool = False) -> PeerData:
+    data = PeerData(ip=ip_to_int(ip), last_seen=int(last_seen), last_success=int(last_success),
+                    failures=min(failures, 0xFFFF), forgotten=forgotten,
+                    connect_latency=-1, first_frame_delay=-1)
+    if stats is not None:
+        if stats.connect_latency is not None:
+            data.connect_latency = stats.connect_latency
+        if stats.first_frame_delay is not None:
+            data.first_frame_delay = stats.first_frame_delay
+        data.valid_frames = stats.valid_frames
+        data.invalid_frames = stats.invalid_frames
+        data.connections = stats.connections
+        data.connected_time = stats.connected_time + stats.session_time
+
+    return data
+
+
+def restore_stats(stats: PeerStats, data: PeerData):
+    stats.connect_latency = data.connect_latency if data.connect_latency >= 0 else None
+    stats.first_frame_delay = data.first_frame_delay if data.first_frame_delay >= 0 else None
+    stats.valid_frames = data.valid_frames
+    stats.invalid_frames = data.invalid_frames
+    stats.connections = data.connections
+    stats.connected_time = data.connected_time
+
+
+def restore_record(record, data: PeerData):
+    """Restores a PeerRecord of the DialScheduler
+    """
+    record.last_seen = data.last_seen
+    record.last_success = data.last_success
+    record.failures = data.failures
+    restore_stats(record.stats, data)
+
+
+def rank_peers(peers: list) -> list:
+    """Ips of the stored peers which are not forgotten, the best ones go first
+    """
+    def get_rank(data: PeerData):
+        stats = PeerStats()
+        restore_stats(stats, data)
+        return (stats.score(unknown_score=0.0), data.last_success, data.last_seen)
+
+    return [int_to_ip(data.ip) for data in sorted(peers, key=get_rank, reverse=True) if not data.forgotten]
+
+
+class PeerStore():
+    """Known peers kept between restarts.
+
+    The file is a PeerStoreHeader followed by an array of PeerData. It is
+    written to a temporary file which then replaces the old one, a crash
+    never leaves a half written store.
+    """
+    MAGIC = 0x52535051
+    VERSION = 1
+    # Peers which have not been seen for a week are not loaded
+    MAX_AGE_S = 7 * 24 * 60 * 60
+
+    def __init__(self, path: str, load_paths: Optional[list] = None) -> None:
+        self._path = path
+        self._load_paths = load_paths if load_paths is not None else [path]
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def load(self) -> list:
+        """Returns the stored peers, the most recently seen record wins when an ip is in several files
+        """
+        peers = dict()
+        oldest = time.time() - PeerStore.MAX_AGE_S
+        for path in self._load_paths:
+            for data in self.__read(path):
+                if data.last_seen < oldest:
+                    continue
+
+                current = peers.get(data.ip)
+                if current is None or data.last_seen > current.last_seen:
+                    peers[data.ip] = data
+
+        return list(peers.values())
+
+    def __read(self, path: str) -> list:
+        try:
+            with open(path, 'rb') as f:
+                raw_data = f.read()
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            logging.exception(e)
+            return []
+
+        if len(raw_data) < sizeof(PeerStoreHeader):
+            logging.warning(f'{path}: peer store is too small')
+            return []
+
+        header = PeerStoreHeader.from_buffer_copy(raw_data)
+        size = sizeof(PeerStoreHeader) + header.count * sizeof(PeerData)
+        if header.magic != PeerStore.MAGIC or header.version != PeerStore.VERSION or len(raw_data) != size:
+            logging.warning(f'{path}: peer store is not valid')
+            return []
+
+        return list((PeerData * header.count).from_buffer_copy(raw_data, sizeof(PeerStoreHeader)))
+
+    async def save(self, peers: list):
+        header = PeerStoreHeader(
+            magic=PeerStore.MAGIC, version=PeerStore.VERSION, count=len(peers))
+        raw_data = bytes(header) + bytes((PeerData * len(peers))(*peers))
+
+        temp_path = f'{self._path}.tmp'
+        async with aiofiles.open(temp_path, 'wb') as f:
+            await f.write(raw_data)
+            await f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temp_path, self._path)
@@ -0,0 +1,64 @@
+import logging
+from os import getenv
+
+from qubic.qubicdata import (BROADCAST_COMPUTORS,
+                             BROADCAST_RESOURCE_TESTING_SOLUTION,
+                             BROADCAST_REVENUES, BROADCAST_TICK,
+                             EXCHANGE_PUBLIC_PEERS, REQUEST_COMPUTORS)
+
+"""Priority classes of the relay and publish queues, class 0 goes first
+"""
+PRIORITY_CRITICAL = 0
+PRIORITY_HIGH = 1
+PRIORITY_NORMAL = 2
+PRIORITY_LOW = 3
+NUMBER_OF_PRIORITIES = 4
+PRIORITY_NAMES = ('critical', 'high', 'normal', 'low')
+
+DEFAULT_PRIORITIES = {
+    BROADCAST_COMPUTORS: PRIORITY_CRITICAL,
+    REQUEST_COMPUTORS: PRIORITY_CRITICAL,
+    BROADCAST_TICK: PRIORITY_HIGH,
+    BROADCAST_REVENUES: PRIORITY_NORMAL,
+    EXCHANGE_PUBLIC_PEERS: PRIORITY_NORMAL,
+    BROADCAST_RESOURCE_TESTING_SOLUTION: PRIORITY_LOW,
+}
+
+# Solutions are big and not urgent, only the newest ones wait in a queue
+LOW_PRIORITY_QUEUE_SIZE = int(
+    getenv('QUBIC_NETWORK_LOW_PRIORITY_QUEUE_SIZE', 64))
+
+
+def parse_priorities(value: str) -> dict:
+    """Parses 'header_type:class,header_type:class', the invalid items are ignored
+    """
+    priorities = dict()
+    for item in value.split(','):
+        if len(item.strip()) <= 0:
+            continue
+
+        try:
+            header_type, priority = [int(part) for part in item.split(':')]
+        except ValueError:
+            logging.warning(f'Invalid priority: {item}')
+            continue
+
+        if 0 <= priority < NUMBER_OF_PRIORITIES:
+            priorities[header_type] = priority
+        else:
+            logging.warning(f'Invalid priority class: {item}')
+
+    return priorities
+
+
+def get_priorities() -> dict:
+    """Default priorities updated with QUBIC_NETWORK_PRIORITIES
+    """
+    priorities = dict(DEFAULT_PRIORITIES)
+    priorities.update(parse_priorities(
+        getenv('QUBIC_NETWORK_PRIORITIES', '')))
+    return priorities
+
+
+PRIORITIES = get_priorities()
+CLASS_MAX_SIZES = {PRIORITY_LOW: LOW_PRIORITY_QUEUE_SIZE}
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from os import getenv
+from typing import Optional
+
+import nats.errors
+from custom_nats.custom_nats import Nats
+from nats.aio.client import Client
+from qubic.qubicdata import (BROADCAST_COMPUTORS,
+                             BROADCAST_RESOURCE_TESTING_SOLUTION,
+                             BROADCAST_REVENUES, BROADCAST_TICK,
+                             EXCHANGE_PUBLIC_PEERS, Subjects)
+from utils.framequeue import PriorityFrameQueue
+
+from networkmetrics import NetworkMetrics, get_type_name
+from priorities import (CLASS_MAX_SIZES, NUMBER_OF_PRIORITIES,
+                        PRIORITY_NAMES, PRIORITIES, PRIORITY_NORMAL)
+
+# Header type -> subject
+SUBJECTS = {
+    BROADCAST_COMPUTORS: Subjects.BROADCAST_COMPUTORS,
+    EXCHANGE_PUBLIC_PEERS: Subjects.EXCHANGE_PUBLIC_PEERS,
+    BROADCAST_RESOURCE_TESTING_SOLUTION: Subjects.BROADCAST_RESOURCE_TESTING_SOLUTION,
+    BROADCAST_TICK: Subjects.BROADCAST_TICK,
+    BROADCAST_REVENUES: Subjects.BROADCAST_REVENUES,
+}
+
+
+class Publisher():
+    """Publishes the data received from the peers to NATS.
+
+    The data waits in a priority queue: computors and ticks are published
+    first and only the newest solutions are kept when NATS does not keep up.
+    The payloads are the raw slices of the received frames, they are
+    published as they are over one long-lived connection.
+
+    Messages are gathered for BATCH_WINDOW_S (or until BATCH_BYTES are
+    queued) and published in one burst followed by one flush. While NATS
+    is slow or reconnecting nothing is taken from the queue, so the queue
+    fills up and sheds the lowest priority messages.
+    """
+    QUEUE_SIZE = int(getenv('QUBIC_NETWORK_PUBLISH_QUEUE_SIZE', 4096))
+    BATCH_BYTES = int(getenv('QUBIC_NETWORK_PUBLISH_BATCH_BYTES', 256 * 1024))
+    BATCH_WINDOW_S = float(getenv('QUBIC_NETWORK_PUBLISH_WINDOW', 0.005))
+    FLUSH_TIMEOUT_S = 5
+    RECONNECT_WAIT_S = 0.1
+
+    def __init__(self, metrics: NetworkMetrics) -> None:
+        self._metrics = metrics
+        self._nc: Optional[Client] = None
+        self._queue = PriorityFrameQueue(Publisher.QUEUE_SIZE, PRIORITIES, NUMBER_OF_PRIORITIES,
+                                         PRIORITY_NORMAL, CLASS_MAX_SIZES)
+
+    @property
+    def queue(self) -> PriorityFrameQueue:
+        return self._queue
+
+    def add_payload(self, header_type: int, payload: memoryview):
+        """Payload callback of the QubicNetworkManager, the payload is not copied
+        """
+        if header_type not in SUBJECTS:
+            return
+
+        self._queue.put(header_type, (payload, time.perf_counter()), len(payload))
+
+    def update_metrics(self):
+        metrics = self._metrics
+        for priority_class, name in enumerate(PRIORITY_NAMES):
+            metrics.publish_queue_depth.set(
+                (name,), self._queue.get_class_size(priority_class))
+            metrics.publish_dropped.set(
+                (name,), self._queue.get_dropped(priority_class))
+
+    async def __connect(self) -> Optional[Client]:
+        """The connection is opened once, the client reconnects by itself
+        """
+        if self._nc is None or self._nc.is_closed:
+            self._nc = await Nats().connect()
+
+        return self._nc
+
+    async def run(self):
+        while True:
+            await self._queue.wait()
+
+            nc = await self.__connect()
+            if nc is None or not nc.is_connected:
+                # The messages stay in the queue
+                await asyncio.sleep(Publisher.RECONNECT_WAIT_S)
+                continue
+
+            if self._queue.bytes < Publisher.BATCH_BYTES:
+                await asyncio.sleep(Publisher.BATCH_WINDOW_S)
+
+            frames = await self._queue.get_frames(Publisher.BATCH_BYTES)
+            published = []
+            for header_type, (payload, begin) in frames:
+                try:
+                    await nc.publish(SUBJECTS[header_type], payload=payload)
+                except nats.errors.Error as e:
+                    logging.exception(e)
+                    continue
+
+                published.append((header_type, begin))
+
+            begin_flush = time.perf_counter()
+            try:
+                await nc.flush(timeout=Publisher.FLUSH_TIMEOUT_S)
+            except (nats.errors.Error, asyncio.TimeoutError) as e:
+                logging.warning(f'Flush to Nats failed: {e!r}')
+                continue
+
+            end = time.perf_counter()
+            metrics = self._metrics
+            metrics.publish_flush_time.observe(value=end - begin_flush)
+            metrics.publish_batch_size.observe(value=len(published))
+            for header_type, begin in published:
+                metrics.publish_latency.observe(
+                    (get_type_name(header_type),), end - begin)
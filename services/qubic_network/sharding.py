@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+from typing import Callable
+
+from qubic.qubicdata import BROADCAST_COMPUTORS, BroadcastComputors
+from qubic.qubicutils import (apply_computors, can_apply_computors_data,
+                              is_valid_ip)
+from utils.sharedseenset import SharedSeenSet
+
+# Messages between the processes (tuples, the first item is the kind):
+# worker -> coordinator: (MESSAGE_IP, worker_index, [ip]) and (MESSAGE_COMPUTORS, worker_index, epoch, bytes)
+# coordinator -> worker: (MESSAGE_IP, [ip]), (MESSAGE_COMPUTORS, bytes) and (MESSAGE_STOP,)
+MESSAGE_IP = 'ip'
+MESSAGE_COMPUTORS = 'computors'
+MESSAGE_STOP = 'stop'
+
+# How long a blocking queue read waits before checking the state again
+QUEUE_TIMEOUT_S = 1
+
+
+def _get(q: multiprocessing.Queue):
+    try:
+        return q.get(timeout=QUEUE_TIMEOUT_S)
+    except queue.Empty:
+        return None
+
+
+class ShardCoordinator():
+    """Runs the ingestion in several worker processes.
+
+    Every known ip is assigned to exactly one worker, so the workers never
+    connect to the same peer. New computors found by a worker are passed to
+    the others and the duplicate frames are detected in a seen set shared by
+    all processes.
+    """
+    SEEN_FRAMES_SLOTS = 1 << 20
+
+    def __init__(self, workers: int, public_ip_list: list, seen_frames_ttl: float) -> None:
+        self._context = multiprocessing.get_context('spawn')
+        self._workers = workers
+        self._public_ip_list = public_ip_list
+        self._seen_frames_ttl = seen_frames_ttl
+        self._outbox = self._context.Queue()
+        self._inboxes = [self._context.Queue() for _ in range(workers)]
+        self._processes = []
+        # ip -> worker index
+        self._owners = dict()
+        self._load = [0] * workers
+        self._epoch = 0
+        self._running = False
+        self._seen_frames = None
+
+    @property
+    def owners(self) -> dict:
+        return self._owners
+
+    def assign(self, ip_list: list) -> dict:
+        """Gives the unknown ips to the workers with the fewest ips, returns worker index -> [ip]
+        """
+        assignment = dict()
+        for ip in ip_list:
+            if ip in self._owners or not is_valid_ip(ip):
+                continue
+
+            index = self._load.index(min(self._load))
+            self._owners[ip] = index
+            self._load[index] += 1
+            assignment.setdefault(index, []).append(ip)
+
+        return assignment
+
+    def start(self, target: Callable):
+        """Starts the workers, `target(worker_index, ip_list, inbox, outbox, seen_frames_name, seen_frames_slots, seen_frames_ttl)`
+        """
+        self._seen_frames = SharedSeenSet.create(
+            ShardCoordinator.SEEN_FRAMES_SLOTS, self._seen_frames_ttl)
+        assignment = self.assign(self._public_ip_list)
+
+        for index in range(self._workers):
+            process = self._context.Process(target=target, name=f'qubic-network-{index}', args=(
+                index, assignment.get(index, []), self._inboxes[index], self._outbox,
+                self._seen_frames.name, self._seen_frames.slots, self._seen_frames_ttl))
+            process.start()
+            self._processes.append(process)
+
+        self._running = True
+
+    async def run(self):
+        """Passes the messages between the workers until one of them exits
+        """
+        loop = asyncio.get_running_loop()
+        while self._running:
+            message = await loop.run_in_executor(None, _get, self._outbox)
+            if message is not None:
+                self.__handle(message)
+
+            for process in self._processes:
+                if not process.is_alive():
+                    logging.error(
+                        f'{process.name} exited with code {process.exitcode}')
+                    self._running = False
+
+    def __handle(self, message: tuple):
+        if message[0] == MESSAGE_IP:
+            _, _, ip_list = message
+            for index, assigned_ip in self.assign(ip_list).items():
+                self._inboxes[index].put((MESSAGE_IP, assigned_ip))
+        elif message[0] == MESSAGE_COMPUTORS:
+            _, sender, epoch, data = message
+            if epoch <= self._epoch:
+                return
+
+            logging.info(f'Worker {sender} found computors of epoch {epoch}')
+            self._epoch = epoch
+            for index, inbox in enumerate(self._inboxes):
+                if index != sender:
+                    inbox.put((MESSAGE_COMPUTORS, data))
+
+    async def stop(self):
+        self._running = False
+        for inbox in self._inboxes:
+            inbox.put((MESSAGE_STOP,))
+
+        loop = asyncio.get_running_loop()
+        for process in self._processes:
+            await loop.run_in_executor(None, process.join, 10)
+            if process.is_alive():
+                process.terminate()
+
+        if self._seen_frames is not None:
+            self._seen_frames.close()
+            self._seen_frames = None
+
+
+class ShardWorker():
+    """The coordinator side of a worker process
+    """
+
+    def __init__(self, index: int, inbox: multiprocessing.Queue, outbox: multiprocessing.Queue) -> None:
+        self._index = index
+        self._inbox = inbox
+        self._outbox = outbox
+        self._shared_epoch = 0
+
+    def route_ip(self, ip_set: set):
+        """Ip router of the QubicNetworkManager
+        """
+        self._outbox.put((MESSAGE_IP, self._index, list(ip_set)))
+
+    async def share_computors(self, header_type: int, data):
+        """Callback of the QubicNetworkManager
+        """
+        if header_type != BROADCAST_COMPUTORS or not isinstance(data, BroadcastComputors):
+            return
+
+        epoch = data.computors.epoch
+        if epoch > self._shared_epoch:
+            self._shared_epoch = epoch
+            self._outbox.put(
+                (MESSAGE_COMPUTORS, self._index, epoch, bytes(data)))
+
+    async def run(self, manager):
+        """Applies the coordinator messages, returns when it asks to stop.
+
+        The manager is stopped by its owner.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await loop.run_in_executor(None, _get, self._inbox)
+            if message is None:
+                continue
+
+            if message[0] == MESSAGE_STOP:
+                return
+            elif message[0] == MESSAGE_IP:
+                manager.assign_ip(set(message[1]))
+            elif message[0] == MESSAGE_COMPUTORS:
+                # The sender has already verified the signature
+                computors = BroadcastComputors.from_buffer_copy(
+                    message[1]).computors
+                if can_apply_computors_data(computors=computors):
+                    self._shared_epoch = computors.epoch
+                    apply_computors(computors=computors)
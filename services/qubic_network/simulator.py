@@ -0,0 +1,406 @@
+"""Local Qubic network for load testing the QubicNetworkManager.
+
+The simulated nodes listen on 127.0.0.1, 127.0.0.2, ... and broadcast signed
+computors, ticks, revenues and solutions like the real nodes: every frame is
+sent by every node, a part of the frames is sent again later (duplicates) and
+a part carries a broken signature. The nodes exchange each other's ips, so one
+bootstrap ip is enough.
+
+The network is signed with its own admin key derived from
+QUBIC_SIMULATOR_ADMIN_SEED. Only the qubic modules of the simulator process
+verify with that key, so the QubicNetworkManager is measured in the same
+process (--measure). The services always verify with ADMIN_ID.
+
+Usage:
+    python simulator.py [--nodes 4] [--tick-rate 200] [--revenues-rate 5] [--solution-rate 2]
+                        [--duplicate-ratio 0.1] [--invalid-ratio 0.05] [--duration 0]
+    python simulator.py --measure --duration 30 [--metrics-port 9464]
+        runs the QubicNetworkManager in this process and prints the ingest throughput and latency
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import string
+import time
+from collections import OrderedDict, deque
+from ctypes import sizeof
+from typing import Callable
+
+from algorithms.verify import (get_identity, get_private_key, get_public_key,
+                               get_subseed, kangaroo_twelve, sign)
+
+SIMULATOR_ADMIN_SEED = os.getenv(
+    'QUBIC_SIMULATOR_ADMIN_SEED', 'simulatoradminseedsimulatoradminseedsimulatoradminseedq')
+
+os.environ.setdefault('QUBIC_NETWORK_PORT', '21841')
+
+from qubic import qubicdata, qubicutils, qubicverifier  # noqa: E402
+from qubic.qubicdata import (BROADCAST_COMPUTORS,  # noqa: E402
+                             BROADCAST_RESOURCE_TESTING_SOLUTION,
+                             BROADCAST_REVENUES, BROADCAST_TICK,
+                             EXCHANGE_PUBLIC_PEERS, MAX_REVENUE_VALUE,
+                             NUMBER_OF_COMPUTORS, NUMBER_OF_EXCHANGED_PEERS,
+                             REQUEST_COMPUTORS, SIGNATURE_SIZE,
+                             BroadcastComputors,
+                             BroadcastResourceTestingSolution, Computors,
+                             ExchangePublicPeers, RequestResponseHeader,
+                             Revenues, Tick)
+from qubic.qubicutils import (get_computors_signed_data,  # noqa: E402
+                              get_protocol_version, get_revenues_signed_data,
+                              get_tick_signed_data, ip_to_ctypes)
+from utils.metrics import start_metrics_server  # noqa: E402
+
+HEADER_SIZE = sizeof(RequestResponseHeader)
+
+
+def make_frame(header_type: int, payload: bytes) -> bytes:
+    header = RequestResponseHeader(size=HEADER_SIZE + len(payload),
+                                   protocol=max(get_protocol_version(), 0), type=header_type)
+    return bytes(header) + payload
+
+
+def make_key(seed: str) -> tuple[bytes, bytes]:
+    """Returns (subseed, public key)
+    """
+    _, subseed = get_subseed(seed)
+    return (subseed, get_public_key(get_private_key(subseed)))
+
+
+def use_simulator_admin() -> str:
+    """The qubic modules of this process verify the signatures with the admin key of the simulator.
+
+    Returns the admin identity of the simulator
+    """
+    _, public_key = make_key(SIMULATOR_ADMIN_SEED)
+    for module in (qubicdata, qubicutils, qubicverifier):
+        module.ADMIN_PUBLIC_KEY = public_key
+    qubicdata.ADMIN_ID = get_identity(public_key)
+    return qubicdata.ADMIN_ID
+
+
+def break_signature(payload: bytes) -> bytes:
+    signature = bytearray(payload[-SIGNATURE_SIZE:])
+    signature[0] ^= 0xFF
+    return payload[:-SIGNATURE_SIZE] + bytes(signature)
+
+
+class SimulatedNode():
+    """Qubic node serving the frames of the SimulatedNetwork to its clients
+    """
+    # A client which does not read is disconnected like on the real node
+    MAX_WRITE_BUFFER = 4 * 1024 * 1024
+
+    def __init__(self, network, ip: str, port: int) -> None:
+        self._network = network
+        self._ip = ip
+        self._port = port
+        self._server = None
+        self._clients = set()
+        self._dropped_clients = 0
+
+    @property
+    def ip(self) -> str:
+        return self._ip
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    @property
+    def dropped_clients(self) -> int:
+        return self._dropped_clients
+
+    async def start(self):
+        self._server = await asyncio.start_server(self.__handle_client, self._ip, self._port)
+
+    async def stop(self):
+        for writer in list(self._clients):
+            writer.close()
+        self._clients.clear()
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def send(self, frame: bytes):
+        for writer in list(self._clients):
+            if writer.transport.get_write_buffer_size() > SimulatedNode.MAX_WRITE_BUFFER:
+                self._dropped_clients += 1
+                self._clients.discard(writer)
+                writer.close()
+                continue
+
+            writer.write(frame)
+
+    async def __handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        writer.write(self._network.get_exchange_public_peers_frame(self._ip))
+        self._clients.add(writer)
+
+        try:
+            while True:
+                header = RequestResponseHeader.from_buffer_copy(await reader.readexactly(HEADER_SIZE))
+                if header.size < HEADER_SIZE:
+                    break
+
+                await reader.readexactly(header.size - HEADER_SIZE)
+                if header.type == REQUEST_COMPUTORS:
+                    writer.write(self._network.computors_frame)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+
+class SimulatedNetwork():
+    """Produces the signed frames and broadcasts them through all nodes
+    """
+    # How often the producers run
+    PRODUCE_INTERVAL_S = 0.01
+    # Frames which can be sent again as duplicates
+    HISTORY_SIZE = 1024
+    # Send time of the recent unique frames, used to measure the latency
+    SENT_SIZE = 65536
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self._args = args
+        self._random = random.Random(SIMULATOR_ADMIN_SEED)
+        self._admin_subseed, self._admin_public_key = make_key(
+            SIMULATOR_ADMIN_SEED)
+        self._computor_keys = [make_key(''.join(self._random.choice(string.ascii_lowercase) for _ in range(55)))
+                               for _ in range(NUMBER_OF_COMPUTORS)]
+        self._tick = 0
+        self._history = deque(maxlen=SimulatedNetwork.HISTORY_SIZE)
+        # payload digest -> send time
+        self._sent = OrderedDict()
+        self._counters = {'unique': 0, 'duplicate': 0, 'invalid': 0}
+        self._nodes = [SimulatedNode(self, f'127.0.0.{idx + 1}', args.port)
+                       for idx in range(args.nodes)]
+        self.computors_frame = self.__make_computors_frame()
+
+    @property
+    def nodes(self) -> list:
+        return self._nodes
+
+    @property
+    def counters(self) -> dict:
+        return self._counters
+
+    def get_send_time(self, payload: bytes):
+        return self._sent.get(kangaroo_twelve(payload))
+
+    def get_exchange_public_peers_frame(self, node_ip: str) -> bytes:
+        exchange_public_peers = ExchangePublicPeers()
+        ips = [node.ip for node in self._nodes if node.ip != node_ip] or [node_ip]
+        # Every slot is filled, an empty one would be read as 0.0.0.0
+        for idx in range(NUMBER_OF_EXCHANGED_PEERS):
+            exchange_public_peers.peers[idx] = ip_to_ctypes(
+                self._random.choice(ips))
+
+        return make_frame(EXCHANGE_PUBLIC_PEERS, bytes(exchange_public_peers))
+
+    def __make_computors_frame(self) -> bytes:
+        computors = Computors(epoch=self._args.epoch)
+        for idx, (_, public_key) in enumerate(self._computor_keys):
+            computors.public_keys[idx] = type(
+                computors.public_keys[idx]).from_buffer_copy(public_key)
+
+        data, _ = get_computors_signed_data(computors)
+        computors.signature = type(computors.signature).from_buffer_copy(
+            sign(self._admin_subseed, self._admin_public_key, kangaroo_twelve(data)))
+        return make_frame(BROADCAST_COMPUTORS, bytes(BroadcastComputors(computors=computors)))
+
+    def __make_tick(self) -> bytes:
+        computor_index = self._random.randrange(NUMBER_OF_COMPUTORS)
+        now = time.gmtime()
+        tick = Tick(computorIndex=computor_index, epoch=self._args.epoch, tick=self._tick,
+                    millisecond=int(time.time() * 1000) % 1000, second=now.tm_sec, minute=now.tm_min,
+                    hour=now.tm_hour, day=now.tm_mday, month=now.tm_mon, year=now.tm_year % 100)
+        self._tick += 1
+        for field in ('initSpectrumDigest', 'saltedSpectrumDigest', 'prevComputerDigest'):
+            setattr(tick, field, type(getattr(tick, field)).from_buffer_copy(
+                self._random.randbytes(32)))
+
+        subseed, public_key = self._computor_keys[computor_index]
+        data, _ = get_tick_signed_data(tick)
+        tick.signature = type(tick.signature).from_buffer_copy(
+            sign(subseed, public_key, kangaroo_twelve(data)))
+        return bytes(tick)
+
+    def __make_revenues(self) -> bytes:
+        computor_index = self._random.randrange(NUMBER_OF_COMPUTORS)
+        revenues = Revenues(computorIndex=computor_index,
+                            epoch=self._args.epoch)
+        for idx in range(NUMBER_OF_COMPUTORS):
+            revenues.revenues[idx] = self._random.randrange(MAX_REVENUE_VALUE)
+
+        subseed, public_key = self._computor_keys[computor_index]
+        data, _ = get_revenues_signed_data(revenues)
+        revenues.signature = type(revenues.signature).from_buffer_copy(
+            sign(subseed, public_key, kangaroo_twelve(data)))
+        return bytes(revenues)
+
+    def __make_solution(self) -> bytes:
+        _, public_key = self._random.choice(self._computor_keys)
+        nonces = self._random.randbytes(
+            sizeof(BroadcastResourceTestingSolution) - len(public_key))
+        return public_key + nonces
+
+    def __broadcast(self, header_type: int, make_payload: Callable[[], bytes], signed: bool):
+        if len(self._history) > 0 and self._random.random() < self._args.duplicate_ratio:
+            frame = self._random.choice(self._history)
+            self._counters['duplicate'] += 1
+        else:
+            payload = make_payload()
+            if signed and self._random.random() < self._args.invalid_ratio:
+                payload = break_signature(payload)
+                self._counters['invalid'] += 1
+            else:
+                self._counters['unique'] += 1
+                self._sent[kangaroo_twelve(payload)] = time.perf_counter()
+                if len(self._sent) > SimulatedNetwork.SENT_SIZE:
+                    self._sent.popitem(last=False)
+
+            frame = make_frame(header_type, payload)
+            self._history.append(frame)
+
+        for node in self._nodes:
+            node.send(frame)
+
+    async def __produce(self, rate: float, header_type: int, make_payload: Callable[[], bytes], signed: bool):
+        if rate <= 0:
+            return
+
+        begin = time.perf_counter()
+        produced = 0
+        while True:
+            await asyncio.sleep(SimulatedNetwork.PRODUCE_INTERVAL_S)
+            due = int((time.perf_counter() - begin) * rate) - produced
+            for _ in range(due):
+                self.__broadcast(header_type, make_payload, signed)
+            produced += due
+
+    async def start(self):
+        for node in self._nodes:
+            await node.start()
+
+    async def run(self):
+        # The computors are broadcasted once per epoch, the late clients request them
+        for node in self._nodes:
+            node.send(self.computors_frame)
+
+        await asyncio.gather(
+            self.__produce(self._args.tick_rate, BROADCAST_TICK,
+                           self.__make_tick, signed=True),
+            self.__produce(self._args.revenues_rate, BROADCAST_REVENUES,
+                           self.__make_revenues, signed=True),
+            self.__produce(self._args.solution_rate, BROADCAST_RESOURCE_TESTING_SOLUTION,
+                           self.__make_solution, signed=False))
+
+    async def stop(self):
+        for node in self._nodes:
+            await node.stop()
+
+
+class IngestMeter():
+    """Counts the received frames and their latency since the last report
+    """
+
+    def __init__(self, network: SimulatedNetwork) -> None:
+        self._network = network
+        self._received = 0
+        self._latencies = []
+
+    def add_payload(self, header_type: int, payload: memoryview):
+        if header_type not in (BROADCAST_TICK, BROADCAST_REVENUES, BROADCAST_RESOURCE_TESTING_SOLUTION):
+            return
+
+        self._received += 1
+        send_time = self._network.get_send_time(bytes(payload))
+        if send_time is not None:
+            self._latencies.append(time.perf_counter() - send_time)
+
+    def get_report(self, elapsed: float) -> str:
+        received = self._received
+        latencies = sorted(self._latencies)
+        self._received = 0
+        self._latencies.clear()
+        if len(latencies) > 0:
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[int(len(latencies) * 0.99)] * 1000
+            latency = f'latency p50 {p50:.1f} ms, p99 {p99:.1f} ms'
+        else:
+            latency = 'no latency samples'
+
+        return f'received {received / elapsed:,.0f} frames/sec, {latency}'
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nodes', type=int, default=4)
+    parser.add_argument('--port', type=int,
+                        default=int(os.environ['QUBIC_NETWORK_PORT']))
+    parser.add_argument('--epoch', type=int, default=100)
+    parser.add_argument('--tick-rate', type=float, default=200,
+                        help='ticks per second')
+    parser.add_argument('--revenues-rate', type=float, default=5,
+                        help='revenues per second')
+    parser.add_argument('--solution-rate', type=float, default=2,
+                        help='solutions per second')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.1)
+    parser.add_argument('--invalid-ratio', type=float, default=0.05)
+    parser.add_argument('--duration', type=float, default=0,
+                        help='seconds, 0 runs until interrupted')
+    parser.add_argument('--measure', action='store_true',
+                        help='runs the QubicNetworkManager in this process')
+    parser.add_argument('--metrics-port', type=int, default=0,
+                        help='serves the metrics of the measured manager on 127.0.0.1, 0 disables it')
+    args = parser.parse_args()
+
+    admin_id = use_simulator_admin()
+    network = SimulatedNetwork(args)
+    await network.start()
+    logging.info(
+        f'{args.nodes} nodes on port {args.port}, admin {admin_id}')
+
+    qubic = None
+    meter = None
+    if args.measure:
+        from manager import QubicNetworkManager
+        # Without a peer store the simulated peers never mix with the stored ones
+        qubic = QubicNetworkManager([network.nodes[0].ip])
+        meter = IngestMeter(network)
+        qubic.add_payload_callback(meter.add_payload)
+        if args.metrics_port > 0:
+            await start_metrics_server(qubic.metrics, '127.0.0.1', args.metrics_port, qubic.update_metrics)
+        asyncio.create_task(qubic.start())
+
+    run_task = asyncio.create_task(network.run())
+    begin = time.perf_counter()
+    last_report = begin
+    try:
+        while args.duration <= 0 or time.perf_counter() - begin < args.duration:
+            await asyncio.sleep(1)
+            now = time.perf_counter()
+            clients = sum(node.clients for node in network.nodes)
+            dropped = sum(node.dropped_clients for node in network.nodes)
+            report = f'sent {network.counters}, clients {clients}, dropped clients {dropped}'
+            if meter is not None:
+                report += f', {meter.get_report(now - last_report)}'
+            logging.info(report)
+            last_report = now
+    finally:
+        run_task.cancel()
+        if qubic is not None:
+            await qubic.stop()
+        await network.stop()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import time
+import unittest
+
+from dialer import DialScheduler, PeerState
+
+
+class Dialer():
+    """Dials which last until they are released, a failed dial returns at once
+    """
+
+    def __init__(self, failing: bool = False) -> None:
+        self.failing = failing
+        self.dialed = []
+        self.released = asyncio.Event()
+
+    async def dial(self, ip: str):
+        self.dialed.append(ip)
+        if not self.failing:
+            await self.released.wait()
+
+
+class TestDialScheduler(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.schedulers = []
+
+    async def asyncTearDown(self):
+        for scheduler in self.schedulers:
+            await scheduler.stop()
+
+    def get_scheduler(self, dialer: Dialer, max_connections: int = 10, max_dials: int = 4) -> DialScheduler:
+        scheduler = DialScheduler(dialer.dial, max_connections, max_dials)
+        self.schedulers.append(scheduler)
+        return scheduler
+
+    async def test_dedupe(self):
+        dialer = Dialer()
+        scheduler = self.get_scheduler(dialer)
+        record = scheduler.add('1.1.1.1')
+        self.assertIs(record, scheduler.add('1.1.1.1'))
+        self.assertEqual(1, scheduler.pending)
+
+        scheduler.start()
+        await asyncio.sleep(0)
+        scheduler.add('1.1.1.1')
+        scheduler.schedule()
+        await asyncio.sleep(0)
+
+        self.assertEqual(['1.1.1.1'], dialer.dialed)
+        self.assertEqual(0, scheduler.pending)
+        self.assertEqual(1, scheduler.dials)
+
+    async def test_dial_limits(self):
+        dialer = Dialer()
+        scheduler = self.get_scheduler(dialer, max_connections=5, max_dials=3)
+        for idx in range(10):
+            scheduler.add(f'1.1.1.{idx}')
+
+        scheduler.start()
+        await asyncio.sleep(0)
+        self.assertEqual(3, len(dialer.dialed))
+        self.assertEqual((3, 0, 7), (scheduler.dials,
+                         scheduler.connected, scheduler.pending))
+
+        # The connected peers free dial slots, the connection slots are the limit then
+        scheduler.set_connected(dialer.dialed[0], 0.1)
+        scheduler.set_connected(dialer.dialed[1], 0.1)
+        await asyncio.sleep(0)
+        self.assertEqual((3, 2), (scheduler.dials, scheduler.connected))
+
+        scheduler.set_connected(dialer.dialed[2], 0.1)
+        await asyncio.sleep(0)
+        self.assertEqual((2, 3), (scheduler.dials, scheduler.connected))
+        self.assertEqual(5, len(dialer.dialed))
+        self.assertEqual(3, scheduler.count(PeerState.CONNECTED))
+
+    async def test_backoff(self):
+        dialer = Dialer(failing=True)
+        scheduler = self.get_scheduler(dialer)
+        record = scheduler.add('1.1.1.1')
+        scheduler.start()
+
+        for failures in range(1, 4):
+            begin = time.monotonic()
+            await asyncio.sleep(0.01)
+            self.assertEqual(PeerState.BACKOFF, record.state)
+            self.assertEqual(failures, record.failures)
+            delay = DialScheduler.BACKOFF_BASE_S * 2 ** failures
+            self.assertGreaterEqual(
+                record.next_dial_time - begin, delay * 0.8 - 0.1)
+            self.assertLessEqual(record.next_dial_time - begin, delay * 1.2)
+
+            # The peer is dialed again once its backoff has expired
+            scheduler.schedule()
+            self.assertEqual(PeerState.BACKOFF, record.state)
+            record.next_dial_time = 0
+            scheduler.schedule()
+
+        await asyncio.sleep(0.01)
+        self.assertEqual(4, len(dialer.dialed))
+
+    async def test_backoff_cap(self):
+        dialer = Dialer(failing=True)
+        scheduler = self.get_scheduler(dialer)
+        record = scheduler.add('1.1.1.1')
+        record.failures = 20
+        scheduler.start()
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(21, record.failures)
+        self.assertLessEqual(record.next_dial_time - time.monotonic(),
+                             DialScheduler.BACKOFF_MAX_S * 1.2)
+        self.assertGreaterEqual(record.next_dial_time - time.monotonic(),
+                                DialScheduler.BACKOFF_MAX_S * 0.8 - 1)
+
+    async def test_connection_resets_failures(self):
+        dialer = Dialer()
+        scheduler = self.get_scheduler(dialer)
+        record = scheduler.add('1.1.1.1')
+        record.failures = 3
+        scheduler.start()
+        await asyncio.sleep(0)
+
+        scheduler.set_connected('1.1.1.1', 0.1)
+        self.assertEqual(0, record.failures)
+        self.assertGreater(record.last_success, 0)
+
+        dialer.released.set()
+        await asyncio.sleep(0.01)
+        self.assertEqual(PeerState.BACKOFF, record.state)
+        self.assertEqual(0, scheduler.connected)
+        self.assertLessEqual(record.next_dial_time - time.monotonic(),
+                             DialScheduler.BACKOFF_BASE_S * 1.2)
+
+    async def test_forget(self):
+        dialer = Dialer()
+        scheduler = self.get_scheduler(dialer)
+        scheduler.add('1.1.1.1')
+        scheduler.add('2.2.2.2')
+        scheduler.forget('2.2.2.2')
+        scheduler.start()
+        await asyncio.sleep(0)
+        scheduler.set_connected('1.1.1.1', 0.1)
+
+        scheduler.forget('1.1.1.1')
+        self.assertEqual(['1.1.1.1'], dialer.dialed)
+        self.assertEqual(0, scheduler.connected)
+        self.assertIsNone(scheduler.get_record('1.1.1.1'))
+
+        # The end of the forgotten connection changes nothing
+        dialer.released.set()
+        await asyncio.sleep(0.01)
+        self.assertEqual((0, 0), (scheduler.connected, scheduler.dials))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
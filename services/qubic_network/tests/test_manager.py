@@ -0,0 +1,70 @@
+import asyncio
+import ctypes
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from qubic.qubicdata import (BROADCAST_COMPUTORS, BroadcastComputors,
+                             Computors)
+from qubic.qubicutils import apply_computors, broadcasted_computors
+
+from manager import QubicNetworkManager
+from peerstore import PeerStore
+
+
+class TestQubicNetworkManager(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.computors = Computors.from_buffer_copy(
+            bytes(broadcasted_computors.broadcastComputors.computors))
+
+    def tearDown(self):
+        apply_computors(self.computors)
+        self.directory.cleanup()
+
+    async def test_computors_repeat(self):
+        apply_computors(Computors(epoch=100))
+        payloads = []
+
+        def add_payload(header_type: int, payload: memoryview):
+            payloads.append((header_type, bytes(payload)))
+
+        qubic = QubicNetworkManager(
+            [], peer_store=PeerStore(os.path.join(self.directory.name, 'peers.data')))
+        qubic.add_payload_callback(add_payload)
+        async def wait_payload():
+            while len(payloads) <= 0:
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(qubic.start())
+        try:
+            await asyncio.wait_for(wait_payload(), 5)
+        finally:
+            await qubic.stop()
+            await asyncio.wait_for(task, 5)
+
+        header_type, payload = payloads[0]
+        self.assertEqual(BROADCAST_COMPUTORS, header_type)
+        self.assertEqual(ctypes.sizeof(BroadcastComputors), len(payload))
+        self.assertEqual(
+            100, BroadcastComputors.from_buffer_copy(payload).computors.epoch)
+
+    async def test_without_peer_store(self):
+        with mock.patch.object(PeerStore, 'load') as load, mock.patch.object(PeerStore, 'save') as save:
+            qubic = QubicNetworkManager(['1.2.3.4'])
+            await qubic.save_peers()
+            qubic._verifier.shutdown()
+
+        load.assert_not_called()
+        save.assert_not_called()
+        self.assertEqual(['1.2.3.4'], [record.ip for record in qubic._dialer.get_records()])
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
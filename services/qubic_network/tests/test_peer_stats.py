@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import unittest
+
+from dialer import DialScheduler
+from peerstats import PeerStats
+
+
+class TestPeerStats(unittest.TestCase):
+    def test_unknown_peer(self):
+        stats = PeerStats()
+        self.assertFalse(stats.has_history)
+        self.assertEqual(1.0, stats.score())
+        self.assertEqual(0.5, stats.score(unknown_score=0.5))
+
+    def test_moving_averages(self):
+        stats = PeerStats()
+        stats.session_started(1.0)
+        self.assertEqual(1.0, stats.connect_latency)
+        stats.session_ended()
+
+        stats.session_started(2.0)
+        self.assertAlmostEqual(1.0 + PeerStats.ALPHA, stats.connect_latency)
+        self.assertEqual(2, stats.connections)
+
+    def test_first_frame_delay(self):
+        stats = PeerStats()
+        stats.add_frame(True)
+        self.assertIsNone(stats.first_frame_delay,
+                          'A frame outside of a session has no delay')
+
+        stats.session_started(0.1)
+        stats.add_frame(False)
+        self.assertIsNone(stats.first_frame_delay,
+                          'An invalid frame is not the first frame')
+        stats.add_frame(True)
+        first_frame_delay = stats.first_frame_delay
+        self.assertIsNotNone(first_frame_delay)
+        stats.add_frame(True)
+        self.assertEqual(first_frame_delay, stats.first_frame_delay)
+        self.assertEqual((3, 1), (stats.valid_frames, stats.invalid_frames))
+
+    def test_score(self):
+        stats = PeerStats()
+        stats.connections = 1
+        stats.connected_time = 10.0
+        stats.valid_frames = 80
+        stats.invalid_frames = 20
+        stats.connect_latency = 0.5
+        stats.first_frame_delay = 0.5
+
+        # 8 valid frames per second, 20% invalid and 1 second of delay
+        self.assertAlmostEqual(8 * 0.8 ** 2 / 2, stats.score())
+
+        stats.invalid_frames = 0
+        self.assertAlmostEqual(8 / 2, stats.score())
+
+        stats.connect_latency = stats.first_frame_delay = None
+        self.assertAlmostEqual(8, stats.score())
+
+
+class Dialer():
+    async def dial(self, ip: str):
+        await asyncio.Event().wait()
+
+
+# Every peer has been connected for this long in total
+CONNECTED_TIME_S = DialScheduler.EVICTION_MIN_SESSION_S + 1
+
+
+class TestEviction(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.scheduler = DialScheduler(
+            Dialer().dial, max_connections=2, max_dials=2)
+
+    async def asyncTearDown(self):
+        await self.scheduler.stop()
+
+    def set_stats(self, ip: str, valid_frames: int):
+        stats = self.scheduler.get_record(ip).stats
+        stats.connections = max(stats.connections, 1)
+        stats.connected_time = CONNECTED_TIME_S - stats.session_time
+        stats.valid_frames = valid_frames
+
+    async def connect(self, ips: list, session_time: float):
+        for ip in ips:
+            self.scheduler.add(ip)
+        self.scheduler.start()
+        await asyncio.sleep(0)
+        for ip in ips:
+            self.scheduler.set_connected(ip, 0.0)
+            self.scheduler.get_record(ip).stats._session_start -= session_time
+            self.set_stats(ip, 10)
+
+    async def test_margin(self):
+        await self.connect(['1.1.1.1', '2.2.2.2'], CONNECTED_TIME_S)
+        self.set_stats('2.2.2.2', 5)
+        self.assertIsNone(self.scheduler.get_eviction_candidate(),
+                          'Nobody is waiting')
+
+        self.scheduler.add('3.3.3.3')
+        self.set_stats('3.3.3.3', 7)
+        self.assertIsNone(self.scheduler.get_eviction_candidate(),
+                          'The candidate is not better by EVICTION_MARGIN')
+
+        self.set_stats('3.3.3.3', 8)
+        self.assertEqual('2.2.2.2', self.scheduler.get_eviction_candidate())
+
+    async def test_short_session(self):
+        await self.connect(['1.1.1.1', '2.2.2.2'], 1)
+        self.scheduler.add('3.3.3.3')
+        self.set_stats('3.3.3.3', 1000)
+
+        self.assertIsNone(self.scheduler.get_eviction_candidate(),
+                          'A new connection is not evicted')
+
+    async def test_free_slot(self):
+        self.scheduler = DialScheduler(
+            Dialer().dial, max_connections=3, max_dials=2)
+        await self.connect(['1.1.1.1', '2.2.2.2'], CONNECTED_TIME_S)
+        self.scheduler._running = False
+        self.scheduler.add('3.3.3.3')
+        self.set_stats('3.3.3.3', 1000)
+
+        self.assertIsNone(self.scheduler.get_eviction_candidate(),
+                          'Nobody is evicted while a slot is free')
+
+    async def test_unknown_candidate(self):
+        await self.connect(['1.1.1.1', '2.2.2.2'], CONNECTED_TIME_S)
+        self.set_stats('2.2.2.2', 1)
+        self.scheduler.add('3.3.3.3')
+
+        # An unknown peer gets the average score of the known peers
+        self.assertEqual('2.2.2.2', self.scheduler.get_eviction_candidate())
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
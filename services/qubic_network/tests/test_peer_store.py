@@ -0,0 +1,141 @@
+import logging
+import os
+import tempfile
+import time
+import unittest
+
+from manager import QubicNetworkManager
+from peerstats import PeerStats
+from peerstore import (PeerStore, PeerStoreHeader, int_to_ip, rank_peers,
+                       to_peer_data)
+
+
+def get_stats(valid_frames: int, invalid_frames: int = 0, connected_time: float = 10.0) -> PeerStats:
+    stats = PeerStats()
+    stats.connections = 1
+    stats.connect_latency = 0.1
+    stats.valid_frames = valid_frames
+    stats.invalid_frames = invalid_frames
+    stats.connected_time = connected_time
+    return stats
+
+
+class TestPeerStore(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    async def test_round_trip(self):
+        now = time.time()
+        store = PeerStore(self.get_path('peers.data'))
+        await store.save([to_peer_data('1.2.3.4', now, now - 10, 2, get_stats(50, 5)),
+                          to_peer_data('5.6.7.8', now, 0, 0, None, forgotten=True)])
+
+        peers = {int_to_ip(data.ip): data for data in store.load()}
+        self.assertEqual({'1.2.3.4', '5.6.7.8'}, set(peers.keys()))
+
+        data = peers['1.2.3.4']
+        self.assertEqual((int(now), int(now - 10), 2),
+                         (data.last_seen, data.last_success, data.failures))
+        self.assertEqual((50, 5, 1), (data.valid_frames,
+                         data.invalid_frames, data.connections))
+        self.assertAlmostEqual(0.1, data.connect_latency, places=5)
+        self.assertEqual(-1, peers['5.6.7.8'].connect_latency)
+        self.assertTrue(peers['5.6.7.8'].forgotten)
+        self.assertFalse(os.path.exists(f'{store.path}.tmp'))
+
+    async def test_invalid_file(self):
+        store = PeerStore(self.get_path('peers.data'))
+        self.assertEqual([], store.load())
+
+        await store.save([to_peer_data('1.2.3.4', time.time(), 0, 0, None)])
+        with open(store.path, 'rb') as f:
+            raw_data = f.read()
+
+        for invalid_data in (raw_data[:4], raw_data[:-1], raw_data + b'\0',
+                             b'\0' * len(raw_data)):
+            with open(store.path, 'wb') as f:
+                f.write(invalid_data)
+            self.assertEqual([], store.load())
+
+        # An empty store is valid
+        await store.save([])
+        with open(store.path, 'rb') as f:
+            self.assertEqual(len(bytes(PeerStoreHeader())), len(f.read()))
+        self.assertEqual([], store.load())
+
+    async def test_max_age(self):
+        now = time.time()
+        store = PeerStore(self.get_path('peers.data'))
+        await store.save([to_peer_data('1.2.3.4', now - PeerStore.MAX_AGE_S + 60, 0, 0, None),
+                          to_peer_data('5.6.7.8', now - PeerStore.MAX_AGE_S - 60, 0, 0, None, forgotten=True)])
+
+        self.assertEqual(['1.2.3.4'], [int_to_ip(data.ip)
+                         for data in store.load()])
+
+    async def test_several_files(self):
+        now = time.time()
+        await PeerStore(self.get_path('peers.0.data')).save([to_peer_data('1.2.3.4', now - 100, 0, 1, None),
+                                                              to_peer_data('5.6.7.8', now, 0, 0, None)])
+        await PeerStore(self.get_path('peers.1.data')).save([to_peer_data('1.2.3.4', now, now, 0, None)])
+
+        store = PeerStore(self.get_path('peers.0.data'), load_paths=[self.get_path('peers.0.data'),
+                                                                     self.get_path('peers.1.data'),
+                                                                     self.get_path('peers.2.data')])
+        peers = {int_to_ip(data.ip): data for data in store.load()}
+        self.assertEqual({'1.2.3.4', '5.6.7.8'}, set(peers.keys()))
+        # The most recently seen record wins
+        self.assertEqual(int(now), peers['1.2.3.4'].last_success)
+        self.assertEqual(0, peers['1.2.3.4'].failures)
+
+    async def test_forgotten_peers(self):
+        store = PeerStore(self.get_path('peers.data'))
+        forgotten_time = int(time.time()) - 1000
+        await store.save([to_peer_data('5.6.7.8', forgotten_time, 0, 0, None, forgotten=True)])
+
+        qubic = QubicNetworkManager(['1.2.3.4'], peer_store=store)
+        try:
+            peers = {int_to_ip(data.ip): data for data in qubic.get_peer_data()}
+        finally:
+            qubic._verifier.shutdown()
+
+        # The forgotten peer keeps its time, it ages out of the store
+        self.assertTrue(peers['5.6.7.8'].forgotten)
+        self.assertEqual(forgotten_time, peers['5.6.7.8'].last_seen)
+        self.assertFalse(peers['1.2.3.4'].forgotten)
+
+
+class TestRankPeers(unittest.TestCase):
+    def test_rank(self):
+        now = time.time()
+        peers = [to_peer_data('1.1.1.1', now, now - 30, 0, get_stats(10)),
+                 to_peer_data('2.2.2.2', now, now - 30, 0, get_stats(100)),
+                 to_peer_data('3.3.3.3', now, now - 30,
+                              0, get_stats(100, 300)),
+                 to_peer_data('4.4.4.4', now, 0, 3, None),
+                 to_peer_data('5.5.5.5', now, now, 0, get_stats(1000), forgotten=True)]
+
+        self.assertEqual(['2.2.2.2', '1.1.1.1', '3.3.3.3', '4.4.4.4'],
+                         rank_peers(peers))
+
+    def test_unknown_peers(self):
+        now = time.time()
+        # Without statistics the last success and then the last time seen decide
+        peers = [to_peer_data('1.1.1.1', now - 10, 0, 0, None),
+                 to_peer_data('2.2.2.2', now - 20, now - 20, 0, None),
+                 to_peer_data('3.3.3.3', now, 0, 0, None)]
+
+        self.assertEqual(['2.2.2.2', '3.3.3.3', '1.1.1.1'], rank_peers(peers))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass
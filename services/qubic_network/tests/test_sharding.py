@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import queue
+import unittest
+
+from sharding import MESSAGE_IP, MESSAGE_STOP, ShardCoordinator, ShardWorker
+
+
+class TestShardCoordinator(unittest.TestCase):
+    def setUp(self):
+        self.coordinator = ShardCoordinator(3, [], 300)
+
+    def test_balanced_assignment(self):
+        ip_list = [f'1.1.1.{idx}' for idx in range(9)]
+        assignment = self.coordinator.assign(ip_list)
+
+        self.assertEqual([0, 1, 2], sorted(assignment.keys()))
+        self.assertEqual([3, 3, 3], [len(assignment[index])
+                         for index in range(3)])
+        self.assertEqual(sorted(ip_list), sorted(
+            ip for assigned_ip in assignment.values() for ip in assigned_ip))
+        for index, assigned_ip in assignment.items():
+            for ip in assigned_ip:
+                self.assertEqual(index, self.coordinator.owners[ip])
+
+    def test_known_and_invalid_ips(self):
+        self.coordinator.assign(['1.1.1.1', '2.2.2.2'])
+
+        assignment = self.coordinator.assign(
+            ['1.1.1.1', '2.2.2.2', '3.3.3.3', '3.3.3.3', '256.1.1.1', 'localhost'])
+        self.assertEqual({2: ['3.3.3.3']}, assignment,
+                         'Every ip goes to exactly one worker')
+        self.assertEqual(3, len(self.coordinator.owners))
+
+    def test_least_loaded_worker(self):
+        self.coordinator.assign([f'1.1.1.{idx}' for idx in range(4)])
+        # Loads are 2, 1 and 1, the new ips fill the workers with fewer ips first
+        assignment = self.coordinator.assign(['2.2.2.1', '2.2.2.2'])
+        self.assertEqual({1: ['2.2.2.1'], 2: ['2.2.2.2']}, assignment)
+
+    def test_route_ips(self):
+        self.coordinator._ShardCoordinator__handle(
+            (MESSAGE_IP, 0, ['1.1.1.1', '2.2.2.2', '3.3.3.3']))
+        self.coordinator._ShardCoordinator__handle(
+            (MESSAGE_IP, 1, ['1.1.1.1']))
+
+        for index, ip in enumerate(['1.1.1.1', '2.2.2.2', '3.3.3.3']):
+            inbox = self.coordinator._inboxes[index]
+            self.assertEqual((MESSAGE_IP, [ip]), inbox.get(timeout=5))
+            with self.assertRaises(queue.Empty):
+                inbox.get(timeout=0.1)
+
+
+class Manager():
+    def __init__(self) -> None:
+        self.assigned = []
+        self.stopped = False
+
+    def assign_ip(self, ip_set: set):
+        self.assigned.append(ip_set)
+
+    async def stop(self):
+        self.stopped = True
+
+
+class TestShardWorker(unittest.IsolatedAsyncioTestCase):
+    async def test_stop(self):
+        inbox = queue.Queue()
+        worker = ShardWorker(0, inbox, queue.Queue())
+        manager = Manager()
+        inbox.put((MESSAGE_IP, ['1.1.1.1']))
+        inbox.put((MESSAGE_STOP,))
+
+        await asyncio.wait_for(worker.run(manager), 5)
+        self.assertEqual([{'1.1.1.1'}], manager.assigned)
+        self.assertFalse(manager.stopped,
+                         'The owner of the manager stops it')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    try:
+        unittest.main()
+    finally:
+        pass